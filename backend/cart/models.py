@@ -18,6 +18,12 @@ class CartItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            # Один товар — одна строка корзины: get_or_create без гонок и дублей
+            models.UniqueConstraint(fields=['cart', 'product'], name='cart_cartitem_cart_product_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.quantity} x {self.product.name}"
     
@@ -2,6 +2,15 @@ from rest_framework import serializers
 from .models import Cart, CartItem
 from catalog.serializers import ProductSerializer
 
+
+def unit_price(serializer, item):
+    """Цена единицы товара: с учётом кампаний, если в контексте есть 'pricing' (core.pricing.PriceEngine)."""
+    pricing = serializer.context.get('pricing')
+    if pricing is None:
+        return item.product.price
+    return pricing.price(item.product).final
+
+
 class CartItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer()
     total_price = serializers.SerializerMethodField()
@@ -11,7 +20,7 @@ class CartItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product', 'quantity', 'total_price']
 
     def get_total_price(self, obj):
-        return obj.quantity * obj.product.price
+        return obj.quantity * unit_price(self, obj)
 
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True)
@@ -22,4 +31,5 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'created_at', 'items', 'total_price']
 
     def get_total_price(self, obj):
-        return sum(item.quantity * item.product.price for item in obj.items.all())
\ No newline at end of file
+        # obj.items.all() берётся из prefetch (cart.views.cart_items_prefetch) — без новых запросов
+        return sum(item.quantity * unit_price(self, item) for item in obj.items.all())
\ No newline at end of file
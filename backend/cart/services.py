@@ -0,0 +1,117 @@
+"""
+Пакетное изменение корзины: много добавлений, изменений количества и удалений за один вызов.
+Товары ищутся одним запросом, строки корзины читаются один раз,
+изменения пишутся через bulk_create / bulk_update / один DELETE.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from catalog.models import Product
+from .models import CartItem
+
+
+class CartBatchError(Exception):
+    """Некорректный пакет изменений; message уходит клиенту, status — HTTP-код ответа."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _quantity(value, allow_zero=False):
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError):
+        raise CartBatchError('Количество должно быть целым числом')
+    if quantity < 0 or (quantity == 0 and not allow_zero):
+        raise CartBatchError('Количество должно быть больше нуля')
+    return quantity
+
+
+def _resolve_products(lines):
+    """{ключ строки: product_id} для строк с product_id / product_slug — одним запросом."""
+    ids, slugs = set(), set()
+    for line in lines:
+        if line.get('product_slug'):
+            slugs.add(line['product_slug'])
+        elif line.get('product_id'):
+            try:
+                ids.add(int(line['product_id']))
+            except (TypeError, ValueError):
+                raise CartBatchError('Некорректный product_id')
+        else:
+            raise CartBatchError('Необходимо указать product_slug или product_id')
+    if not ids and not slugs:
+        return {}, {}
+    found = Product.objects.filter(Q(id__in=ids) | Q(slug__in=slugs)).values_list('id', 'slug')
+    by_id = {pk: pk for pk, _ in found}
+    by_slug = {slug: pk for pk, slug in found}
+    missing = sorted(str(i) for i in ids - by_id.keys()) + sorted(slugs - by_slug.keys())
+    if missing:
+        raise CartBatchError(f'Товар не найден: {", ".join(missing)}', status=404)
+    return by_id, by_slug
+
+
+def apply_cart_batch(cart, add=(), update=(), remove=()):
+    """
+    Применяет к корзине пакет изменений:
+      add    — [{"product_id" | "product_slug", "quantity"}] — прибавить к количеству (как add_item);
+      update — [{"id", "quantity"}] — задать количество строки, 0 — удалить (как PATCH);
+      remove — [id строки, ...] — удалить строки.
+    """
+    by_id, by_slug = _resolve_products(add)
+
+    with transaction.atomic():
+        items = {item.pk: item for item in CartItem.objects.filter(cart=cart)}
+        by_product = {}
+        for item in items.values():
+            by_product.setdefault(item.product_id, item)
+
+        to_create, to_update, to_delete = {}, {}, set()
+
+        for line in add:
+            product_id = by_slug[line['product_slug']] if line.get('product_slug') else by_id[int(line['product_id'])]
+            quantity = _quantity(line.get('quantity', 1))
+            item = by_product.get(product_id)
+            if item is not None and item.pk not in to_delete:
+                item.quantity += quantity
+                to_update[item.pk] = item
+            elif product_id in to_create:
+                to_create[product_id].quantity += quantity
+            else:
+                to_create[product_id] = CartItem(cart=cart, product_id=product_id, quantity=quantity)
+
+        for line in update:
+            try:
+                item = items[int(line.get('id'))]
+            except (KeyError, TypeError, ValueError):
+                raise CartBatchError(f'Строка корзины не найдена: {line.get("id")}', status=404)
+            quantity = _quantity(line.get('quantity'), allow_zero=True)
+            if quantity == 0:
+                to_delete.add(item.pk)
+                to_update.pop(item.pk, None)
+            else:
+                item.quantity = quantity
+                to_update[item.pk] = item
+
+        for item_id in remove:
+            try:
+                item_id = int(item_id)
+            except (TypeError, ValueError):
+                raise CartBatchError(f'Строка корзины не найдена: {item_id}', status=404)
+            if item_id not in items:
+                raise CartBatchError(f'Строка корзины не найдена: {item_id}', status=404)
+            to_delete.add(item_id)
+            to_update.pop(item_id, None)
+
+        if to_create:
+            try:
+                CartItem.objects.bulk_create(to_create.values())
+            except IntegrityError:
+                # Параллельный запрос успел добавить тот же товар (уникальность cart + product)
+                raise CartBatchError('Корзина изменилась одновременно с запросом, повторите его', status=409)
+        if to_update:
+            CartItem.objects.bulk_update(to_update.values(), ['quantity'])
+        if to_delete:
+            CartItem.objects.filter(cart=cart, pk__in=to_delete).delete()
@@ -2,19 +2,46 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import F, Prefetch
+from django.utils.functional import SimpleLazyObject
 from .models import Cart, CartItem
 from .serializers import CartSerializer
+from .services import apply_cart_batch, CartBatchError
 from catalog.models import Product
+from core.pricing import PriceEngine
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+
+def cart_items_prefetch():
+    """Строки корзины вместе с товаром, категорией и брендом — одним запросом на всю корзину."""
+    return Prefetch(
+        'items',
+        queryset=CartItem.objects.select_related('product__category', 'product__brand').order_by('id'),
+    )
+
+
+def cart_data(cart):
+    """Сериализованная корзина за фиксированное число запросов, независимо от числа строк."""
+    cart = Cart.objects.prefetch_related(cart_items_prefetch()).get(pk=cart.pk)
+    return CartSerializer(cart, context={'pricing': PriceEngine.load()}).data
+
+
 class CartViewSet(viewsets.ModelViewSet):
     serializer_class = CartSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['pricing'] = SimpleLazyObject(PriceEngine.load)
+        return context
+
     def get_queryset(self):
-        return Cart.objects.filter(user=self.request.user)
+        queryset = Cart.objects.filter(user=self.request.user)
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related(cart_items_prefetch())
+        return queryset
 
     @action(detail=False, methods=['post'])
     def add_item(self, request):
@@ -37,13 +64,31 @@ class CartViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Необходимо указать product_slug или product_id'}, status=400)
         
         cart, created = Cart.objects.get_or_create(user=request.user)
-        cart_item, created = CartItem.objects.get_or_create(cart=cart, product=product)
+        # Уникальность (cart, product) гарантирует одну строку; прибавляем атомарно, без потери обновлений
+        cart_item, created = CartItem.objects.get_or_create(cart=cart, product=product, defaults={'quantity': quantity})
         if not created:
-            cart_item.quantity += quantity
-        else:
-            cart_item.quantity = quantity
-        cart_item.save()
-        return Response(CartSerializer(cart).data)
+            CartItem.objects.filter(pk=cart_item.pk).update(quantity=F('quantity') + quantity)
+        return Response(cart_data(cart))
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Пакетное изменение корзины одним запросом (повтор заказа, «набор»):
+        {"add": [{"product_slug": "...", "quantity": 2}], "update": [{"id": 5, "quantity": 3}], "remove": [7]}
+        """
+        add = request.data.get('add') or []
+        update = request.data.get('update') or []
+        remove = request.data.get('remove') or []
+        if not all(isinstance(v, list) for v in (add, update, remove)):
+            return Response({'error': 'Поля add, update и remove должны быть списками'}, status=400)
+        if not all(isinstance(line, dict) for line in add + update):
+            return Response({'error': 'Строки add и update должны быть объектами'}, status=400)
+        cart, created = Cart.objects.get_or_create(user=request.user)
+        try:
+            apply_cart_batch(cart, add=add, update=update, remove=remove)
+        except CartBatchError as e:
+            return Response({'error': e.message}, status=e.status)
+        return Response(cart_data(cart))
 
     @action(detail=False, methods=['post'])
     def remove_item(self, request):
@@ -51,7 +96,7 @@ class CartViewSet(viewsets.ModelViewSet):
         cart_item = CartItem.objects.get(id=item_id, cart__user=request.user)
         cart_item.delete()
         cart = Cart.objects.get(user=request.user)
-        return Response(CartSerializer(cart).data)
+        return Response(cart_data(cart))
 
     def partial_update(self, request, *args, **kwargs):
         cart = self.get_object()
@@ -63,16 +108,14 @@ class CartViewSet(viewsets.ModelViewSet):
                 item.delete()
             else:
                 item.save()
-        serializer = self.get_serializer(cart)
-        return Response(serializer.data)
+        return Response(cart_data(cart))
 
     def destroy(self, request, *args, **kwargs):
         cart = self.get_object()
         item_id = request.data.get('item_id')
         if item_id:
             CartItem.objects.filter(id=item_id, cart=cart).delete()
-        serializer = self.get_serializer(cart)
-        return Response(serializer.data)
+        return Response(cart_data(cart))
 
     @action(detail=False, methods=['post'])
     def clear(self, request):
@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.db.models import F, Q
 from django.utils.html import format_html
+from . import search
 from .models import Product, Category, Brand, StockMovement, Review, ProductImage
+from .ratings import set_reviews_approved
+from .versioning import bump_catalog_version
 
 
 def get_low_stock_threshold(product):
@@ -102,11 +105,13 @@ class ProductAdmin(admin.ModelAdmin):
     @admin.action(description='Опубликовать выбранные')
     def make_published(self, request, queryset):
         updated = queryset.update(is_published=True)
+        bump_catalog_version()
         self.message_user(request, f'Опубликовано товаров: {updated}.')
 
     @admin.action(description='Снять с публикации выбранные')
     def make_unpublished(self, request, queryset):
         updated = queryset.update(is_published=False)
+        bump_catalog_version()
         self.message_user(request, f'Снято с публикации товаров: {updated}.')
 
     @admin.action(description='Изменить категорию (по фильтру слева)')
@@ -117,6 +122,9 @@ class ProductAdmin(admin.ModelAdmin):
             try:
                 cat = Category.objects.get(pk=category_id)
                 updated = queryset.update(category=cat)
+                # update() минует сигналы, а название категории есть в поисковом индексе
+                search.rebuild_index(queryset)
+                bump_catalog_version()
                 self.message_user(request, f'Категория изменена у товаров: {updated}.')
             except Category.DoesNotExist:
                 self.message_user(request, 'Категория не найдена.', level=40)
@@ -137,12 +145,12 @@ class ReviewAdmin(admin.ModelAdmin):
 
     @admin.action(description='Одобрить выбранные')
     def approve_reviews(self, request, queryset):
-        updated = queryset.update(is_approved=True)
+        updated = set_reviews_approved(queryset, True)
         self.message_user(request, f'Одобрено отзывов: {updated}.')
 
     @admin.action(description='Снять одобрение')
     def reject_reviews(self, request, queryset):
-        updated = queryset.update(is_approved=False)
+        updated = set_reviews_approved(queryset, False)
         self.message_user(request, f'Снято одобрение у отзывов: {updated}.')
 
 
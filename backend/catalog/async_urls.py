@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import async_views
+
+urlpatterns = [
+    path('products/', async_views.product_list, name='async-products-list'),
+    path('products/<str:slug>/', async_views.product_detail, name='async-products-detail'),
+    path('categories/', async_views.category_list, name='async-categories-list'),
+    path('brands/', async_views.brand_list, name='async-brands-list'),
+]
@@ -0,0 +1,183 @@
+"""
+Async-версии чтения каталога для ASGI (/api/async/catalog/...): список и карточка товара,
+категории, бренды. Запрос обслуживается в цикле событий без перехода в пул потоков:
+асинхронный ORM, асинхронный кэш (счётчик пагинации, кэш ответов для гостей).
+
+Ответы совпадают с синхронными /api/catalog/...: те же фильтры и сериализаторы, пагинация
+?page=, ETag / Last-Modified и 304 по версии каталога, X-Catalog-Cache для гостей. Keyset-пагинация
+(?pagination=cursor) передаётся синхронному ProductViewSet. Только JSON, только GET / HEAD.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from core.pricing import PriceEngine
+from shop.pagination import KeysetPagination, acached_count
+from .models import Brand, Category, Product
+from .response_cache import cache_key, get_backend
+from .serializers import BrandSerializer, CatalogProductSerializer, CategorySerializer, ProductListSerializer
+from .versioning import acurrent_version, validators
+from .views import ProductViewSet, filter_products
+
+MEDIA_TYPE = 'application/json'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_renderer = JSONRenderer()
+_product_list_sync = sync_to_async(ProductViewSet.as_view({'get': 'list'}))
+
+
+class _Invalid(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def render(status, data):
+    return HttpResponse(_renderer.render(data), content_type=MEDIA_TYPE, status=status)
+
+
+async def catalog_response(request, build):
+    """
+    Обвязка как у CatalogConditionalMixin + CatalogResponseCacheMixin: ETag / 304 по версии каталога,
+    готовый ответ для гостя из кэша. build() — корутина, возвращает данные ответа.
+    """
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    row = await acurrent_version()
+    etag, last_modified = validators(row, request.get_full_path(), MEDIA_TYPE)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        # Гость — без Authorization (API не использует сессию); ответ для всех одинаковый
+        if request.method == 'GET' and not request.META.get('HTTP_AUTHORIZATION'):
+            response = await _cached(request, row.version, build)
+        else:
+            response = await _build(build)
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+async def _build(build):
+    try:
+        return render(200, await build())
+    except _Invalid as exc:
+        return render(exc.status, {'detail': exc.detail})
+
+
+async def _cached(request, version, build):
+    backend = get_backend()
+    key = cache_key(version, request, MEDIA_TYPE)
+    entry = await backend.aget(key)
+    if entry is None:
+        async with backend.alock(key):
+            entry = await backend.aget(key)
+            if entry is None:
+                await backend.aincr('misses')
+                response = await _build(build)
+                if response.status_code == 200 and len(response.content) <= backend.options['MAX_ENTRY_BYTES']:
+                    await backend.aset(key, {
+                        'content': response.content,
+                        'content_type': response['Content-Type'],
+                        'status': response.status_code,
+                    })
+                    await backend.aincr('stores')
+                response['X-Catalog-Cache'] = 'MISS'
+                return response
+            await backend.aincr('coalesced')
+    await backend.aincr('hits')
+    response = HttpResponse(entry['content'], content_type=entry['content_type'], status=entry['status'])
+    response['X-Catalog-Cache'] = 'HIT'
+    return response
+
+
+async def paginate(request, queryset, cached_count=True):
+    """Страница ?page= в формате PageNumberPagination: (count / next / previous, объекты страницы)."""
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 100
+    count = await acached_count(queryset) if cached_count else await queryset.acount()
+    num_pages = max(1, -(-count // page_size))
+    number = request.GET.get('page') or 1
+    if number in PageNumberPagination.last_page_strings:
+        number = num_pages
+    try:
+        number = int(number)
+    except (TypeError, ValueError):
+        number = 0
+    if not 1 <= number <= num_pages:
+        raise _Invalid(404, str(PageNumberPagination.invalid_page_message))
+    offset = (number - 1) * page_size
+    objects = [obj async for obj in queryset[offset:offset + page_size]]
+
+    url = request.build_absolute_uri()
+    previous = None
+    if number > 2:
+        previous = replace_query_param(url, 'page', number - 1)
+    elif number == 2:
+        previous = remove_query_param(url, 'page')
+    return {
+        'count': count,
+        'next': replace_query_param(url, 'page', number + 1) if number < num_pages else None,
+        'previous': previous,
+    }, objects
+
+
+async def product_list(request):
+    params = request.GET
+    if params.get('pagination') == 'cursor' or params.get(KeysetPagination.cursor_query_param):
+        return await _product_list_sync(request)
+
+    async def build():
+        queryset = filter_products(
+            Product.objects.select_related('category', 'brand').filter(is_published=True), params,
+        )
+        compact = params.get('view') == 'compact'
+        if compact:
+            queryset = queryset.defer('description', 'meta_title', 'meta_description')
+        page, products = await paginate(request, queryset)
+        context = {'request': request, 'pricing': await PriceEngine.aload()}
+        if not compact:
+            return {**page, 'results': CatalogProductSerializer(products, many=True, context=context).data}
+        categories = {p.category_id: p.category for p in products}
+        brands = {p.brand_id: p.brand for p in products}
+        return {
+            **page,
+            'results': ProductListSerializer(products, many=True, context=context).data,
+            'categories': {str(pk): CategorySerializer(obj).data for pk, obj in categories.items()},
+            'brands': {str(pk): BrandSerializer(obj).data for pk, obj in brands.items()},
+        }
+
+    return await catalog_response(request, build)
+
+
+async def product_detail(request, slug):
+    async def build():
+        try:
+            product = await Product.objects.select_related('category', 'brand').aget(slug=slug)
+        except Product.DoesNotExist:
+            raise _Invalid(404, 'No Product matches the given query.')
+        context = {'request': request, 'pricing': await PriceEngine.aload()}
+        return CatalogProductSerializer(product, context=context).data
+
+    return await catalog_response(request, build)
+
+
+def _dictionary_view(model, serializer_class):
+    async def view(request):
+        async def build():
+            page, objects = await paginate(request, model.objects.all(), cached_count=False)
+            return {**page, 'results': serializer_class(objects, many=True).data}
+
+        return await catalog_response(request, build)
+
+    return view
+
+
+category_list = _dictionary_view(Category, CategorySerializer)
+brand_list = _dictionary_view(Brand, BrandSerializer)
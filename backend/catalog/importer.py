@@ -0,0 +1,347 @@
+"""
+Импорт прайс-листов поставщиков (CSV / XLSX) в каталог пачками.
+
+- Строки читаются генератором (csv.reader / openpyxl read_only): память не зависит от размера файла.
+- Категории и бренды находятся по словарям «slug / название → объект», загруженным один раз;
+  неизвестные создаются (кроме режима create_missing=False — тогда строка с ошибкой).
+- Товары пачками по batch_size: одно чтение существующих по slug (select_for_update), один
+  bulk_create(update_conflicts=True, unique_fields=['slug']) только для новых и изменившихся строк,
+  изменения остатка — одним bulk_create StockMovement (без повторного изменения остатка).
+- bulk_create не вызывает сигналы, поэтому поисковый индекс изменённых товаров пересобирается
+  явно (catalog.search.index_products), а версия каталога увеличивается один раз в конце.
+- dry_run: ничего не пишет, возвращает разницу «было → станет» по строкам.
+
+Колонки (регистр не важен, есть русские синонимы): slug, name, category, brand, price, stock,
+description, image, is_published. Для новых товаров обязательны name, category, brand, price;
+для существующих обновляются только колонки, которые есть в файле.
+"""
+import codecs
+import csv
+import io
+import os
+import time
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.db import transaction
+
+from . import search
+from .models import Brand, Category, Product, StockMovement
+from .serializers import create_slug
+from .versioning import bump_catalog_version
+
+BATCH_SIZE = 2000
+MAX_ERRORS = 100
+PRICE_STEP = Decimal('0.01')
+# Верхняя граница PositiveIntegerField (Product.stock)
+STOCK_MAX = 2147483647
+
+HEADER_ALIASES = {
+    'slug': 'slug', 'артикул': 'slug', 'sku': 'slug',
+    'name': 'name', 'название': 'name', 'наименование': 'name', 'товар': 'name',
+    'category': 'category', 'категория': 'category',
+    'brand': 'brand', 'бренд': 'brand', 'производитель': 'brand',
+    'price': 'price', 'цена': 'price',
+    'stock': 'stock', 'остаток': 'stock', 'количество': 'stock',
+    'description': 'description', 'описание': 'description',
+    'image': 'image', 'изображение': 'image', 'фото': 'image',
+    'is_published': 'is_published', 'опубликован': 'is_published',
+}
+# Колонка файла → поле модели, которое обновляется при её наличии
+UPDATE_FIELDS = {
+    'name': 'name', 'category': 'category', 'brand': 'brand', 'price': 'price', 'stock': 'stock',
+    'description': 'description', 'image': 'image', 'is_published': 'is_published',
+}
+DIFF_FIELDS = ('name', 'category_id', 'brand_id', 'price', 'stock', 'description', 'image', 'is_published')
+REQUIRED_FOR_NEW = ('name', 'category', 'brand', 'price')
+TRUE_VALUES = {'1', 'true', 'yes', 'да', 'y', '+'}
+
+
+class ImportFileError(ValueError):
+    """Файл нельзя импортировать целиком (формат, нет нужных колонок); текст — для пользователя."""
+
+
+class RowError(ValueError):
+    """Ошибка в одной строке: строка пропускается, импорт продолжается."""
+
+
+class SemicolonDialect(csv.excel):
+    """CSV из Excel с русской локалью."""
+    delimiter = ';'
+
+
+def detect_format(name):
+    ext = os.path.splitext(name)[1].lower()
+    if ext in ('.csv', '.txt'):
+        return 'csv'
+    if ext == '.xlsx':
+        return 'xlsx'
+    raise ImportFileError('Поддерживаются файлы CSV и XLSX.')
+
+
+def _normalize_header(header):
+    columns = []
+    for name in header:
+        key = str(name or '').strip().lower()
+        columns.append(HEADER_ALIASES.get(key))
+    if 'slug' not in columns and 'name' not in columns:
+        raise ImportFileError('В файле нет колонки slug или name.')
+    return columns
+
+
+def iter_csv_rows(fileobj):
+    """
+    (номер строки, {колонка: значение}) из CSV в байтах; разделитель ; , или табуляция,
+    кодировка UTF-8 или Windows-1251 (выгрузки из 1С и Excel).
+    """
+    head = fileobj.read(64 * 1024)
+    fileobj.seek(0)
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError:
+        encoding = 'cp1251'
+    text = io.TextIOWrapper(fileobj, encoding=encoding, newline='')
+    sample = text.read(64 * 1024)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=';,\t')
+    except csv.Error:
+        dialect = SemicolonDialect
+    reader = csv.reader(text, dialect)
+    columns = _normalize_header(next(reader, []))
+    for line, values in enumerate(reader, start=2):
+        if any(v.strip() for v in values):
+            yield line, {c: v for c, v in zip(columns, values) if c}
+
+
+def iter_xlsx_rows(fileobj):
+    """То же для первого листа XLSX (openpyxl в режиме read_only)."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError('Для импорта XLSX установите пакет openpyxl.')
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        columns = _normalize_header(next(rows, ()))
+        for line, values in enumerate(rows, start=2):
+            if any(v not in (None, '') for v in values):
+                yield line, {c: v for c, v in zip(columns, values) if c}
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, fmt):
+    return iter_csv_rows(fileobj) if fmt == 'csv' else iter_xlsx_rows(fileobj)
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def parse_price(value):
+    raw = _text(value).replace('\xa0', '').replace(' ', '').replace(',', '.')
+    try:
+        price = Decimal(raw)
+        if not price.is_finite():
+            raise ValueError(raw)
+        price = price.quantize(PRICE_STEP, rounding=ROUND_HALF_UP)
+    except (InvalidOperation, ValueError):
+        raise RowError(f'неверная цена «{raw}»')
+    if price < 0 or price >= Decimal('1e8'):
+        raise RowError(f'цена вне допустимого диапазона: {price}')
+    return price
+
+
+def parse_stock(value):
+    raw = _text(value).replace(' ', '') or '0'
+    try:
+        stock = Decimal(raw.replace(',', '.'))
+        if not stock.is_finite():
+            raise ValueError(raw)
+    except (InvalidOperation, ValueError):
+        raise RowError(f'неверный остаток «{raw}»')
+    # Границы до int(): 1e999999999 иначе превратился бы в огромное целое
+    if stock < 0:
+        raise RowError('остаток не может быть отрицательным')
+    if stock > STOCK_MAX:
+        raise RowError(f'остаток вне допустимого диапазона: «{raw}»')
+    return int(stock)
+
+
+class ProductImporter:
+    """
+    Один импорт. run(rows) возвращает stats; progress(stats) вызывается после каждой пачки.
+    В stats: rows, created, updated, unchanged, errors (первые MAX_ERRORS), error_count,
+    stock_movements, new_categories, new_brands, diff (dry_run, первые diff_limit строк).
+    """
+
+    def __init__(self, dry_run=False, batch_size=BATCH_SIZE, create_missing=True,
+                 diff_limit=200, progress=None, comment='Импорт прайс-листа'):
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.create_missing = create_missing
+        self.diff_limit = diff_limit
+        self.progress = progress
+        self.comment = comment[:255]
+        self.categories = self._lookup(Category.objects.all())
+        self.brands = self._lookup(Brand.objects.all())
+        self.stats = {
+            'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0,
+            'error_count': 0, 'errors': [], 'stock_movements': 0,
+            'new_categories': [], 'new_brands': [], 'diff': [], 'seconds': 0,
+        }
+        self._started = None
+
+    @staticmethod
+    def _lookup(queryset):
+        lookup = {}
+        for obj in queryset:
+            lookup[obj.slug] = obj
+            lookup.setdefault(obj.name.strip().lower(), obj)
+        return lookup
+
+    def run(self, rows):
+        self._started = time.perf_counter()
+        batch = {}
+        for line, row in rows:
+            self.stats['rows'] += 1
+            try:
+                slug = create_slug(_text(row.get('slug')) or _text(row.get('name')))[:50]
+                if not slug:
+                    raise RowError('не удалось определить slug')
+                # Повтор slug внутри пачки — действует последняя строка
+                batch[slug] = (line, row)
+            except RowError as exc:
+                self._error(line, exc)
+            if len(batch) >= self.batch_size:
+                self._process(batch)
+                batch = {}
+        if batch:
+            self._process(batch)
+        if not self.dry_run and (self.stats['created'] or self.stats['updated']):
+            bump_catalog_version()
+        self.stats['seconds'] = round(time.perf_counter() - self._started, 3)
+        return self.stats
+
+    def _error(self, line, exc):
+        self.stats['error_count'] += 1
+        if len(self.stats['errors']) < MAX_ERRORS:
+            self.stats['errors'].append({'line': line, 'error': str(exc)})
+
+    def _resolve(self, kind, value):
+        lookup = self.categories if kind == 'category' else self.brands
+        name = _text(value)
+        if not name:
+            raise RowError(f'пустое поле {kind}')
+        obj = lookup.get(name) or lookup.get(name.lower()) or lookup.get(create_slug(name))
+        if obj is not None:
+            return obj
+        if not self.create_missing:
+            raise RowError(f'неизвестный {kind} «{name}»')
+        model = Category if kind == 'category' else Brand
+        obj = model(name=name[:100], slug=create_slug(name)[:50])
+        if not obj.slug:
+            raise RowError(f'некорректное название {kind} «{name}»')
+        if not self.dry_run:
+            obj.save()
+        lookup[obj.slug] = lookup[name.lower()] = obj
+        self.stats['new_categories' if kind == 'category' else 'new_brands'].append(name)
+        return obj
+
+    def _process(self, batch):
+        with transaction.atomic():
+            existing = {
+                p.slug: p
+                for p in Product.objects.select_for_update().select_related('category', 'brand').filter(slug__in=batch)
+            }
+            changed, movements = [], []
+            for slug, (line, row) in batch.items():
+                try:
+                    product, old = self._build(slug, row, existing.get(slug))
+                except RowError as exc:
+                    self._error(line, exc)
+                    continue
+                changes = {
+                    f: (old.get(f), getattr(product, f))
+                    for f in DIFF_FIELDS if old.get(f) != getattr(product, f)
+                } if old else None
+                if old is not None and not changes:
+                    self.stats['unchanged'] += 1
+                    continue
+                self.stats['updated' if old else 'created'] += 1
+                changed.append(product)
+                delta = product.stock - (old['stock'] if old else 0)
+                if delta:
+                    movements.append((product, delta, 'receipt' if old is None else 'adjustment'))
+                if self.dry_run and len(self.stats['diff']) < self.diff_limit:
+                    self.stats['diff'].append({
+                        'line': line, 'slug': slug, 'action': 'update' if old else 'create',
+                        'changes': {f: [str(a), str(b)] for f, (a, b) in (changes or {}).items()},
+                    })
+            self.stats['stock_movements'] += len(movements)
+            if changed and not self.dry_run:
+                self._save(changed, movements, batch)
+        if self.progress:
+            self.stats['seconds'] = round(time.perf_counter() - self._started, 3)
+            self.progress(self.stats)
+
+    def _build(self, slug, row, current):
+        """Товар после применения строки и словарь прежних значений (None для нового)."""
+        for column in REQUIRED_FOR_NEW:
+            if current is None and not _text(row.get(column)):
+                raise RowError(f'для нового товара нужна колонка {column}')
+        if current is None:
+            product = Product(slug=slug, description='', stock=0)
+            old = None
+        else:
+            product = current
+            old = {f: getattr(current, f) for f in DIFF_FIELDS}
+        if 'name' in row and _text(row['name']):
+            product.name = _text(row['name'])[:200]
+        if 'category' in row and _text(row['category']):
+            product.category = self._resolve('category', row['category'])
+        if 'brand' in row and _text(row['brand']):
+            product.brand = self._resolve('brand', row['brand'])
+        if 'price' in row and _text(row['price']):
+            product.price = parse_price(row['price'])
+        if 'stock' in row and _text(row['stock']):
+            product.stock = parse_stock(row['stock'])
+        if 'description' in row:
+            product.description = _text(row['description'])
+        if 'image' in row:
+            product.image = _text(row['image'])[:500] or None
+        if 'is_published' in row and _text(row['is_published']):
+            product.is_published = _text(row['is_published']).lower() in TRUE_VALUES
+        return product, old
+
+    def _save(self, products, movements, batch):
+        columns = {c for _, row in batch.values() for c in row}
+        update_fields = sorted({UPDATE_FIELDS[c] for c in columns if c in UPDATE_FIELDS})
+        Product.objects.bulk_create(
+            products,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['slug'],
+            update_fields=update_fields,
+        )
+        missing = [p for p in products if p.pk is None]
+        if missing:
+            ids = dict(Product.objects.filter(slug__in=[p.slug for p in missing]).values_list('slug', 'id'))
+            for product in missing:
+                product.pk = ids[product.slug]
+        # Движения по складу без StockMovement.save: остаток уже записан импортом
+        StockMovement.objects.bulk_create([
+            StockMovement(product_id=product.pk, quantity=delta, movement_type=kind, comment=self.comment)
+            for product, delta, kind in movements
+        ], batch_size=2000)
+        search.index_products(products)
+
+
+def import_file(fileobj, fmt, **options):
+    """Импорт открытого в двоичном режиме файла формата fmt ('csv' / 'xlsx')."""
+    return ProductImporter(**options).run(iter_rows(fileobj, fmt))
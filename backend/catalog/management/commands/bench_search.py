@@ -0,0 +1,82 @@
+"""
+Бенчмарк поиска: задержка запроса при росте каталога (по умолчанию 1k → 500k товаров).
+Синтетические товары создаются внутри транзакции, которая в конце откатывается, —
+база остаётся нетронутой. Запускать на копии базы: на 500k товаров нужно несколько минут.
+"""
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from catalog.models import Brand, Category, Product, ProductSearchTerm
+from catalog.search import build_index_rows, search_products
+
+WORDS = [
+    'шампунь', 'воск', 'полироль', 'очиститель', 'обезжириватель', 'керамическое', 'покрытие',
+    'активный', 'пенообразователь', 'губка', 'полотенце', 'микрофибра', 'кузов', 'диски', 'стекло',
+    'салон', 'кожа', 'пластик', 'защита', 'блеск', 'концентрат', 'профессиональный', 'гидрофобный',
+    'антидождь', 'силант', 'паста', 'абразивная', 'финишная', 'грунт', 'эмаль', 'лак', 'краска',
+]
+# Первые запросы избирательные (артикул), остальные — частые слова: их время растёт
+# вместе с числом совпадений, которые нужно отранжировать
+QUERIES = ['арт777', 'art777 полироль', 'полироль', 'керамич покрытие', 'шампуни', 'polirol', 'воск блеск']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Измеряет задержку поиска по индексу на синтетических каталогах разного размера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000,500000', help='Размеры каталога через запятую')
+        parser.add_argument('--repeat', type=int, default=10, help='Повторов каждого запроса')
+        parser.add_argument('--page-size', type=int, default=100, help='Товаров на странице выдачи')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(s) for s in options['sizes'].split(',') if s.strip())
+        try:
+            with transaction.atomic():
+                self._run(sizes, options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, sizes, options):
+        rnd = random.Random(options['seed'])
+        categories = [Category.objects.create(name=f'Бенч категория {i}', slug=f'bench-cat-{i}') for i in range(20)]
+        brands = [Brand.objects.create(name=f'Бенч бренд {i}', slug=f'bench-brand-{i}') for i in range(50)]
+        created = 0
+        self.stdout.write(f'{"товаров":>10} {"запрос":>20} {"p50, мс":>10} {"p95, мс":>10}')
+        for size in sizes:
+            while created < size:
+                batch = []
+                for i in range(created, min(size, created + 2000)):
+                    words = rnd.sample(WORDS, 8)
+                    batch.append(Product(
+                        category=rnd.choice(categories),
+                        brand=rnd.choice(brands),
+                        name=f'{" ".join(words[:3]).capitalize()} арт{i}',
+                        slug=f'bench-product-{i}',
+                        description=' '.join(words * 3),
+                        price=Decimal(rnd.randint(100, 20000)) / 100,
+                        stock=rnd.randint(0, 100),
+                    ))
+                Product.objects.bulk_create(batch)
+                # bulk_create не шлёт post_save — индекс строим явно
+                ProductSearchTerm.objects.bulk_create(build_index_rows(batch), batch_size=5000)
+                created += len(batch)
+            for query in QUERIES:
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    list(search_products(Product.objects.all(), query)[:options['page_size']])
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+                self.stdout.write(f'{size:>10} {query:>20} {statistics.median(timings):>10.2f} {p95:>10.2f}')
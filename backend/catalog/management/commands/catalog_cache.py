@@ -0,0 +1,28 @@
+"""
+Кэш ответов каталога (catalog.response_cache): счётчики попаданий/промахов/вытеснений,
+очистка. Для Redis и файлового хранилища счётчики общие для всех воркеров,
+для locmem — только этого процесса (смотрите /admin/catalog-cache/ на работающем сервере).
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from catalog.response_cache import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Статистика кэша ответов каталога; --clear очищает кэш'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Удалить все записи')
+        parser.add_argument('--reset-counters', action='store_true', help='Обнулить счётчики')
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if options['clear']:
+            backend.clear()
+            self.stdout.write(self.style.SUCCESS('Кэш ответов каталога очищен'))
+        if options['reset_counters']:
+            backend.reset_counters()
+            self.stdout.write(self.style.SUCCESS('Счётчики обнулены'))
+        self.stdout.write(json.dumps(backend.stats(), ensure_ascii=False, indent=2))
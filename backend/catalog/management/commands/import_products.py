@@ -0,0 +1,62 @@
+"""
+Импорт прайс-листа поставщика (CSV / XLSX) в каталог: пачками, с прогрессом и режимом --dry-run.
+Пример: python manage.py import_products koch-chemie.xlsx --dry-run
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.importer import BATCH_SIZE, ImportFileError, detect_format, import_file
+
+
+class Command(BaseCommand):
+    help = 'Импортирует товары из CSV/XLSX прайс-листа (upsert по slug, движения по складу, переиндексация)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .csv или .xlsx')
+        parser.add_argument('--format', choices=('csv', 'xlsx'), help='Формат, если не по расширению')
+        parser.add_argument('--dry-run', action='store_true', help='Ничего не записывать, показать изменения')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--no-create', action='store_true', help='Не создавать новые категории и бренды')
+        parser.add_argument('--diff-limit', type=int, default=50, help='Сколько изменений показать в --dry-run')
+        parser.add_argument('--json', action='store_true', help='Итог в JSON')
+
+    def handle(self, *args, **options):
+        try:
+            fmt = options['format'] or detect_format(options['path'])
+            with open(options['path'], 'rb') as f:
+                stats = import_file(
+                    f, fmt,
+                    dry_run=options['dry_run'],
+                    batch_size=max(1, options['batch_size']),
+                    create_missing=not options['no_create'],
+                    diff_limit=options['diff_limit'],
+                    progress=self._progress,
+                    comment=f'Импорт {options["path"]}',
+                )
+        except FileNotFoundError:
+            raise CommandError(f'Файл не найден: {options["path"]}')
+        except ImportFileError as exc:
+            raise CommandError(str(exc))
+
+        if options['json']:
+            self.stdout.write(json.dumps(stats, ensure_ascii=False, indent=2, default=str))
+            return
+        for row in stats['diff']:
+            changes = ', '.join(f'{field}: {old} → {new}' for field, (old, new) in row['changes'].items())
+            self.stdout.write(f'  строка {row["line"]} {row["slug"]}: {"новый" if row["action"] == "create" else changes}')
+        for error in stats['errors']:
+            self.stdout.write(self.style.WARNING(f'  строка {error["line"]}: {error["error"]}'))
+        if stats['new_categories'] or stats['new_brands']:
+            self.stdout.write(f'Новые категории: {", ".join(stats["new_categories"]) or "—"}; '
+                              f'новые бренды: {", ".join(stats["new_brands"]) or "—"}')
+        prefix = 'Пробный прогон (ничего не записано)' if options['dry_run'] else 'Импорт завершён'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}: строк {stats["rows"]}, новых {stats["created"]}, изменено {stats["updated"]}, '
+            f'без изменений {stats["unchanged"]}, ошибок {stats["error_count"]}, '
+            f'движений по складу {stats["stock_movements"]} за {stats["seconds"]} с'
+        ))
+
+    def _progress(self, stats):
+        rate = int(stats['rows'] / stats['seconds']) if stats['seconds'] else 0
+        self.stdout.write(f'  обработано строк: {stats["rows"]} ({rate} строк/с)')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from catalog.ratings import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг и число отзывов всех товаров по одобренным отзывам'
+
+    def handle(self, *args, **options):
+        rated = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'Рейтинги пересчитаны, товаров с отзывами: {rated}'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from catalog.models import ProductSearchTerm
+from catalog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Полностью перестраивает поисковый индекс товаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Товаров в одной пачке')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Перестраиваю поисковый индекс...')
+        processed = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Готово: товаров {processed}, терминов в индексе {ProductSearchTerm.objects.count()}'
+            )
+        )
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 14:46
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def rebuild_ratings(apps, schema_editor):
+    """Рейтинг, сумма и число отзывов — по одобренным отзывам (раньше их никто не пересчитывал)."""
+    Product = apps.get_model('catalog', 'Product')
+    Review = apps.get_model('catalog', 'Review')
+    Product.objects.update(rating_sum=0, reviews_count=0, rating=Decimal('0.00'))
+    totals = Review.objects.filter(is_approved=True).values('product_id').annotate(s=Sum('rating'), c=Count('id'))
+    for row in totals:
+        Product.objects.filter(pk=row['product_id']).update(
+            rating_sum=row['s'],
+            reviews_count=row['c'],
+            rating=(Decimal(row['s']) / row['c']).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(rebuild_ratings, migrations.RunPython.noop),
+    ]
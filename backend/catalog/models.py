@@ -38,13 +38,50 @@ class Product(models.Model):
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.0)
     # Количество отзывов
     reviews_count = models.PositiveIntegerField(default=0)
+    # Сумма оценок одобренных отзывов: rating = rating_sum / reviews_count (ведётся catalog.ratings)
+    rating_sum = models.PositiveIntegerField('Сумма оценок', default=0, editable=False)
     meta_title = models.CharField('SEO заголовок', max_length=200, blank=True)
     meta_description = models.CharField('SEO описание', max_length=320, blank=True)
 
+    class Meta:
+        indexes = [
+            # Ключи keyset-пагинации каталога (shop.pagination.KeysetPagination)
+            models.Index(fields=['price', 'id'], name='catalog_product_price_id_idx'),
+            models.Index(fields=['rating', 'id'], name='catalog_product_rating_id_idx'),
+            # Витрина: опубликованные товары категории / бренда (частичные индексы — только is_published)
+            models.Index(
+                fields=['category', 'id'],
+                condition=models.Q(is_published=True),
+                name='catalog_product_pub_cat_idx',
+            ),
+            models.Index(
+                fields=['brand', 'id'],
+                condition=models.Q(is_published=True),
+                name='catalog_product_pub_brand_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class ProductSearchTerm(models.Model):
+    """Инвертированный поисковый индекс: термин (основа слова) → товар с весом. Заполняется catalog.search."""
+    term = models.CharField('Термин', max_length=64)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='search_terms')
+    weight = models.PositiveSmallIntegerField('Вес', default=1)
+
+    class Meta:
+        verbose_name = 'Поисковый термин'
+        verbose_name_plural = 'Поисковый индекс'
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'product'], name='catalog_search_term_product_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.term} → {self.product_id}'
+
+
 class ProductImage(models.Model):
     """Дополнительные изображения товара (галерея)."""
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
@@ -81,10 +118,28 @@ class Review(models.Model):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ['-created_at']
+        indexes = [
+            # Одобренные отзывы товара (пересчёт рейтинга, вывод на странице товара)
+            models.Index(fields=['product', 'is_approved'], name='catalog_review_prod_appr_idx'),
+        ]
 
     def __str__(self):
         return f'{self.product.name} — {self.rating}★'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rating_state()
+        return instance
+
+    def remember_rating_state(self):
+        """Запоминает вклад отзыва в рейтинг товара — по нему catalog.ratings считает разницу при сохранении."""
+        loaded = self.__dict__
+        if 'rating' in loaded and 'is_approved' in loaded:
+            self._rating_state = (self.product_id, self.rating, self.is_approved)
+        else:
+            self._rating_state = None
+
 
 class StockMovement(models.Model):
     """История приходов и списаний по складу."""
@@ -115,6 +170,10 @@ class StockMovement(models.Model):
         verbose_name = 'Движение по складу'
         verbose_name_plural = 'Движения по складу'
         ordering = ['-created_at']
+        indexes = [
+            # История движений товара (инлайн в карточке товара) — без сортировки в памяти
+            models.Index(fields=['product', '-created_at'], name='catalog_stockmove_prod_dt_idx'),
+        ]
 
     def __str__(self):
         sign = '+' if self.quantity >= 0 else ''
@@ -124,5 +183,26 @@ class StockMovement(models.Model):
         is_new = self.pk is None
         super().save(*args, **kwargs)
         if is_new and self.quantity != 0:
-            self.product.stock = max(0, self.product.stock + self.quantity)
-            self.product.save(update_fields=['stock'])
+            # Атомарно в БД, а не read-modify-write: параллельные движения не теряются
+            from .stock import adjust_stock
+            adjust_stock(self.product_id, self.quantity)
+            self.product.refresh_from_db(fields=['stock'])
+
+
+class CatalogVersion(models.Model):
+    """
+    Версия каталога (одна строка, pk=1) для ETag / Last-Modified ответов API.
+    Увеличивается при любом изменении товаров, категорий, брендов, остатков, рейтингов и кампаний
+    (catalog.versioning); next_change_at — ближайшее начало или конец кампании, когда цены
+    меняются без записи в базу.
+    """
+    version = models.PositiveBigIntegerField('Версия', default=1)
+    updated_at = models.DateTimeField('Изменён', auto_now_add=True)
+    next_change_at = models.DateTimeField('Ближайшая смена кампаний', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Версия каталога'
+        verbose_name_plural = 'Версия каталога'
+
+    def __str__(self):
+        return f'v{self.version}'
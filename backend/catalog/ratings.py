@@ -0,0 +1,121 @@
+"""
+Рейтинг товара по одобренным отзывам, поддерживаемый инкрементально.
+У товара хранятся сумма оценок (rating_sum) и число отзывов (reviews_count);
+одобрение, снятие одобрения, удаление или изменение оценки меняют их одним UPDATE
+с F()-выражениями, а rating пересчитывается в том же UPDATE. Агрегировать отзывы
+при каждом запросе каталога не нужно — rating лежит в индексированном столбце.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast, Round
+
+from .models import Product, Review
+from .versioning import bump_catalog_version
+
+
+def _rating_expression(sum_delta, count_delta):
+    """SQL-выражение нового рейтинга: (rating_sum + ds) / (reviews_count + dc), 0 — если отзывов нет."""
+    new_count = F('reviews_count') + count_delta
+    average = Cast(F('rating_sum') + sum_delta, FloatField()) / Cast(new_count, FloatField())
+    return Case(
+        When(reviews_count__lte=-count_delta, then=Value(Decimal('0.00'))),
+        default=Cast(Round(average, 2), DecimalField(max_digits=3, decimal_places=2)),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    )
+
+
+def apply_rating_delta(product_id, sum_delta, count_delta):
+    """O(1): сдвигает сумму и число одобренных отзывов товара и пересчитывает рейтинг."""
+    if not sum_delta and not count_delta:
+        return
+    Product.objects.filter(pk=product_id).update(
+        rating=_rating_expression(sum_delta, count_delta),
+        rating_sum=F('rating_sum') + sum_delta,
+        reviews_count=F('reviews_count') + count_delta,
+    )
+
+
+def recalculate_product(product_id):
+    """Полный пересчёт одного товара (если прежнее состояние отзыва неизвестно)."""
+    totals = Review.objects.filter(product_id=product_id, is_approved=True).aggregate(s=Sum('rating'), c=Count('id'))
+    _store(product_id, totals['s'] or 0, totals['c'] or 0)
+
+
+def _average(total, count):
+    if not count:
+        return Decimal('0.00')
+    return (Decimal(total) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def _store(product_id, total, count):
+    Product.objects.filter(pk=product_id).update(
+        rating_sum=total, reviews_count=count, rating=_average(total, count),
+    )
+
+
+def review_saved(review, created=False):
+    """Учитывает изменение отзыва: вычитает прежний вклад и добавляет новый."""
+    state = getattr(review, '_rating_state', None)
+    if not created and state is None:
+        # Отзыв загружен без rating/is_approved (или собран вручную) — прежний вклад неизвестен
+        recalculate_product(review.product_id)
+        review.remember_rating_state()
+        return
+    deltas = {}
+    if not created and state[2]:
+        old_product, old_rating = state[0], state[1]
+        s, c = deltas.get(old_product, (0, 0))
+        deltas[old_product] = (s - old_rating, c - 1)
+    if review.is_approved:
+        s, c = deltas.get(review.product_id, (0, 0))
+        deltas[review.product_id] = (s + review.rating, c + 1)
+    for product_id, (sum_delta, count_delta) in deltas.items():
+        apply_rating_delta(product_id, sum_delta, count_delta)
+    review.remember_rating_state()
+
+
+def review_deleted(review):
+    if review.is_approved:
+        apply_rating_delta(review.product_id, -review.rating, -1)
+
+
+def set_reviews_approved(queryset, approved):
+    """
+    Массовое одобрение / снятие одобрения (действия админки).
+    Меняются только отзывы, у которых статус действительно другой; вклад считается
+    одним GROUP BY по товарам, затем по одному UPDATE на затронутый товар.
+    Возвращает число изменённых отзывов.
+    """
+    with transaction.atomic():
+        changing = queryset.exclude(is_approved=approved)
+        per_product = list(
+            changing.values('product_id').annotate(s=Sum('rating'), c=Count('id')).order_by('product_id')
+        )
+        updated = changing.update(is_approved=approved)
+        sign = 1 if approved else -1
+        for row in per_product:
+            apply_rating_delta(row['product_id'], sign * row['s'], sign * row['c'])
+        if updated:
+            bump_catalog_version()
+    return updated
+
+
+def rebuild_all(batch_size=1000):
+    """
+    Полный пересчёт рейтингов: один сгруппированный запрос по одобренным отзывам
+    и bulk_update товаров. Возвращает число товаров с отзывами.
+    """
+    totals = Review.objects.filter(is_approved=True).values('product_id').annotate(s=Sum('rating'), c=Count('id'))
+    products = [
+        Product(pk=row['product_id'], rating_sum=row['s'], reviews_count=row['c'], rating=_average(row['s'], row['c']))
+        for row in totals
+    ]
+    with transaction.atomic():
+        Product.objects.exclude(rating_sum=0, reviews_count=0, rating=0).update(
+            rating_sum=0, reviews_count=0, rating=Decimal('0.00')
+        )
+        Product.objects.bulk_update(products, ['rating_sum', 'reviews_count', 'rating'], batch_size=batch_size)
+        bump_catalog_version()
+    return len(products)
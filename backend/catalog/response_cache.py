@@ -0,0 +1,629 @@
+"""
+Кэш готовых ответов каталога для анонимных посетителей.
+
+Гостям каталог отдаётся одинаково, поэтому GET-ответ (список с category / brand / search / page,
+карточка товара по slug, категории, бренды) кэшируется целиком — байтами после рендеринга.
+Ключ: версия каталога (catalog.versioning) + схема и хост + путь + нормализованная строка запроса
++ формат ответа; схема и хост нужны, потому что ссылки пагинации в ответе абсолютные.
+После любого изменения каталога версия растёт, старые ключи больше не запрашиваются
+и вытесняются по LRU.
+
+Хранилище выбирается настройкой CATALOG_RESPONSE_CACHE['BACKEND']:
+- 'locmem' — память процесса, LRU по числу записей и объёму;
+- 'file'   — каталог на диске (общий для воркеров одной машины), LRU по времени доступа;
+- 'redis'  — Redis (LOCATION=redis://...), LRU по отсортированному множеству времени доступа;
+  все хранилища ограничены и числом записей (MAX_ENTRIES), и объёмом (MAX_BYTES);
+  для разработки без сервера — LOCATION=fakeredis:// (нужен пакет fakeredis);
+- 'none'   — кэш выключен; либо путь к своему классу-наследнику BaseBackend.
+
+Защита от «набега»: при промахе ответ строит один запрос на ключ (single flight), остальные
+ждут его и берут готовый ответ. Счётчики hits / misses / evictions / coalesced / stores — в stats().
+"""
+import asyncio
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+from .versioning import EarlyResponse
+
+DEFAULTS = {
+    'BACKEND': 'locmem',
+    'LOCATION': '',
+    'MAX_ENTRIES': 2000,
+    'MAX_BYTES': 64 * 1024 * 1024,
+    'MAX_ENTRY_BYTES': 2 * 1024 * 1024,
+    'TIMEOUT': 600,        # секунд жизни записи (на случай пропущенного увеличения версии)
+    'LOCK_TIMEOUT': 10,    # сколько ждать чужой single flight, секунд
+}
+COUNTERS = ('hits', 'misses', 'evictions', 'coalesced', 'stores')
+# Параметры, не влияющие на ответ (метки от кэш-бастинга и аналитики)
+IGNORED_PARAMS = {'_', 'utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term'}
+
+
+def normalize_query(query_dict):
+    """Строка запроса без пустых и служебных параметров, с отсортированными ключами и значениями."""
+    items = []
+    for key in sorted(query_dict.keys()):
+        if key in IGNORED_PARAMS:
+            continue
+        for value in sorted(query_dict.getlist(key)):
+            value = value.strip()
+            if value:
+                items.append((key, value.lower() if key == 'search' else value))
+    return urlencode(items)
+
+
+def cache_key(version, request, media_type):
+    """Ключ ответа на запрос (HttpRequest или Request DRF) для данной версии каталога."""
+    origin = f'{request.scheme}://{request.get_host()}'
+    raw = f'{version}|{origin}|{request.path}|{normalize_query(request.GET)}|{media_type}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class _LocalFlights:
+    """Блокировки single flight в пределах процесса: одна на ключ, пока её кто-то держит или ждёт."""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}
+
+    @contextmanager
+    def hold(self, key, timeout):
+        with self._guard:
+            lock, users = self._locks.get(key, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._locks[key] = (lock, users + 1)
+        acquired = lock.acquire(timeout=timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+            with self._guard:
+                lock, users = self._locks[key]
+                if users <= 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (lock, users - 1)
+
+
+class _AsyncFlights:
+    """То же для async-view: asyncio.Lock на ключ в пределах процесса (между процессами не согласуется)."""
+
+    def __init__(self):
+        self._locks = {}
+
+    @asynccontextmanager
+    async def hold(self, key, timeout):
+        lock, users = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, users + 1)
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout)
+            acquired = True
+        except asyncio.TimeoutError:
+            acquired = False
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+            lock, users = self._locks[key]
+            if users <= 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+
+class BaseBackend:
+    """
+    Хранилище ответов: get / set / lock / stats / clear. Значение — словарь, сериализуется pickle.
+    Для async-view — aget / aset / aincr / alock; по умолчанию синхронные методы уходят в пул потоков.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self._flights = _LocalFlights()
+        self._async_flights = _AsyncFlights()
+        self._counters_lock = threading.Lock()
+        self._counters = dict.fromkeys(COUNTERS, 0)
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def size(self):
+        """(число записей, байт) — для мониторинга."""
+        raise NotImplementedError
+
+    def lock(self, key):
+        """Контекстный менеджер single flight; отдаёт True, если блокировка получена."""
+        return self._flights.hold(key, self.options['LOCK_TIMEOUT'])
+
+    def incr(self, counter, n=1):
+        with self._counters_lock:
+            self._counters[counter] += n
+
+    async def aget(self, key):
+        return await sync_to_async(self.get, thread_sensitive=False)(key)
+
+    async def aset(self, key, value):
+        await sync_to_async(self.set, thread_sensitive=False)(key, value)
+
+    async def aincr(self, counter, n=1):
+        self.incr(counter, n)
+
+    def alock(self, key):
+        return self._async_flights.hold(key, self.options['LOCK_TIMEOUT'])
+
+    def counters(self):
+        with self._counters_lock:
+            return dict(self._counters)
+
+    def reset_counters(self):
+        with self._counters_lock:
+            self._counters = dict.fromkeys(COUNTERS, 0)
+
+    def stats(self):
+        entries, size = self.size()
+        counters = self.counters()
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'backend': self.__class__.__name__,
+            **counters,
+            'hit_ratio': round(counters['hits'] / lookups, 4) if lookups else None,
+            'entries': entries,
+            'bytes': size,
+            'max_entries': self.options['MAX_ENTRIES'],
+        }
+
+
+class DummyBackend(BaseBackend):
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    async def aget(self, key):
+        return None
+
+    async def aset(self, key, value):
+        pass
+
+    def clear(self):
+        pass
+
+    def size(self):
+        return 0, 0
+
+
+class LocMemBackend(BaseBackend):
+    """LRU в памяти процесса: OrderedDict, вытеснение по MAX_ENTRIES и MAX_BYTES."""
+
+    def __init__(self, options):
+        super().__init__(options)
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, payload = item
+            if expires < time.monotonic():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key, value):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        evicted = 0
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (time.monotonic() + self.options['TIMEOUT'], payload)
+            self._bytes += len(payload)
+            while self._data and (
+                len(self._data) > self.options['MAX_ENTRIES'] or self._bytes > self.options['MAX_BYTES']
+            ):
+                self._pop(next(iter(self._data)))
+                evicted += 1
+        if evicted:
+            self.incr('evictions', evicted)
+
+    # Память процесса: без пула потоков, блокировка короткая
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value):
+        self.set(key, value)
+
+    def _pop(self, key):
+        _, payload = self._data.pop(key)
+        self._bytes -= len(payload)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def size(self):
+        with self._lock:
+            return len(self._data), self._bytes
+
+
+class FileBackend(BaseBackend):
+    """
+    Файлы в каталоге LOCATION (по умолчанию BASE_DIR/cache/catalog). Время доступа — mtime
+    (обновляется при чтении); при превышении MAX_ENTRIES или MAX_BYTES удаляются самые давно читанные.
+    Single flight между процессами — lock-файл, созданный с O_EXCL.
+    """
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.directory = options['LOCATION'] or os.path.join(settings.BASE_DIR, 'cache', 'catalog')
+        os.makedirs(self.directory, exist_ok=True)
+        self._prune_lock = threading.Lock()
+
+    def _path(self, key, suffix='.cache'):
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires, value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires < time.time():
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump((time.time() + self.options['TIMEOUT'], value), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._prune()
+
+    def _entries(self):
+        with os.scandir(self.directory) as it:
+            return [e for e in it if e.name.endswith('.cache')]
+
+    def _prune(self):
+        # Удаляем с запасом 10%, чтобы не чистить каталог на каждой записи
+        max_entries, max_bytes = self.options['MAX_ENTRIES'], self.options['MAX_BYTES']
+        with self._prune_lock:
+            entries = []
+            for entry in self._entries():
+                try:
+                    entries.append((entry.path, entry.stat()))
+                except FileNotFoundError:
+                    continue
+            count, total = len(entries), sum(st.st_size for _, st in entries)
+            if count <= max_entries and total <= max_bytes:
+                return
+            entries.sort(key=lambda item: item[1].st_mtime)
+            evicted = 0
+            for path, st in entries:
+                if count <= max_entries * 0.9 and total <= max_bytes * 0.9:
+                    break
+                self._remove(path)
+                count -= 1
+                total -= st.st_size
+                evicted += 1
+        self.incr('evictions', evicted)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def lock(self, key):
+        with super().lock(key) as local:
+            path = self._path(key, '.lock')
+            deadline = time.monotonic() + self.options['LOCK_TIMEOUT']
+            acquired = False
+            while local:
+                try:
+                    os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                    acquired = True
+                    break
+                except FileExistsError:
+                    try:
+                        # Lock-файл упавшего процесса считаем протухшим через LOCK_TIMEOUT
+                        if time.time() - os.path.getmtime(path) > self.options['LOCK_TIMEOUT']:
+                            self._remove(path)
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    if time.monotonic() > deadline or self.get(key) is not None:
+                        break
+                    time.sleep(0.02)
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    self._remove(path)
+
+    def clear(self):
+        for entry in self._entries():
+            self._remove(entry.path)
+
+    def size(self):
+        entries = self._entries()
+        return len(entries), sum(e.stat().st_size for e in entries)
+
+
+class RedisBackend(BaseBackend):
+    """
+    Redis: значения — строки с TTL, порядок доступа — отсортированное множество (score = время),
+    сроки жизни — второе множество (score = момент истечения), размеры записей — хэш и их сумма
+    в отдельном ключе; служебные структуры меняются в транзакциях с WATCH на хэш размеров.
+    Истёкшие записи вычищаются из множеств при каждой записи. Счётчики — общий хэш
+    (видны всем воркерам). Single flight — SET NX с истечением.
+    LOCATION=fakeredis:// — локальная замена сервера (пакет fakeredis) для разработки и проверок.
+    """
+    prefix = 'catalog-response:'
+    _fake_server = None
+
+    def __init__(self, options):
+        super().__init__(options)
+        location = options['LOCATION'] or 'redis://127.0.0.1:6379/0'
+        if location.startswith('fakeredis://'):
+            try:
+                import fakeredis
+            except ImportError:
+                raise ImproperlyConfigured('Для LOCATION=fakeredis:// установите пакет fakeredis.')
+            if RedisBackend._fake_server is None:
+                RedisBackend._fake_server = fakeredis.FakeServer()
+            self.client = fakeredis.FakeRedis(server=RedisBackend._fake_server)
+        else:
+            try:
+                import redis
+            except ImportError:
+                raise ImproperlyConfigured('Для кэша каталога в Redis установите пакет redis.')
+            self.client = redis.Redis.from_url(location)
+        self.index_key = self.prefix + 'lru'
+        self.expires_key = self.prefix + 'expires'
+        self.sizes_key = self.prefix + 'sizes'
+        self.bytes_key = self.prefix + 'bytes'
+        self.counters_key = self.prefix + 'counters'
+
+    def get(self, key):
+        payload = self.client.get(self.prefix + key)
+        if payload is None:
+            return None
+        # xx: запись, которую только что вытеснил другой воркер, в множество не возвращаем
+        self.client.zadd(self.index_key, {key: time.time()}, xx=True)
+        return pickle.loads(payload)
+
+    def set(self, key, value):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+
+        def store(pipe):
+            previous = pipe.hget(self.sizes_key, key)
+            pipe.multi()
+            pipe.set(self.prefix + key, payload, ex=self.options['TIMEOUT'])
+            pipe.zadd(self.index_key, {key: now})
+            pipe.zadd(self.expires_key, {key: now + self.options['TIMEOUT']})
+            pipe.hset(self.sizes_key, key, len(payload))
+            pipe.incrby(self.bytes_key, len(payload) - int(previous or 0))
+
+        self.client.transaction(store, self.sizes_key)
+        self._prune()
+
+    def _prune(self):
+        expired = self.client.zrangebyscore(self.expires_key, '-inf', time.time())
+        if expired:
+            self._drop([k.decode() for k in expired])
+        evicted = 0
+        while True:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.zcard(self.index_key)
+            pipe.get(self.bytes_key)
+            count, total = pipe.execute()
+            excess = count - self.options['MAX_ENTRIES']
+            if excess <= 0 and int(total or 0) > self.options['MAX_BYTES']:
+                excess = 1
+            if excess <= 0:
+                break
+            oldest = self.client.zrange(self.index_key, 0, excess - 1)
+            if not oldest:
+                break
+            self._drop([k.decode() for k in oldest])
+            evicted += len(oldest)
+        if evicted:
+            self.incr('evictions', evicted)
+
+    def _drop(self, keys):
+        """Удаляет записи вместе со служебными данными, вычитая их размер из общего объёма."""
+        def drop(pipe):
+            sizes = pipe.hmget(self.sizes_key, keys)
+            pipe.multi()
+            pipe.delete(*[self.prefix + k for k in keys])
+            pipe.zrem(self.index_key, *keys)
+            pipe.zrem(self.expires_key, *keys)
+            pipe.hdel(self.sizes_key, *keys)
+            pipe.decrby(self.bytes_key, sum(int(size) for size in sizes if size is not None))
+
+        self.client.transaction(drop, self.sizes_key)
+
+    @contextmanager
+    def lock(self, key):
+        lock_key = self.prefix + 'lock:' + key
+        token = os.urandom(8).hex()
+        timeout = self.options['LOCK_TIMEOUT']
+        deadline = time.monotonic() + timeout
+        acquired = False
+        while True:
+            if self.client.set(lock_key, token, nx=True, px=int(timeout * 1000)):
+                acquired = True
+                break
+            if time.monotonic() > deadline or self.client.exists(self.prefix + key):
+                break
+            time.sleep(0.02)
+        try:
+            yield acquired
+        finally:
+            if acquired and self.client.get(lock_key) == token.encode():
+                self.client.delete(lock_key)
+
+    def incr(self, counter, n=1):
+        self.client.hincrby(self.counters_key, counter, n)
+
+    async def aincr(self, counter, n=1):
+        await sync_to_async(self.incr, thread_sensitive=False)(counter, n)
+
+    def counters(self):
+        raw = self.client.hgetall(self.counters_key)
+        values = {k.decode(): int(v) for k, v in raw.items()}
+        return {name: values.get(name, 0) for name in COUNTERS}
+
+    def reset_counters(self):
+        self.client.delete(self.counters_key)
+
+    def clear(self):
+        members = set(self.client.hkeys(self.sizes_key)) | set(self.client.zrange(self.index_key, 0, -1))
+        keys = [self.prefix + k.decode() for k in members]
+        if keys:
+            self.client.delete(*keys)
+        self.client.delete(self.index_key, self.expires_key, self.sizes_key, self.bytes_key)
+
+    def size(self):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zcard(self.index_key)
+        pipe.get(self.bytes_key)
+        count, total = pipe.execute()
+        return count, int(total or 0)
+
+
+BACKENDS = {
+    'none': DummyBackend,
+    'locmem': LocMemBackend,
+    'file': FileBackend,
+    'redis': RedisBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Хранилище по настройке CATALOG_RESPONSE_CACHE (создаётся один раз на процесс)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                options = {**DEFAULTS, **getattr(settings, 'CATALOG_RESPONSE_CACHE', {})}
+                name = options['BACKEND']
+                backend_class = BACKENDS.get(name) or import_string(name)
+                _backend = backend_class(options)
+    return _backend
+
+
+def reset_backend():
+    """Сбрасывает выбранное хранилище (после изменения настроек)."""
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+class CatalogResponseCacheMixin:
+    """
+    Кэш готовых ответов list/retrieve для анонимных GET-запросов. Ставится перед
+    CatalogConditionalMixin: версия каталога берётся оттуда, 304 по-прежнему отвечается первым.
+    Заголовки ETag / Last-Modified / Vary дописываются к ответу из кэша как обычно,
+    X-Catalog-Cache: HIT / MISS показывает, откуда ответ.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self.response_cache_key = None
+        self.response_cache_status = None
+        self._cache_flight = None
+        super().initial(request, *args, **kwargs)
+        if getattr(self, 'catalog_version', None) is None or request.method != 'GET' or request.user.is_authenticated:
+            return
+        backend = get_backend()
+        key = cache_key(self.catalog_version, request, request.accepted_media_type or '')
+        entry = backend.get(key)
+        if entry is None:
+            # Промах: ответ строит только держатель блокировки, остальные дожидаются и читают кэш
+            self._cache_flight = backend.lock(key)
+            self._cache_flight.__enter__()
+            entry = backend.get(key)
+            if entry is not None:
+                self._release_flight()
+                backend.incr('coalesced')
+        if entry is not None:
+            backend.incr('hits')
+            self.response_cache_status = 'HIT'
+            response = HttpResponse(entry['content'], content_type=entry['content_type'], status=entry['status'])
+            raise EarlyResponse(response)
+        backend.incr('misses')
+        self.response_cache_key = key
+        self.response_cache_status = 'MISS'
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        try:
+            key = self.response_cache_key
+            if key is not None and response.status_code == 200 and not response.streaming:
+                backend = get_backend()
+                if hasattr(response, 'render'):
+                    response.render()
+                if len(response.content) <= backend.options['MAX_ENTRY_BYTES']:
+                    backend.set(key, {
+                        'content': response.content,
+                        'content_type': response['Content-Type'],
+                        'status': response.status_code,
+                    })
+                    backend.incr('stores')
+        finally:
+            self._release_flight()
+        if self.response_cache_status:
+            response['X-Catalog-Cache'] = self.response_cache_status
+        return response
+
+    def _release_flight(self):
+        flight, self._cache_flight = getattr(self, '_cache_flight', None), None
+        if flight is not None:
+            flight.__exit__(None, None, None)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            self._release_flight()
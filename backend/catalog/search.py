@@ -0,0 +1,300 @@
+"""
+Полнотекстовый поиск по каталогу на инвертированном индексе (ProductSearchTerm).
+
+Каждый товар раскладывается на термины: слова из названия, описания, бренда и категории.
+Русские слова приводятся к основе (стеммер Snowball для русского языка) и дополнительно
+индексируются в транслитерации, поэтому «полироль», «полироли» и «polirol» находят одно и то же.
+Запрос ищет по префиксу основы через диапазон по индексированному столбцу term —
+без LIKE '%...%' и без сканирования описаний.
+"""
+import re
+from functools import lru_cache
+
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value, When
+
+from .serializers import transliterate_russian
+
+# Вес поля в ранжировании: совпадение в названии важнее, чем в описании
+FIELD_WEIGHTS = {
+    'name': 10,
+    'brand': 6,
+    'category': 4,
+    'description': 1,
+}
+# Поля товара, от которых зависит индекс (сохранение только stock индекс не трогает)
+INDEXED_FIELDS = {'name', 'description', 'category', 'category_id', 'brand', 'brand_id'}
+MAX_TERM_LENGTH = 64
+MIN_TERM_LENGTH = 2
+MAX_QUERY_TOKENS = 8
+REINDEX_BATCH_SIZE = 500
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+_CYRILLIC_RE = re.compile(r'[а-яё]')
+
+# --- Стеммер Snowball для русского языка ---
+
+_VOWELS = 'аеиоуыэюя'
+_PERFECTIVE_GERUND_1 = ('вшись', 'вши', 'в')  # после а/я
+_PERFECTIVE_GERUND_2 = ('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв')
+_REFLEXIVE = ('ся', 'сь')
+_ADJECTIVE = (
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое', 'ей', 'ий', 'ый', 'ой',
+    'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею',
+)
+_PARTICIPLE_1 = ('ем', 'нн', 'вш', 'ющ', 'щ')  # после а/я
+_PARTICIPLE_2 = ('ивш', 'ывш', 'ующ')
+_VERB_1 = ('ете', 'йте', 'ешь', 'нно', 'ла', 'на', 'ли', 'ем', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'й', 'л', 'н')  # после а/я
+_VERB_2 = (
+    'ейте', 'уйте', 'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило', 'ыло', 'ено', 'ует', 'уют',
+    'ены', 'ить', 'ыть', 'ишь', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ят', 'ит', 'ыт', 'ую', 'ю',
+)
+_NOUN = (
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ев', 'ов', 'ие', 'ье', 'еи', 'ии', 'ей', 'ой',
+    'ий', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях', 'ию', 'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у',
+    'ы', 'ь', 'ю', 'я',
+)
+_SUPERLATIVE = ('ейше', 'ейш')
+_DERIVATIONAL = ('ость', 'ост')
+
+
+def _regions(word):
+    """Границы областей RV и R2 алгоритма Snowball (индексы начала)."""
+    rv = len(word)
+    for i, ch in enumerate(word):
+        if ch in _VOWELS:
+            rv = i + 1
+            break
+    r1 = len(word)
+    for i in range(1, len(word)):
+        if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+            r1 = i + 1
+            break
+    r2 = len(word)
+    for i in range(r1 + 1, len(word)):
+        if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+def _strip(word, start, suffixes, preceded=None):
+    """Отрезает самое длинное окончание из suffixes, целиком лежащее в области [start:]."""
+    for suffix in sorted(suffixes, key=len, reverse=True):
+        if word.endswith(suffix) and len(word) - len(suffix) >= start:
+            if preceded:
+                pos = len(word) - len(suffix) - 1
+                if pos < start or word[pos] not in preceded:
+                    continue
+            return word[:-len(suffix)], True
+    return word, False
+
+
+def stem_russian(word):
+    """Основа русского слова по алгоритму Snowball (Портер для русского языка)."""
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    if rv >= len(word):
+        return word
+
+    # Шаг 1: деепричастие, иначе возвратная частица + прилагательное/глагол/существительное
+    word, found = _strip(word, rv, _PERFECTIVE_GERUND_1, preceded='ая')
+    if not found:
+        word, found = _strip(word, rv, _PERFECTIVE_GERUND_2)
+    if not found:
+        word, _ = _strip(word, rv, _REFLEXIVE)
+        word, found = _strip(word, rv, _ADJECTIVE)
+        if found:
+            word, participle = _strip(word, rv, _PARTICIPLE_1, preceded='ая')
+            if not participle:
+                word, _ = _strip(word, rv, _PARTICIPLE_2)
+        else:
+            word, found = _strip(word, rv, _VERB_1, preceded='ая')
+            if not found:
+                word, found = _strip(word, rv, _VERB_2)
+            if not found:
+                word, _ = _strip(word, rv, _NOUN)
+
+    # Шаг 2: конечная «и»
+    word, _ = _strip(word, rv, ('и',))
+    # Шаг 3: словообразовательные суффиксы в R2
+    word, _ = _strip(word, r2, _DERIVATIONAL)
+    # Шаг 4: превосходная степень, двойная «н», мягкий знак
+    word, found = _strip(word, rv, _SUPERLATIVE)
+    if word.endswith('нн') and len(word) - 1 > rv:
+        word = word[:-1]
+    elif not found:
+        word, _ = _strip(word, rv, ('ь',))
+    return word
+
+
+def normalize_terms(text):
+    """
+    Разбивает текст на термины индекса.
+    Для каждого слова: основа (для кириллицы — по стеммеру) и её транслитерация латиницей.
+    Возвращает список в порядке появления (повторы сохраняются — по ним считается вес).
+    """
+    terms = []
+    for word in _WORD_RE.findall((text or '').lower()):
+        terms.extend(_word_terms(word))
+    return terms
+
+
+@lru_cache(maxsize=65536)
+def _word_terms(word):
+    """Термины одного слова; слова в каталоге сильно повторяются, поэтому результат кэшируется."""
+    if _CYRILLIC_RE.search(word):
+        stem = stem_russian(word)
+        variants = (stem, transliterate_russian(stem).lower())
+    else:
+        variants = (word,)
+    return tuple(term[:MAX_TERM_LENGTH] for term in variants if len(term) >= MIN_TERM_LENGTH)
+
+
+def product_terms(product):
+    """Словарь {термин: вес} для товара по названию, бренду, категории и описанию."""
+    fields = {
+        'name': product.name,
+        'brand': product.brand.name if product.brand_id else '',
+        'category': product.category.name if product.category_id else '',
+        'description': product.description,
+    }
+    weights = {}
+    for field, text in fields.items():
+        for term in normalize_terms(text):
+            weights[term] = weights.get(term, 0) + FIELD_WEIGHTS[field]
+    # Вес хранится в PositiveSmallIntegerField — ограничиваем, чтобы длинное описание не «перевесило»
+    return {term: min(weight, 1000) for term, weight in weights.items()}
+
+
+def build_index_rows(products):
+    """Несохранённые строки ProductSearchTerm для переданных товаров."""
+    from .models import ProductSearchTerm
+    return [
+        ProductSearchTerm(term=term, product_id=product.pk, weight=weight)
+        for product in products
+        for term, weight in product_terms(product).items()
+    ]
+
+
+def index_products(products):
+    """
+    Переиндексация уже загруженных товаров (с category и brand): старые термины удаляются,
+    новые вставляются пачками.
+    """
+    from .models import ProductSearchTerm
+    meta = ProductSearchTerm._meta
+    fields = [meta.get_field(name) for name in ('term', 'product', 'weight')]
+    rows = [
+        (term, product.pk, weight)
+        for product in products
+        for term, weight in product_terms(product).items()
+    ]
+    # Строки индекса — кортежи: на сотнях тысяч терминов bulk_create тратит больше времени
+    # на объекты модели и сборку SQL, чем база на саму вставку.
+    # PostgreSQL — COPY, остальные базы — многострочный INSERT.
+    table = connection.ops.quote_name(meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(f.column) for f in fields)
+    with transaction.atomic():
+        ProductSearchTerm.objects.filter(product_id__in=[p.pk for p in products]).delete()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                with cursor.cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+                    for row in rows:
+                        copy.write_row(row)
+                return
+            batch = max(1, min(connection.ops.bulk_batch_size(fields, rows), 2000))
+            for start in range(0, len(rows), batch):
+                chunk = rows[start:start + batch]
+                cursor.execute(
+                    f'INSERT INTO {table} ({columns}) VALUES ' + ', '.join(['(%s, %s, %s)'] * len(chunk)),
+                    [value for row in chunk for value in row],
+                )
+
+
+def index_product(product):
+    """Переиндексация одного товара."""
+    index_products([product])
+
+
+def rebuild_index(queryset=None, batch_size=REINDEX_BATCH_SIZE):
+    """
+    Переиндексация набора товаров (по умолчанию — всего каталога) пачками.
+    Возвращает число обработанных товаров.
+    """
+    from .models import Product
+    if queryset is None:
+        queryset = Product.objects.all()
+    queryset = queryset.select_related('category', 'brand').order_by('pk')
+    processed = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        index_products(batch)
+        processed += len(batch)
+        last_pk = batch[-1].pk
+    return processed
+
+
+def _query_tokens(query):
+    """Термины запроса: по каждому слову — набор вариантов (основа и транслитерация)."""
+    tokens = []
+    for word in _WORD_RE.findall((query or '').lower())[:MAX_QUERY_TOKENS]:
+        variants = set(normalize_terms(word))
+        if not variants and len(word) >= 1:
+            # Одна буква: ищем только по префиксу исходного слова
+            variants = {word}
+        if variants:
+            tokens.append(variants)
+    return tokens
+
+
+def _prefix_q(variants):
+    """Условие «термин начинается с одного из вариантов» — диапазоном, чтобы работал индекс."""
+    q = Q()
+    for prefix in variants:
+        q |= Q(term__gte=prefix, term__lt=prefix + '\uffff')
+    return q
+
+
+def match_products(query):
+    """
+    Ранжированные совпадения: QuerySet словарей {'product_id', 'score'}.
+    Товар попадает в выдачу, только если совпали все слова запроса; score — сумма весов терминов.
+    Возвращает None, если в запросе нет слов.
+    """
+    from .models import ProductSearchTerm
+    tokens = _query_tokens(query)
+    if not tokens:
+        return None
+
+    token_qs = [_prefix_q(variants) for variants in tokens]
+    any_token = Q()
+    for q in token_qs:
+        any_token |= q
+
+    matches = ProductSearchTerm.objects.filter(any_token).values('product_id')
+    annotations = {'score': Sum('weight')}
+    for i, q in enumerate(token_qs):
+        annotations[f'_t{i}'] = Max(Case(When(q, then=Value(1)), default=Value(0), output_field=IntegerField()))
+    matches = matches.annotate(**annotations)
+    return matches.filter(**{f'_t{i}': 1 for i in range(len(token_qs))})
+
+
+def search_products(queryset, query):
+    """
+    Фильтрует queryset товаров по поисковому запросу и сортирует по релевантности
+    (поле search_rank, при равенстве — по id).
+    """
+    matches = match_products(query)
+    if matches is None:
+        return queryset
+    rank = matches.filter(product_id=OuterRef('pk')).values('score')[:1]
+    return (
+        queryset
+        .filter(pk__in=matches.values('product_id'))
+        .annotate(search_rank=Subquery(rank))
+        .order_by('-search_rank', 'pk')
+    )
@@ -49,6 +49,14 @@ class BrandSerializer(serializers.ModelSerializer):
         model = Brand
         fields = ['id', 'name', 'slug']
 
+def final_price(serializer, product):
+    """Цена с учётом кампаний, если в контексте есть core.pricing.PriceEngine (ключ 'pricing')."""
+    pricing = serializer.context.get('pricing')
+    if pricing is None:
+        return str(product.price)
+    return str(pricing.price(product).final)
+
+
 class ProductSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     brand = BrandSerializer(read_only=True)
@@ -59,14 +67,22 @@ class ProductSerializer(serializers.ModelSerializer):
         queryset=Brand.objects.all(), source='brand', write_only=True
     )
     slug = serializers.SlugField(required=False, allow_blank=True)
+    # Рейтинг ведётся по одобренным отзывам (catalog.ratings); числом — фронтенд вызывает toFixed
+    rating = serializers.FloatField(read_only=True)
+    reviews_count = serializers.IntegerField(read_only=True)
+    final_price = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
         fields = [
             'id', 'category', 'category_id', 'brand', 'brand_id',
-            'name', 'slug', 'description', 'price', 'stock', 'image'
+            'name', 'slug', 'description', 'price', 'final_price', 'stock', 'image',
+            'rating', 'reviews_count'
         ]
 
+    def get_final_price(self, obj):
+        return final_price(self, obj)
+
     def validate(self, data):
         # Если slug не указан или пустой, создаем из названия
         if not data.get('slug') and data.get('name'):
@@ -76,3 +92,36 @@ class ProductSerializer(serializers.ModelSerializer):
             data['slug'] = create_slug(data['slug'])
         
         return data
+
+
+class CatalogProductSerializer(ProductSerializer):
+    """
+    Товар в ответах каталога (кэш, ETag, снимок): без остатка — он меняется с каждым заказом
+    и читается отдельно, через /api/catalog/stock/. На запись stock по-прежнему принимается.
+    """
+
+    class Meta(ProductSerializer.Meta):
+        extra_kwargs = {'stock': {'write_only': True}}
+
+
+class ProductListSerializer(serializers.ModelSerializer):
+    """
+    Компактное представление товара для сетки каталога (?view=compact).
+    Категория и бренд отдаются только id — сами объекты один раз на страницу в categories/brands.
+    Остатка нет, как и в CatalogProductSerializer.
+    """
+    category_id = serializers.IntegerField(read_only=True)
+    brand_id = serializers.IntegerField(read_only=True)
+    rating = serializers.FloatField(read_only=True)
+    final_price = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'category_id', 'brand_id', 'name', 'slug',
+            'price', 'final_price', 'image', 'rating', 'reviews_count'
+        ]
+        read_only_fields = fields
+
+    def get_final_price(self, obj):
+        return final_price(self, obj)
@@ -0,0 +1,62 @@
+"""
+Сигналы каталога: поддержание поискового индекса, рейтингов товаров и версии каталога
+(для ETag ответов API) в актуальном состоянии.
+Удаление товара чистит индекс каскадом (ForeignKey on_delete=CASCADE).
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import ratings, search
+from .models import Product, Category, Brand, Review, ProductImage
+from .versioning import bump_catalog_version
+
+
+@receiver(post_save, sender=Product)
+def reindex_product(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    # Сохранение только остатка/рейтинга (StockMovement, отзывы) индекс не меняет
+    if update_fields is not None and not (set(update_fields) & search.INDEXED_FIELDS):
+        return
+    search.index_product(instance)
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    search.rebuild_index(Product.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Brand)
+def reindex_brand_products(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    search.rebuild_index(Product.objects.filter(brand=instance))
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    ratings.review_saved(instance, created=created)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    ratings.review_deleted(instance)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_version_on_catalog_change(sender, raw=False, **kwargs):
+    if not raw:
+        bump_catalog_version()
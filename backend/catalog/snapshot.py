@@ -0,0 +1,210 @@
+"""
+Статический снимок каталога: JSON-шарды, которые отдаёт nginx / CDN без Python.
+
+Шарды (формат — как у ответов API):
+- categories.<hash>.json, brands.<hash>.json — справочники;
+- categories/<slug>/page-<n>.<hash>.json — страницы опубликованных товаров категории
+  (компактный вид, как ?view=compact&category=<slug>&page=<n>);
+- products/<slug>.<hash>.json — карточка товара.
+В имени файла — хэш содержимого, поэтому шарды можно кэшировать навсегда (immutable);
+manifest.json (без хэша, короткий кэш) сопоставляет логическое имя шарда с текущим файлом.
+
+Пересборка инкрементальная: для каждого шарда хранится отпечаток исходных строк
+(поля товара, категории, бренда и итоговая цена с кампаниями). Сериализуются и пишутся
+только шарды с изменившимся отпечатком; если версия каталога (catalog.versioning) не менялась
+с прошлой сборки, снимок не перечитывается вовсе. Шарды, на которые не ссылаются ни новый,
+ни предыдущий манифест, удаляются — клиент со старым манифестом успевает догрузить страницы.
+Удаляются только файлы с именами шардов; чужие файлы в каталоге не трогаются, а в непустой
+каталог без manifest.json сборка не пишет вовсе.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.utils import timezone
+
+from core.pricing import PriceEngine
+from .models import Brand, Category, Product
+from .serializers import BrandSerializer, CatalogProductSerializer, CategorySerializer, ProductListSerializer
+from .versioning import current_version
+
+MANIFEST = 'manifest.json'
+FORMAT = 1
+PRODUCT_SOURCE_FIELDS = (
+    'id', 'category_id', 'brand_id', 'name', 'slug', 'description',
+    'price', 'image', 'rating', 'reviews_count',
+)
+# Файлы, которые пишет сборка: шарды с хэшем в имени и их временные файлы (_write_atomic)
+SHARD_RE = re.compile(
+    r'^(?:(?:categories|brands)|categories/[^/]+/page-\d+|products/[^/]+)'
+    r'\.[0-9a-f]{12}\.json(?:\.\d+\.tmp)?$'
+)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def default_root():
+    return getattr(settings, 'CATALOG_SNAPSHOT_ROOT', os.path.join(settings.BASE_DIR, 'catalog_snapshot'))
+
+
+def default_page_size():
+    return settings.REST_FRAMEWORK.get('PAGE_SIZE') or 100
+
+
+def fingerprint(*parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def dump(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class SnapshotBuilder:
+    """Одна сборка снимка в каталог root; build() возвращает счётчики."""
+
+    def __init__(self, root=None, page_size=None, force=False):
+        self.root = str(root or default_root())
+        self.page_size = page_size or default_page_size()
+        self.force = force
+        self.previous = self._load_manifest()
+        self.shards = {}
+        self.stats = {'rendered': 0, 'unchanged': 0, 'removed': 0, 'skipped': False}
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.root, MANIFEST), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if manifest.get('format') != FORMAT or manifest.get('page_size') != self.page_size:
+            return None
+        return manifest
+
+    def build(self):
+        started = time.perf_counter()
+        version = current_version().version
+        if not self.force and self.previous and self.previous.get('version') == version:
+            self.stats.update(skipped=True, unchanged=len(self.previous['shards']))
+            return self.stats
+
+        self._check_root()
+        os.makedirs(self.root, exist_ok=True)
+        self.pricing = PriceEngine.load()
+        categories = {c.pk: c for c in Category.objects.order_by('id')}
+        brands = {b.pk: b for b in Brand.objects.order_by('id')}
+        published = Product.objects.filter(is_published=True)
+        self.counts = dict(published.values_list('category_id').annotate(n=Count('id')).order_by())
+        self.page_numbers = {}
+
+        self._shard('categories', 'categories', [(c.pk, c.name, c.slug) for c in categories.values()],
+                    lambda: CategorySerializer(categories.values(), many=True).data)
+        self._shard('brands', 'brands', [(b.pk, b.name, b.slug) for b in brands.values()],
+                    lambda: BrandSerializer(brands.values(), many=True).data)
+
+        # Один проход по товарам в порядке категорий: карточки и страницы категорий сразу
+        page = []
+        products = published.select_related('category', 'brand').order_by('category_id', 'id')
+        for product in products.iterator(chunk_size=2000):
+            if page and (product.category_id != page[0][0].category_id or len(page) == self.page_size):
+                self._category_page(page)
+                page = []
+            source = fingerprint(
+                [getattr(product, f) for f in PRODUCT_SOURCE_FIELDS],
+                (product.category.name, product.category.slug),
+                (product.brand.name, product.brand.slug),
+                self.pricing.price(product).final,
+            )
+            self._shard(
+                f'product/{product.slug}', f'products/{product.slug}', source,
+                lambda p=product: CatalogProductSerializer(p, context={'pricing': self.pricing}).data,
+            )
+            page.append((product, source))
+        if page:
+            self._category_page(page)
+
+        self._write_manifest(version)
+        self._remove_stale()
+        self.stats['seconds'] = round(time.perf_counter() - started, 3)
+        return self.stats
+
+    def _category_page(self, page):
+        category = page[0][0].category
+        number = self.page_numbers[category.pk] = self.page_numbers.get(category.pk, 0) + 1
+        count = self.counts.get(category.pk, 0)
+        source = fingerprint([s for _, s in page], count)
+
+        def render():
+            products = [p for p, _ in page]
+            return {
+                'count': count,
+                'page': number,
+                'num_pages': -(-count // self.page_size),
+                'results': ProductListSerializer(products, many=True, context={'pricing': self.pricing}).data,
+                'categories': {str(category.pk): CategorySerializer(category).data},
+                'brands': {str(p.brand_id): BrandSerializer(p.brand).data for p in products},
+            }
+
+        self._shard(f'category/{category.slug}/{number}', f'categories/{category.slug}/page-{number}', source, render)
+
+    def _shard(self, name, path, source, render):
+        """Пишет шард, если его исходные данные изменились; иначе оставляет прежний файл."""
+        if not isinstance(source, str):
+            source = fingerprint(source)
+        old = (self.previous or {}).get('shards', {}).get(name)
+        if not self.force and old and old['source'] == source and os.path.exists(os.path.join(self.root, old['file'])):
+            self.shards[name] = old
+            self.stats['unchanged'] += 1
+            return
+        content = dump(render())
+        file = f'{path}.{hashlib.sha1(content).hexdigest()[:12]}.json'
+        full = os.path.join(self.root, file)
+        if not os.path.exists(full):
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            _write_atomic(full, content)
+        self.shards[name] = {'file': file, 'source': source}
+        self.stats['rendered'] += 1
+
+    def _write_manifest(self, version):
+        manifest = {
+            'format': FORMAT,
+            'version': version,
+            'built_at': timezone.now().isoformat(),
+            'page_size': self.page_size,
+            'shards': self.shards,
+        }
+        _write_atomic(os.path.join(self.root, MANIFEST), dump(manifest))
+
+    def _check_root(self):
+        """Непустой каталог без манифеста — не снимок: чужие файлы могли бы оказаться рядом со шардами."""
+        if os.path.exists(os.path.join(self.root, MANIFEST)):
+            return
+        if os.path.isdir(self.root) and os.listdir(self.root):
+            raise SnapshotError(
+                f'Каталог {self.root} не пуст и не содержит {MANIFEST} — укажите пустой каталог для снимка.'
+            )
+
+    def _remove_stale(self):
+        keep = {s['file'] for s in self.shards.values()}
+        keep.update(s['file'] for s in (self.previous or {}).get('shards', {}).values())
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                full = os.path.join(directory, name)
+                relative = os.path.relpath(full, self.root).replace(os.sep, '/')
+                if relative in keep or not SHARD_RE.match(relative):
+                    continue
+                os.remove(full)
+                self.stats['removed'] += 1
+
+
+def _write_atomic(path, content):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, path)
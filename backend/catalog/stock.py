@@ -0,0 +1,65 @@
+"""
+Складские операции без гонок.
+Остаток меняется только атомарным UPDATE ... SET stock = stock - n WHERE stock >= n:
+два параллельных заказа не теряют обновлений и не уводят остаток в минус,
+а блокируются только строки товаров заказа.
+Версию каталога остатки не меняют: в ответы каталога остаток не входит (см. ProductStockView).
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from .models import Product, StockMovement
+
+
+class InsufficientStock(Exception):
+    """Недостаточно товара на складе."""
+
+    def __init__(self, product_id, requested):
+        super().__init__(f'Недостаточно товара на складе (id={product_id}, нужно {requested})')
+        self.product_id = product_id
+        self.requested = requested
+
+
+def adjust_stock(product_id, delta):
+    """Изменяет остаток на delta одним UPDATE; остаток не опускается ниже нуля."""
+    Product.objects.filter(pk=product_id).update(stock=Greatest(F('stock') + delta, 0))
+
+
+class _Shortfall(Exception):
+    """Откатывает частичное списание, чтобы затем прочитать исходные остатки."""
+
+
+def reserve_stock(quantities, order=None, comment=''):
+    """
+    Списывает остатки под заказ.
+    quantities — {product_id: количество}. Все строки списываются одним условным UPDATE
+    (SET stock = stock - CASE pk ... END WHERE pk IN (...) AND stock >= CASE ...); если обновлено
+    меньше строк, чем товаров, списание откатывается и отдельным запросом ищется товар, которого
+    не хватило, — бросается InsufficientStock. Движения по складу пишутся одним bulk_create.
+    """
+    ids = sorted(quantities)
+    try:
+        with transaction.atomic():
+            need = Case(
+                *(When(pk=product_id, then=Value(quantities[product_id])) for product_id in ids),
+                output_field=IntegerField(),
+            )
+            updated = Product.objects.filter(pk__in=ids, stock__gte=need).update(stock=F('stock') - need)
+            if updated != len(ids):
+                raise _Shortfall
+            # bulk_create не вызывает StockMovement.save — остаток повторно не меняется
+            StockMovement.objects.bulk_create([
+                StockMovement(
+                    product_id=product_id,
+                    quantity=-quantities[product_id],
+                    movement_type='order',
+                    order=order,
+                    comment=comment,
+                )
+                for product_id in ids
+            ])
+    except _Shortfall:
+        stock = dict(Product.objects.filter(pk__in=ids).values_list('pk', 'stock'))
+        product_id = next((pk for pk in ids if stock.get(pk, 0) < quantities[pk]), ids[0])
+        raise InsufficientStock(product_id, quantities[product_id])
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, BrandViewSet, ProductViewSet
+from .views import CategoryViewSet, BrandViewSet, ProductStockView, ProductViewSet
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='categories')
@@ -8,5 +8,6 @@ router.register(r'brands', BrandViewSet, basename='brands')
 router.register(r'products', ProductViewSet, basename='products')
 
 urlpatterns = [
+    path('stock/', ProductStockView.as_view(), name='product-stock'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,138 @@
+"""
+Версия каталога и условные GET-запросы (ETag / Last-Modified → 304).
+
+Любое изменение, видимое в ответах каталога, увеличивает CatalogVersion.version (после коммита):
+сигналы Product / Category / Brand / ProductImage / Review и кампаний, а также места, которые
+меняют товары через update() в обход сигналов (рейтинги, массовые действия админки).
+Остатки в ответы каталога не входят и версию не меняют — они отдаются отдельно, без кэша
+(/api/catalog/stock/).
+Цены зависят ещё и от времени (кампании начинаются и заканчиваются сами) — для этого хранится
+next_change_at: первый запрос после этого момента увеличивает версию.
+
+Ответ на повторный запрос с If-None-Match — 304 без сериализации и без основного запроса:
+проверка стоит одного чтения строки версии.
+"""
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import CatalogVersion
+
+VERSION_PK = 1
+
+
+def next_campaign_change(now=None):
+    """Ближайший момент в будущем, когда начинается или заканчивается активная кампания."""
+    from core.models import Campaign
+    now = now or timezone.now()
+    active = Campaign.objects.filter(is_active=True)
+    bounds = active.aggregate(
+        start=Min('start_date', filter=Q(start_date__gt=now)),
+        end=Min('end_date', filter=Q(end_date__gt=now)),
+    )
+    moments = [m for m in (bounds['start'], bounds['end']) if m is not None]
+    return min(moments) if moments else None
+
+
+def _bump(next_change_at=False):
+    fields = {'version': F('version') + 1, 'updated_at': timezone.now()}
+    if next_change_at is not False:
+        fields['next_change_at'] = next_change_at
+    if not CatalogVersion.objects.filter(pk=VERSION_PK).update(**fields):
+        CatalogVersion.objects.get_or_create(pk=VERSION_PK, defaults={'next_change_at': next_campaign_change()})
+
+
+def bump_catalog_version():
+    """Увеличивает версию каталога после коммита текущей транзакции (или сразу вне транзакции)."""
+    transaction.on_commit(_bump)
+
+
+def campaigns_changed():
+    """Кампании изменились: новая версия и пересчёт ближайшей смены цен по времени."""
+    transaction.on_commit(lambda: _bump(next_campaign_change()))
+
+
+def current_version():
+    """Строка версии каталога; если наступило начало/конец кампании — сначала увеличивает версию."""
+    row = CatalogVersion.objects.filter(pk=VERSION_PK).first()
+    if row is None:
+        row, _ = CatalogVersion.objects.get_or_create(pk=VERSION_PK, defaults={'next_change_at': next_campaign_change()})
+    now = timezone.now()
+    if row.next_change_at is not None and row.next_change_at <= now:
+        # Условие по старому next_change_at: из параллельных запросов версию увеличит только один
+        CatalogVersion.objects.filter(pk=VERSION_PK, next_change_at=row.next_change_at).update(
+            version=F('version') + 1, updated_at=now, next_change_at=next_campaign_change(now),
+        )
+        row = CatalogVersion.objects.get(pk=VERSION_PK)
+    return row
+
+
+async def acurrent_version():
+    """current_version() для async-view: обычно одно асинхронное чтение строки версии."""
+    row = await CatalogVersion.objects.filter(pk=VERSION_PK).afirst()
+    if row is None or (row.next_change_at is not None and row.next_change_at <= timezone.now()):
+        # Редкий путь (первый запуск, смена цен по кампании) — синхронная версия с обновлением
+        row = await sync_to_async(current_version)()
+    return row
+
+
+def validators(row, full_path, media_type):
+    """(ETag, Last-Modified) ответа каталога: версия + URL + формат ответа."""
+    key = f'{row.version}|{full_path}|{media_type}'
+    etag = '"catalog-%s"' % hashlib.md5(key.encode('utf-8')).hexdigest()
+    return etag, int(row.updated_at.timestamp())
+
+
+class EarlyResponse(Exception):
+    """Готовый ответ из initial(): прерывает обработку до вызова list/retrieve."""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+class NotModified(EarlyResponse):
+    """Ответ 304 на условный запрос."""
+
+
+class CatalogConditionalMixin:
+    """
+    Для list/retrieve: ETag (версия каталога + URL + формат ответа) и Last-Modified;
+    If-None-Match / If-Modified-Since обрабатываются до запроса к базе и сериализации.
+    Cache-Control: no-cache — браузер хранит ответ, но каждый раз сверяет его с сервером.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.catalog_validators = None
+        self.catalog_version = None
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+        row = current_version()
+        self.catalog_version = row.version
+        media_type = getattr(request, 'accepted_media_type', '') or ''
+        etag, last_modified = self.catalog_validators = validators(row, request.get_full_path(), media_type)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, EarlyResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'catalog_validators', None)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, no_cache=True)
+        return response
@@ -1,43 +1,119 @@
 
+from decimal import Decimal, InvalidOperation
 from rest_framework import viewsets, status
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
-from django.db.models import Q
+from rest_framework.views import APIView
+from django.utils.cache import patch_cache_control
+from django.utils.functional import SimpleLazyObject
+from core.pricing import PriceEngine
 from .models import Category, Brand, Product
-from .serializers import CategorySerializer, BrandSerializer, ProductSerializer
+from shop.pagination import CatalogPagination
+from .search import search_products
+from .versioning import CatalogConditionalMixin
+from .response_cache import CatalogResponseCacheMixin
+from .serializers import (
+    CategorySerializer, BrandSerializer, CatalogProductSerializer, ProductSerializer, ProductListSerializer,
+)
 
-class CategoryViewSet(viewsets.ModelViewSet):
+STOCK_MAX_IDS = 500
+
+def filter_products(queryset, params):
+    """Фильтры списка товаров из параметров запроса: category, brand, min_rating, search."""
+    category = params.get('category')
+    brand = params.get('brand')
+    search = (params.get('search') or '').strip()
+    if category:
+        queryset = queryset.filter(category__slug=category)
+    if brand:
+        queryset = queryset.filter(brand__slug=brand)
+    min_rating = params.get('min_rating')
+    if min_rating:
+        try:
+            min_rating = Decimal(min_rating)
+        except InvalidOperation:
+            min_rating = None
+        # NaN / Infinity, как и нечисло, — фильтр не применяется
+        if min_rating is not None and min_rating.is_finite():
+            queryset = queryset.filter(rating__gte=min_rating)
+    if search:
+        # Поиск по инвертированному индексу (catalog.search), результаты по релевантности
+        queryset = search_products(queryset, search)
+    return queryset
+
+
+class CategoryViewSet(CatalogResponseCacheMixin, CatalogConditionalMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(CatalogResponseCacheMixin, CatalogConditionalMixin, viewsets.ModelViewSet):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all()
-    serializer_class = ProductSerializer
+class ProductViewSet(CatalogResponseCacheMixin, CatalogConditionalMixin, viewsets.ModelViewSet):
+    # Категория и бренд подтягиваются одним JOIN, иначе вложенные сериализаторы дают 2 запроса на товар
+    queryset = Product.objects.select_related('category', 'brand')
+    # Без остатка: ответы кэшируются по версии каталога, а остаток — ProductStockView
+    serializer_class = CatalogProductSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
+    pagination_class = CatalogPagination
+    # Сортировки для keyset-пагинации (?pagination=cursor&ordering=...); последний ключ уникален
+    keyset_orderings = {
+        'id': ('id',),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+        'rating': ('rating', 'id'),
+        '-rating': ('-rating', '-id'),
+    }
 
     def get_queryset(self):
         queryset = super().get_queryset()
         if self.action == 'list':
             queryset = queryset.filter(is_published=True)
-        category = self.request.query_params.get('category')
-        brand = self.request.query_params.get('brand')
-        search = (self.request.query_params.get('search') or '').strip()
-        if category:
-            queryset = queryset.filter(category__slug=category)
-        if brand:
-            queryset = queryset.filter(brand__slug=brand)
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) | Q(description__icontains=search)
-            )
-        return queryset
+        return filter_products(queryset, self.request.query_params)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Кампании загружаются один раз на запрос и только если сериализатору понадобилась цена
+        context['pricing'] = SimpleLazyObject(PriceEngine.load)
+        return context
+
+    def is_compact_list(self):
+        """Компактный режим списка: ?view=compact."""
+        return self.action == 'list' and self.request.query_params.get('view') == 'compact'
+
+    def get_serializer_class(self):
+        if self.is_compact_list():
+            return ProductListSerializer
+        return super().get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_compact_list():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # Без описания: в сетке оно не нужно, а это самое тяжёлое поле
+        queryset = queryset.defer('description', 'meta_title', 'meta_description')
+        page = self.paginate_queryset(queryset)
+        products = page if page is not None else list(queryset)
+        data = self.get_serializer(products, many=True).data
+
+        # Категории и бренды страницы — один раз, словарём по id (объекты уже загружены JOIN-ом)
+        categories = {p.category_id: p.category for p in products}
+        brands = {p.brand_id: p.brand for p in products}
+        sideload = {
+            'categories': {str(pk): CategorySerializer(obj).data for pk, obj in categories.items()},
+            'brands': {str(pk): BrandSerializer(obj).data for pk, obj in brands.items()},
+        }
+
+        if page is not None:
+            response = self.get_paginated_response(data)
+            response.data.update(sideload)
+            return response
+        return Response({'results': data, **sideload})
 
     def create(self, request, *args, **kwargs):
         data = request.data.copy()
@@ -118,3 +194,28 @@ class ProductViewSet(viewsets.ModelViewSet):
         
         output_serializer = ProductSerializer(instance)
         return Response(output_serializer.data)
+
+
+class ProductStockView(APIView):
+    """
+    Остатки опубликованных товаров: GET /api/catalog/stock/?ids=1,2,3 → {"1": 5, "2": 0}.
+    В ответы каталога остаток не входит (иначе каждый заказ сбрасывал бы их кэш и ETag);
+    этот ответ не кэшируется.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            ids = {int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()}
+        except ValueError:
+            return Response({"error": "ids — номера товаров через запятую."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > STOCK_MAX_IDS:
+            return Response(
+                {"error": f"Не больше {STOCK_MAX_IDS} товаров за запрос."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ids = [pk for pk in ids if 0 < pk < 2 ** 63]
+        stock = Product.objects.filter(pk__in=ids, is_published=True).values_list('pk', 'stock')
+        response = Response({str(pk): value for pk, value in stock})
+        patch_cache_control(response, no_store=True)
+        return response
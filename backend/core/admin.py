@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SiteSettings, Page, EmailTemplate, PromoCode, Campaign, ContactRequest, MediaItem
+from .models import SiteSettings, Page, EmailTemplate, PromoCode, Campaign, ContactRequest, MediaItem, DailySalesRollup, ReportJob
 
 
 @admin.register(SiteSettings)
@@ -68,13 +68,14 @@ class PromoCodeAdmin(admin.ModelAdmin):
 
 @admin.register(Campaign)
 class CampaignAdmin(admin.ModelAdmin):
-    list_display = ('name', 'discount_type', 'value', 'start_date', 'end_date', 'is_active')
-    list_filter = ('discount_type', 'is_active')
+    list_display = ('name', 'discount_type', 'value', 'priority', 'is_stackable', 'start_date', 'end_date', 'is_active')
+    list_filter = ('discount_type', 'is_active', 'is_stackable')
     search_fields = ('name',)
     readonly_fields = ('created_at', 'updated_at')
     filter_horizontal = ('categories', 'products')
     fieldsets = (
         (None, {'fields': ('name', 'discount_type', 'value', 'is_active')}),
+        ('Совмещение', {'fields': ('priority', 'is_stackable')}),
         ('Период', {'fields': ('start_date', 'end_date')}),
         ('Применимость', {'fields': ('categories', 'products'), 'description': 'Пусто = на весь каталог.'}),
         ('Даты', {'fields': ('created_at', 'updated_at')}),
@@ -112,3 +113,34 @@ class ContactRequestAdmin(admin.ModelAdmin):
         ('Ответ', {'fields': ('admin_response',)}),
         ('Даты', {'fields': ('created_at', 'updated_at')}),
     )
+
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    """Сводка ведётся автоматически; пересобрать: python manage.py rebuild_sales_rollup."""
+    list_display = ('date', 'orders_count', 'revenue', 'new_users', 'zero_stock')
+    date_hierarchy = 'date'
+    readonly_fields = ('date', 'orders_count', 'revenue', 'new_users', 'zero_stock', 'zero_stock_updated_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    """Задания создаются со страницы «Отчёты»; здесь — история и файлы."""
+    list_display = ('id', 'kind', 'date_from', 'date_to', 'status', 'rows', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = (
+        'kind', 'date_from', 'date_to', 'status', 'result', 'file', 'rows', 'error',
+        'created_by', 'created_at', 'finished_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
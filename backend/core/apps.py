@@ -5,3 +5,14 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     verbose_name = 'Настройки и страницы'
+
+    def ready(self):
+        from django.core.checks import register
+
+        from . import signals  # noqa: F401
+        from .checks import check_shared_cache
+        from shop.instrumentation import instrument_connections
+
+        # Обёртка SQL для метрик запросов — на всех соединениях с самого старта, в любом потоке
+        instrument_connections()
+        register(check_shared_cache)
@@ -0,0 +1,589 @@
+"""
+Сквозной бенчмарк API на сгенерированном наборе данных (core.seeding).
+
+Сценарии — каталог, поиск, карточка товара, добавление и изменение строки корзины,
+оформление заказа, главная админки и отчёты. Каждый сценарий прогоняется через транспорты:
+- client — django.test.Client (WSGI-обработчик в том же потоке);
+- asgi — django.test.AsyncClient (ASGIHandler в процессе);
+- live — настоящий HTTP до WSGI-сервера в соседнем потоке (как в LiveServerTestCase).
+
+Для каждой пары (транспорт, сценарий) считаются p50 / p95 / max задержки, число SQL-запросов
+(медиана и максимум по прогонам) и размер ответа. Результаты дописываются в историю (JSON Lines) и сравниваются с сохранённой
+базовой линией: рост числа запросов или p95 сверх допуска считается регрессией.
+
+Нагрузочное сравнение WSGI и ASGI (manage.py bench_asgi) — run_load(): чтения каталога под
+одновременными соединениями, генератор нагрузки (core.loadgen) в отдельном процессе.
+
+Всё выполняется в тестовой базе (setup_databases), рабочая база не меняется.
+"""
+import http.client
+import json
+import logging
+import math
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import quote, urlencode
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connection, connections
+from django.test import AsyncClient, Client, override_settings
+from django.core.servers.basehttp import ThreadedWSGIServer
+from django.test.testcases import LiveServerThread
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment, teardown_databases,
+    teardown_test_environment,
+)
+from django.utils import timezone
+
+SCENARIOS = (
+    'catalog_list', 'catalog_search', 'product_detail', 'cart_add', 'cart_update', 'checkout',
+    'admin_index', 'reports',
+)
+TRANSPORTS = ('client', 'asgi', 'live')
+SEARCH_QUERIES = ('шампунь', 'полироль pro', 'воск', 'керамич', 'очиститель 500')
+CART_LINES = 3
+CHECKOUT_POOL = 50
+REPORT_DAYS = 30
+
+Request = namedtuple('Request', 'method path data auth')
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def default_root():
+    return getattr(settings, 'BENCHMARK_ROOT', os.path.join(settings.BASE_DIR, 'benchmarks'))
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    """Тестовая база (как у manage.py test) на время бенчмарка; кэш ответов каталога отключается."""
+    from catalog.response_cache import reset_backend
+
+    setup_test_environment(debug=False)
+    old_config = setup_databases(verbosity=0, interactive=False, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+        reset_backend()
+
+
+@contextmanager
+def response_cache(enabled):
+    """Кэш ответов каталога мерит попадания, а не обработку запроса, — по умолчанию выключен."""
+    from catalog.response_cache import reset_backend
+
+    if enabled:
+        yield
+        return
+    options = {**getattr(settings, 'CATALOG_RESPONSE_CACHE', {}), 'BACKEND': 'none'}
+    with override_settings(CATALOG_RESPONSE_CACHE=options):
+        reset_backend()
+        try:
+            yield
+        finally:
+            reset_backend()
+
+
+class BenchData:
+    """
+    Общая фикстура сценариев: данные core.seeding (генерируются, если их ещё нет),
+    покупатель с JWT и корзиной, сотрудник с сессией для админки.
+    """
+
+    def __init__(self, scale='small', seed=1):
+        from catalog.models import Category, Product
+        from core import seeding
+
+        self.scale = scale
+        self.seed = seed
+        self.seeded = not seeding.seeded_exists()
+        if self.seeded:
+            seeding.seed(scale=scale, seed=seed)
+        published = Product.objects.filter(slug__startswith=f'{seeding.PREFIX}-product-', is_published=True)
+        self.product_slugs = list(published.order_by('id').values_list('slug', flat=True)[:200])
+        self.category_slugs = list(
+            Category.objects.filter(slug__startswith=f'{seeding.PREFIX}-').order_by('id').values_list('slug', flat=True)
+        )
+        # Товары для корзины и заказов: остатка хватает на любое число повторов (база тестовая)
+        self.pool = list(published.order_by('-id').values_list('id', flat=True)[:CHECKOUT_POOL])
+        if len(self.pool) <= CART_LINES or not self.product_slugs or not self.category_slugs:
+            raise BenchmarkError('Слишком маленький набор данных для бенчмарка.')
+        Product.objects.filter(pk__in=self.pool).update(stock=10 ** 9)
+        self._users()
+        today = timezone.localdate()
+        self.report_range = ((today - timedelta(days=REPORT_DAYS)).isoformat(), today.isoformat())
+
+    def _users(self):
+        from django.contrib.auth import get_user_model
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        from cart.models import Cart
+
+        User = get_user_model()
+        customer = User.objects.filter(username='bench-customer').first()
+        if customer is None:
+            customer = User.objects.create_user('bench-customer', 'bench-customer@example.com', 'bench-password')
+        staff = User.objects.filter(username='bench-staff').first()
+        if staff is None:
+            staff = User.objects.create_superuser('bench-staff', 'bench-staff@example.com', 'bench-password')
+        self.cart, _ = Cart.objects.get_or_create(user=customer)
+        self.access_token = str(RefreshToken.for_user(customer).access_token)
+        client = Client()
+        client.force_login(staff)
+        self.session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def headers(self, auth):
+        if auth == 'jwt':
+            return {'Authorization': f'Bearer {self.access_token}'}
+        if auth == 'session':
+            return {'Cookie': f'{settings.SESSION_COOKIE_NAME}={self.session_key}'}
+        return {}
+
+    def reset_cart(self, i):
+        """Корзина из CART_LINES строк перед каждым повтором сценариев корзины и заказа."""
+        from cart.models import CartItem
+
+        CartItem.objects.filter(cart=self.cart).delete()
+        start = i % (len(self.pool) - CART_LINES)
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, product_id=pk, quantity=1) for pk in self.pool[start:start + CART_LINES]
+        ])
+
+
+class Scenarios:
+    """Сценарий — пара методов: prepare_<name>(i) (вне замера, не обязателен) и <name>(i) → Request."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def request(self, name, i):
+        prepare = getattr(self, f'prepare_{name}', None)
+        if prepare:
+            prepare(i)
+        return getattr(self, name)(i)
+
+    def catalog_list(self, i):
+        slugs = self.data.category_slugs
+        return Request('get', f'/api/catalog/products/?category={slugs[i % len(slugs)]}', None, None)
+
+    def catalog_search(self, i):
+        query = SEARCH_QUERIES[i % len(SEARCH_QUERIES)]
+        return Request('get', f'/api/catalog/products/?{urlencode({"search": query})}', None, None)
+
+    def product_detail(self, i):
+        slugs = self.data.product_slugs
+        return Request('get', f'/api/catalog/products/{slugs[i % len(slugs)]}/', None, None)
+
+    def prepare_cart_add(self, i):
+        self.data.reset_cart(i)
+
+    def cart_add(self, i):
+        pool = self.data.pool
+        product_id = pool[i % (len(pool) - CART_LINES) + CART_LINES]  # товар не из корзины (см. reset_cart)
+        return Request('post', '/api/cart/add_item/', {'product_id': product_id, 'quantity': 1}, 'jwt')
+
+    def prepare_cart_update(self, i):
+        self.data.reset_cart(i)
+
+    def cart_update(self, i):
+        from cart.models import CartItem
+
+        item = CartItem.objects.filter(cart=self.data.cart).order_by('id').values_list('id', flat=True).first()
+        return Request('patch', f'/api/cart/{self.data.cart.pk}/', {'items': [{'id': item, 'quantity': 2}]}, 'jwt')
+
+    def prepare_checkout(self, i):
+        self.data.reset_cart(i)
+
+    def checkout(self, i):
+        data = {'address': 'Минск, ул. Бенчмарков, 1', 'phone': '+375290000000'}
+        return Request('post', '/api/orders/orders/create_order/', data, 'jwt')
+
+    def admin_index(self, i):
+        return Request('get', '/admin/', None, 'session')
+
+    def reports(self, i):
+        date_from, date_to = self.data.report_range
+        return Request('get', f'/admin/reports/?date_from={date_from}&date_to={date_to}', None, 'session')
+
+
+class ClientTransport:
+    """django.test.Client: WSGI-обработчик без сети, запросы считаются в этом же соединении."""
+    name = 'client'
+    client_class = Client
+
+    def __init__(self, data):
+        self.data = data
+        self.clients = {}
+
+    def client(self, auth):
+        """Отдельный клиент на способ входа: у сессионного cookie сотрудника, у остальных — пусто."""
+        if auth not in self.clients:
+            client = self.clients[auth] = self.client_class()
+            if auth == 'session':
+                client.cookies[settings.SESSION_COOKIE_NAME] = self.data.session_key
+        return self.clients[auth]
+
+    def prepare(self, request):
+        kwargs = {'headers': self.data.headers(request.auth) if request.auth == 'jwt' else {}}
+        if request.data is not None:
+            kwargs.update(data=json.dumps(request.data), content_type='application/json')
+        return getattr(self.client(request.auth), request.method), kwargs
+
+    def send(self, request):
+        call, kwargs = self.prepare(request)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = call(request.path, **kwargs)
+            elapsed = time.perf_counter() - started
+        return response.status_code, len(response.content), len(queries), elapsed
+
+    def close(self):
+        pass
+
+
+class AsgiTransport(ClientTransport):
+    """
+    django.test.AsyncClient: запрос проходит ASGIHandler. Синхронные представления выполняются
+    в этом потоке (thread_sensitive), поэтому запросы к БД видны в текущем соединении.
+    """
+    name = 'asgi'
+    client_class = AsyncClient
+
+    def prepare(self, request):
+        call, kwargs = super().prepare(request)
+        return async_to_sync(call), kwargs
+
+
+class _CountingApp:
+    """WSGI-обёртка в потоке сервера: запоминает число SQL-запросов последнего запроса."""
+
+    def __init__(self, app):
+        self.app = app
+        self.queries = None
+
+    def __call__(self, environ, start_response):
+        with CaptureQueriesContext(connection) as queries:
+            result = self.app(environ, start_response)
+        self.queries = len(queries)
+        return result
+
+
+class LiveTransport:
+    """HTTP до WSGI-сервера в соседнем потоке; SQLite в памяти делит соединение с сервером."""
+    name = 'live'
+
+    def __init__(self, data):
+        self.data = data
+        self.app = None
+        overrides = {}
+        for conn in connections.all():
+            if conn.vendor == 'sqlite' and conn.is_in_memory_db():
+                overrides[conn.alias] = conn
+                conn.inc_thread_sharing()
+        self.shared = list(overrides.values())
+        self.thread = LiveServerThread('localhost', self._wrap, connections_override=overrides, port=0)
+        self.thread.daemon = True
+        self.thread.start()
+        self.thread.is_ready.wait()
+        if self.thread.error:
+            self.close()
+            raise self.thread.error
+
+    def _wrap(self, app):
+        self.app = _CountingApp(app)
+        return self.app
+
+    def send(self, request):
+        headers = self.data.headers(request.auth)
+        body = None
+        if request.data is not None:
+            body = json.dumps(request.data).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        conn = http.client.HTTPConnection('localhost', self.thread.port, timeout=60)
+        try:
+            started = time.perf_counter()
+            conn.request(request.method.upper(), request.path, body=body, headers=headers)
+            response = conn.getresponse()
+            content = response.read()
+            elapsed = time.perf_counter() - started
+        finally:
+            conn.close()
+        return response.status, len(content), self.app.queries, elapsed
+
+    def close(self):
+        self.thread.terminate()
+        self.thread.join()
+        for conn in self.shared:
+            conn.dec_thread_sharing()
+
+
+
+TRANSPORT_CLASSES = {t.name: t for t in (ClientTransport, AsgiTransport, LiveTransport)}
+
+
+def summarize(timings, sizes, query_counts):
+    timings = sorted(timings)
+    counted = None not in query_counts
+    return {
+        'n': len(timings),
+        'p50_ms': round(statistics.median(timings) * 1000, 2),
+        # p95 по ближайшему рангу: ceil(0.95 * n)-е значение
+        'p95_ms': round(timings[math.ceil(0.95 * len(timings)) - 1] * 1000, 2),
+        'max_ms': round(timings[-1] * 1000, 2),
+        # Медиана — для отчёта; регрессию ловит максимум: лишний запрос хотя бы в одном прогоне
+        'queries': statistics.median_low(query_counts) if counted else None,
+        'queries_max': max(query_counts) if counted else None,
+        'bytes': int(statistics.median(sizes)),
+    }
+
+
+def run(data, transports=TRANSPORTS, scenarios=SCENARIOS, repeat=30, warmup=3, progress=None):
+    """Прогоняет сценарии через транспорты; возвращает {транспорт: {сценарий: сводка}}."""
+    plan = Scenarios(data)
+    results = {}
+    for transport_name in transports:
+        transport = TRANSPORT_CLASSES[transport_name](data)
+        try:
+            results[transport_name] = {}
+            for name in scenarios:
+                timings, sizes, query_counts = [], [], []
+                for i in range(warmup + repeat):
+                    request = plan.request(name, i)
+                    status, size, queries, elapsed = transport.send(request)
+                    if status != 200:
+                        raise BenchmarkError(f'{transport_name} {name}: {request.method.upper()} {request.path} → {status}')
+                    if i >= warmup:
+                        timings.append(elapsed)
+                        sizes.append(size)
+                        query_counts.append(queries)
+                results[transport_name][name] = summarize(timings, sizes, query_counts)
+                if progress:
+                    progress(transport_name, name, results[transport_name][name])
+        finally:
+            transport.close()
+    return results
+
+
+def make_record(data, results, repeat):
+    return {
+        'created_at': timezone.now().isoformat(timespec='seconds'),
+        'scale': data.scale,
+        'seed': data.seed,
+        'vendor': connection.vendor,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def append_history(path, record):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, record):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def compare(record, baseline, query_tolerance=0, latency_tolerance=0.3, min_latency_delta_ms=2.0):
+    """
+    Регрессии относительно базовой линии: строки «транспорт сценарий: что выросло».
+    p95 считается выросшим, только если превышен и относительный допуск, и абсолютный порог —
+    иначе быстрые запросы (доли миллисекунды) давали бы ложные срабатывания.
+    """
+    regressions = []
+    for transport, scenarios in record['results'].items():
+        for name, current in scenarios.items():
+            base = baseline.get('results', {}).get(transport, {}).get(name)
+            if not base:
+                continue
+            # Базовые линии до queries_max хранили только медиану
+            current_max = current.get('queries_max', current['queries'])
+            base_max = base.get('queries_max', base['queries'])
+            if None not in (current_max, base_max) and current_max > base_max + query_tolerance:
+                regressions.append(f'{transport} {name}: запросов (макс.) {base_max} → {current_max}')
+            delta = current['p95_ms'] - base['p95_ms']
+            if delta > min_latency_delta_ms and current['p95_ms'] > base['p95_ms'] * (1 + latency_tolerance):
+                regressions.append(f'{transport} {name}: p95 {base["p95_ms"]} → {current["p95_ms"]} мс')
+    return regressions
+
+
+# --- нагрузка: WSGI против ASGI ---
+
+LOAD_TARGETS = ('wsgi', 'asgi', 'asgi-sync')
+LOAD_PRODUCTS = 50
+
+
+class _WSGIServer(ThreadedWSGIServer):
+    # Очередь accept как у боевых серверов: у socketserver по умолчанию 5, и под сотнями
+    # одновременных соединений замер показывал бы повторы SYN, а не Django
+    request_queue_size = 1024
+
+
+class _WSGIServerThread(LiveServerThread):
+    server_class = _WSGIServer
+
+
+class _UvicornThread(threading.Thread):
+    def __init__(self, app):
+        try:
+            import uvicorn
+        except ImportError:
+            raise BenchmarkError('Для ASGI-замера установите пакет uvicorn.')
+        super().__init__(name='bench-uvicorn', daemon=True)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+        # log_config=None: не перенастраивать логирование процесса (dictConfig uvicorn включил бы отключённые логгеры)
+        config = uvicorn.Config(
+            app, lifespan='off', log_config=None, log_level='warning', access_log=False, backlog=2048,
+        )
+        self.server = uvicorn.Server(config)
+
+    def run(self):
+        self.server.run(sockets=[self.sock])
+
+    def wait_started(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self.is_alive() or time.monotonic() > deadline:
+                raise BenchmarkError('uvicorn не запустился.')
+            time.sleep(0.05)
+
+    def close(self):
+        self.server.should_exit = True
+        self.join(timeout=30)
+        self.sock.close()
+
+
+@contextmanager
+def short_connections():
+    """
+    Соединение с базой закрывается после каждого запроса (CONN_MAX_AGE=0). Под ASGI запросы
+    выполняют ORM в своих потоках, и постоянные соединения копились бы до исчерпания лимита базы.
+    С пулом psycopg (OPTIONS['pool']) ничего не меняется.
+    """
+    changed = {}
+    for alias in connections:
+        config = connections.settings[alias]
+        if not config.get('OPTIONS', {}).get('pool') and config.get('CONN_MAX_AGE'):
+            changed[alias] = config['CONN_MAX_AGE']
+            config['CONN_MAX_AGE'] = 0
+    try:
+        yield
+    finally:
+        for alias, value in changed.items():
+            connections.settings[alias]['CONN_MAX_AGE'] = value
+
+
+@contextmanager
+def load_server(target):
+    """Сервер в потоке этого процесса; отдаёт порт. wsgi — поток на соединение, asgi* — uvicorn."""
+    if target == 'wsgi':
+        thread = _WSGIServerThread('127.0.0.1', lambda app: app, port=0)
+        thread.daemon = True
+        thread.start()
+        thread.is_ready.wait()
+        if thread.error:
+            raise thread.error
+        try:
+            yield thread.port
+        finally:
+            thread.terminate()
+            thread.join()
+        return
+
+    from django.core.handlers.asgi import ASGIHandler
+
+    # Не get_asgi_application(): повторный django.setup() перенастроил бы логирование процесса
+    thread = _UvicornThread(ASGIHandler())
+    thread.start()
+    try:
+        thread.wait_started()
+        yield thread.port
+    finally:
+        thread.close()
+
+
+def load_paths(data, target):
+    """
+    Смесь чтений каталога на товар: карточка, каждый второй — компактный список категории,
+    каждый пятый — полный список, каждый десятый — категории и бренды.
+    asgi — async-эндпоинты (/api/async/catalog/), wsgi и asgi-sync — обычные DRF-view.
+    """
+    prefix = '/api/async/catalog/' if target == 'asgi' else '/api/catalog/'
+    categories = data.category_slugs
+    paths = []
+    for i, slug in enumerate(data.product_slugs[:LOAD_PRODUCTS]):
+        paths.append(f'{prefix}products/{quote(slug)}/')
+        if i % 2 == 0:
+            paths.append(f'{prefix}products/?' + urlencode({'view': 'compact', 'category': categories[i % len(categories)]}))
+        if i % 5 == 0:
+            paths.append(f'{prefix}products/')
+        if i % 10 == 0:
+            paths += [f'{prefix}categories/', f'{prefix}brands/']
+    return paths
+
+
+def loadgen(port, paths, concurrency, duration, warmup):
+    """Запускает core.loadgen отдельным процессом и возвращает его сводку."""
+    command = [
+        sys.executable, '-m', 'core.loadgen', '--port', str(port), '--concurrency', str(concurrency),
+        '--duration', str(duration), '--warmup', str(warmup), *paths,
+    ]
+    try:
+        completed = subprocess.run(
+            command, cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=duration + warmup + 300,
+        )
+    except subprocess.TimeoutExpired:
+        raise BenchmarkError('Генератор нагрузки не уложился в отведённое время.')
+    if completed.returncode:
+        raise BenchmarkError(f'Генератор нагрузки завершился с ошибкой: {completed.stderr.strip()[-500:]}')
+    return json.loads(completed.stdout)
+
+
+def run_load(data, targets=LOAD_TARGETS, levels=(50, 200), duration=10.0, warmup=2.0, progress=None):
+    """{цель: {одновременных соединений: сводка core.loadgen}}."""
+    results = {}
+    # Под нагрузкой почти каждый запрос «медленный» — строки лога мешали бы таблице
+    request_log = logging.getLogger('shop.requests')
+    disabled, request_log.disabled = request_log.disabled, True
+    try:
+        with short_connections():
+            for target in targets:
+                paths = load_paths(data, target)
+                results[target] = {}
+                with load_server(target) as port:
+                    for concurrency in levels:
+                        stats = loadgen(port, paths, concurrency, duration, warmup)
+                        results[target][str(concurrency)] = stats
+                        if progress:
+                            progress(target, concurrency, stats)
+    finally:
+        request_log.disabled = disabled
+    return results
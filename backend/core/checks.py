@@ -0,0 +1,16 @@
+"""Проверки настроек (manage.py check)."""
+from django.conf import settings
+from django.core.checks import Warning
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Без общего кэша воркеры не видят изменений настроек сайта, отметок записи и переключателя профилей."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if settings.DEBUG or not backend.endswith('LocMemCache'):
+        return []
+    return [Warning(
+        'Кэш Django (CACHES) — LocMemCache, свой у каждого процесса.',
+        hint='Задайте CACHE_BACKEND=redis (CACHE_LOCATION=redis://...) или CACHE_BACKEND=db '
+             '(python manage.py createcachetable).',
+        id='core.W001',
+    )]
@@ -0,0 +1,103 @@
+"""
+Генератор HTTP-нагрузки для manage.py bench_asgi: concurrency корутин по кругу шлют GET
+по списку путей в течение duration секунд, соединение на запрос (Connection: close).
+
+Запускается отдельным процессом, чтобы не делить GIL с измеряемым сервером; Django не нужен:
+    python -m core.loadgen --port 8000 --concurrency 200 --duration 10 /api/catalog/products/
+Печатает одну строку JSON: запросы, ошибки, статусы, RPS и перцентили задержки (мс).
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+
+async def fetch(host, port, path, timeout):
+    """(статус, байт ответа); статус 0 — ошибка соединения или таймаут."""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nAccept: application/json\r\n'
+            f'Connection: close\r\n\r\n'.encode('latin-1')
+        )
+        await writer.drain()
+        data = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+    parts = data.split(b' ', 2)
+    status = int(parts[1]) if data.startswith(b'HTTP/') and len(parts) > 1 and parts[1].isdigit() else 0
+    return status, len(data)
+
+
+async def worker(options, offset, deadline, latencies, statuses):
+    paths = options.paths
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            status, _ = await fetch(options.host, options.port, path, options.timeout)
+        except (OSError, asyncio.TimeoutError):
+            status = 0
+        if latencies is not None:
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+
+
+async def phase(options, seconds, latencies=None, statuses=None):
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(
+        worker(options, n, deadline, latencies, statuses) for n in range(options.concurrency)
+    ))
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def main(options):
+    if options.warmup:
+        await phase(options, options.warmup)
+    latencies, statuses = [], Counter()
+    started = time.perf_counter()
+    await phase(options, options.duration, latencies, statuses)
+    elapsed = time.perf_counter() - started
+    ok = sum(n for status, n in statuses.items() if 200 <= status < 400)
+    ms = [v * 1000 for v in latencies]
+    return {
+        'concurrency': options.concurrency,
+        'duration': round(elapsed, 3),
+        'requests': len(latencies),
+        'errors': len(latencies) - ok,
+        'statuses': {str(status): n for status, n in sorted(statuses.items())},
+        'rps': round(ok / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': percentile(ms, 0.5),
+        'p95_ms': percentile(ms, 0.95),
+        'p99_ms': percentile(ms, 0.99),
+        'max_ms': max(ms) if ms else None,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP-нагрузка: GET по кругу, соединение на запрос')
+    parser.add_argument('paths', nargs='+', help='Пути (уже закодированные), по кругу')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10.0, help='Секунд замера')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Секунд прогрева (не учитываются)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Таймаут запроса, секунд')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    print(json.dumps(asyncio.run(main(parse_args()))))
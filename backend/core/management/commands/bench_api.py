@@ -0,0 +1,102 @@
+"""
+Сквозной бенчмарк API (core.benchmarks): задержка, число запросов и размер ответа по сценариям
+каталога, корзины, заказа и админки. Запускается в тестовой базе на данных core.seeding;
+результат дописывается в историю и сравнивается с базовой линией (ненулевой код выхода
+при регрессии — удобно для CI).
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+from core.seeding import SCALES
+
+
+def _names(value, allowed):
+    names = [n.strip() for n in value.split(',') if n.strip()]
+    unknown = [n for n in names if n not in allowed]
+    if unknown:
+        raise CommandError(f'Неизвестные значения: {", ".join(unknown)} (доступны: {", ".join(allowed)})')
+    return names
+
+
+class Command(BaseCommand):
+    help = 'Сквозной бенчмарк API на сгенерированных данных с проверкой регрессий против базовой линии'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='Размер набора данных')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--repeat', type=int, default=30, help='Замеров на сценарий')
+        parser.add_argument('--warmup', type=int, default=3, help='Прогревочных запросов на сценарий')
+        parser.add_argument('--transports', default=','.join(benchmarks.TRANSPORTS),
+                            help='client, asgi, live через запятую')
+        parser.add_argument('--scenarios', default=','.join(benchmarks.SCENARIOS), help='Сценарии через запятую')
+        parser.add_argument('--history', help='Файл истории (JSON Lines), по умолчанию BENCHMARK_ROOT/history.jsonl')
+        parser.add_argument('--baseline', help='Базовая линия, по умолчанию BENCHMARK_ROOT/baseline.json')
+        parser.add_argument('--save-baseline', action='store_true', help='Сохранить результат как базовую линию')
+        parser.add_argument('--query-tolerance', type=int, default=0, help='Допустимый прирост числа запросов')
+        parser.add_argument('--latency-tolerance', type=float, default=0.3,
+                            help='Допустимый относительный рост p95 (0.3 = 30%%)')
+        parser.add_argument('--min-latency-delta', type=float, default=2.0,
+                            help='Рост p95 меньше этого числа мс не считается регрессией')
+        parser.add_argument('--response-cache', action='store_true', help='Не отключать кэш ответов каталога')
+        parser.add_argument('--keepdb', action='store_true', help='Сохранить тестовую базу (и данные) между запусками')
+
+    def handle(self, *args, **options):
+        transports = _names(options['transports'], benchmarks.TRANSPORTS)
+        scenarios = _names(options['scenarios'], benchmarks.SCENARIOS)
+        root = benchmarks.default_root()
+        history = options['history'] or os.path.join(root, 'history.jsonl')
+        baseline_path = options['baseline'] or os.path.join(root, 'baseline.json')
+
+        self.stdout.write(f'{"транспорт":<10} {"сценарий":<16} {"p50, мс":>9} {"p95, мс":>9} {"max, мс":>9} '
+                          f'{"запросов":>9} {"байт":>9}')
+        with benchmarks.benchmark_database(keepdb=options['keepdb']):
+            try:
+                data = benchmarks.BenchData(scale=options['scale'], seed=options['seed'])
+                with benchmarks.response_cache(options['response_cache']):
+                    results = benchmarks.run(
+                        data, transports, scenarios, repeat=options['repeat'], warmup=options['warmup'],
+                        progress=self._row,
+                    )
+            except benchmarks.BenchmarkError as exc:
+                raise CommandError(str(exc))
+            record = benchmarks.make_record(data, results, options['repeat'])
+
+        benchmarks.append_history(history, record)
+        self.stdout.write(f'История: {history}')
+        if options['save_baseline']:
+            benchmarks.save_baseline(baseline_path, record)
+            self.stdout.write(self.style.SUCCESS(f'Базовая линия сохранена: {baseline_path}'))
+            return
+
+        baseline = benchmarks.load_baseline(baseline_path)
+        if baseline is None:
+            self.stdout.write(self.style.WARNING('Базовой линии нет — сохраните её флагом --save-baseline'))
+            return
+        if (baseline.get('scale'), baseline.get('vendor')) != (record['scale'], record['vendor']):
+            self.stdout.write(self.style.WARNING(
+                f'Базовая линия снята на {baseline.get("scale")}/{baseline.get("vendor")}, '
+                f'сейчас {record["scale"]}/{record["vendor"]} — сравнение пропущено'
+            ))
+            return
+        regressions = benchmarks.compare(
+            record, baseline,
+            query_tolerance=options['query_tolerance'],
+            latency_tolerance=options['latency_tolerance'],
+            min_latency_delta_ms=options['min_latency_delta'],
+        )
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            raise CommandError(f'Регрессий относительно базовой линии: {len(regressions)}')
+        self.stdout.write(self.style.SUCCESS('Регрессий относительно базовой линии нет'))
+
+    def _row(self, transport, scenario, stats):
+        queries = '—' if stats['queries'] is None else str(stats['queries'])
+        if stats.get('queries_max') not in (None, stats['queries']):
+            queries += f'/{stats["queries_max"]}'
+        self.stdout.write(
+            f'{transport:<10} {scenario:<16} {stats["p50_ms"]:>9.2f} {stats["p95_ms"]:>9.2f} {stats["max_ms"]:>9.2f} '
+            f'{queries:>9} {stats["bytes"]:>9}'
+        )
@@ -0,0 +1,83 @@
+"""
+Нагрузочное сравнение чтений каталога под WSGI и ASGI (core.benchmarks.run_load):
+RPS и хвосты задержки при высоком числе одновременных соединений. Запускается в тестовой базе
+на данных core.seeding; результат дописывается в BENCHMARK_ROOT/load-history.jsonl.
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core import benchmarks
+from core.seeding import SCALES
+
+from .bench_api import _names
+
+
+def _levels(value):
+    try:
+        levels = [int(v) for v in value.split(',') if v.strip()]
+    except ValueError:
+        raise CommandError('--concurrency: числа через запятую')
+    if not levels or min(levels) < 1:
+        raise CommandError('--concurrency: числа через запятую')
+    return levels
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочное сравнение чтений каталога: WSGI (поток на соединение) против ASGI (uvicorn)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='Размер набора данных')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--targets', default=','.join(benchmarks.LOAD_TARGETS),
+                            help='wsgi, asgi (async-эндпоинты), asgi-sync (обычные view под uvicorn) через запятую')
+        parser.add_argument('--concurrency', default='50,200', help='Одновременных соединений, через запятую')
+        parser.add_argument('--duration', type=float, default=10.0, help='Секунд замера на уровень')
+        parser.add_argument('--warmup', type=float, default=2.0, help='Секунд прогрева на уровень')
+        parser.add_argument('--history', help='Файл истории (JSON Lines), по умолчанию BENCHMARK_ROOT/load-history.jsonl')
+        parser.add_argument('--response-cache', action='store_true', help='Не отключать кэш ответов каталога')
+        parser.add_argument('--keepdb', action='store_true', help='Сохранить тестовую базу (и данные) между запусками')
+
+    def handle(self, *args, **options):
+        targets = _names(options['targets'], benchmarks.LOAD_TARGETS)
+        levels = _levels(options['concurrency'])
+        history = options['history'] or os.path.join(benchmarks.default_root(), 'load-history.jsonl')
+
+        self.stdout.write(f'{"цель":<10} {"соедин.":>8} {"RPS":>9} {"p50, мс":>9} {"p95, мс":>9} '
+                          f'{"p99, мс":>9} {"max, мс":>9} {"ошибок":>7}')
+        with benchmarks.benchmark_database(keepdb=options['keepdb']):
+            try:
+                data = benchmarks.BenchData(scale=options['scale'], seed=options['seed'])
+                with benchmarks.response_cache(options['response_cache']):
+                    results = benchmarks.run_load(
+                        data, targets, levels, duration=options['duration'], warmup=options['warmup'],
+                        progress=self._row,
+                    )
+            except benchmarks.BenchmarkError as exc:
+                raise CommandError(str(exc))
+            record = {
+                'created_at': timezone.now().isoformat(timespec='seconds'),
+                'scale': data.scale,
+                'seed': data.seed,
+                'vendor': connection.vendor,
+                'duration': options['duration'],
+                'results': results,
+            }
+
+        benchmarks.append_history(history, record)
+        self.stdout.write(f'История: {history}')
+        if any(stats['errors'] for levels_stats in results.values() for stats in levels_stats.values()):
+            self.stdout.write(self.style.WARNING('Есть ошибочные ответы — сравнение RPS неточное'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Готово'))
+
+    def _row(self, target, concurrency, stats):
+        def ms(value):
+            return '—' if value is None else f'{value:.1f}'
+
+        self.stdout.write(
+            f'{target:<10} {concurrency:>8} {stats["rps"]:>9.1f} {ms(stats["p50_ms"]):>9} {ms(stats["p95_ms"]):>9} '
+            f'{ms(stats["p99_ms"]):>9} {ms(stats["max_ms"]):>9} {stats["errors"]:>7}'
+        )
@@ -0,0 +1,28 @@
+"""
+Проверка планов горячих запросов (core.query_plans) на текущей базе. Ненулевой код выхода,
+если план деградировал. Те же проверки выполняет тест core.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import query_plans
+
+
+class Command(BaseCommand):
+    help = 'Проверяет через EXPLAIN, что горячие запросы используют индексы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Печатать планы целиком')
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, plan, problems in query_plans.check(query_plans.hot_queries()):
+            if problems:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'✗ {name}: {", ".join(problems)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {name}'))
+            if problems or options['verbose_plans']:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+        if failures:
+            raise CommandError(f'Деградировали планы запросов: {len(failures)}')
+        self.stdout.write(self.style.SUCCESS('Все горячие запросы идут по индексам'))
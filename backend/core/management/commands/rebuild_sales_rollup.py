@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from core.rollups import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает дневную сводку продаж по заказам и пользователям'
+
+    def handle(self, *args, **options):
+        days = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'Сводка продаж перестроена, дней: {days}'))
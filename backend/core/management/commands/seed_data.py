@@ -0,0 +1,58 @@
+"""
+Синтетический набор данных заданного размера (core.seeding) — общий для нагрузочных тестов
+и бенчмарков. Пример: python manage.py seed_data --scale large --seed 42
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seeding import CHUNK_SIZE, SCALES, scale_options, seed, seeded_exists
+
+
+class Command(BaseCommand):
+    help = 'Генерирует каталог, пользователей, корзины, заказы, отзывы и движения по складу (bulk_create пачками)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small', help='Пресет размеров')
+        for name in ('categories', 'brands', 'products', 'users', 'carts', 'orders', 'reviews'):
+            parser.add_argument(f'--{name}', type=int, help='Переопределить размер пресета')
+        parser.add_argument('--seed', type=int, default=1, help='Зерно генератора (одинаковое — одинаковые данные)')
+        parser.add_argument('--days', type=int, default=365, help='За сколько дней разнести даты заказов и отзывов')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--no-search-index', action='store_true', help='Не строить поисковый индекс')
+
+    def handle(self, *args, **options):
+        if seeded_exists():
+            raise CommandError('В базе уже есть сгенерированные данные — очистите её (manage.py flush).')
+        sizes = {name: options[name] for name in SCALES['small']}
+        try:
+            scale_options(options['scale'], **sizes)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self._last = {}
+        started = time.perf_counter()
+        counts = seed(
+            scale=options['scale'],
+            seed=options['seed'],
+            days=max(1, options['days']),
+            chunk_size=max(1, options['chunk_size']),
+            search_index=not options['no_search_index'],
+            progress=self._progress,
+            **sizes,
+        )
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        for table, rows in counts.items():
+            self.stdout.write(f'  {table:<16} {rows:>10}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Сгенерировано строк: {total} за {elapsed:.1f} с ({total / elapsed:.0f} строк/с)'
+        ))
+
+    def _progress(self, table, rows, seconds):
+        if table == 'derived':
+            self.stdout.write(f'  сводка продаж и поисковый индекс пересчитаны за {seconds:.1f} с')
+            return
+        # Не чаще раза в секунду на таблицу
+        if seconds - self._last.get(table, -1) >= 1:
+            self._last[table] = seconds
+            self.stdout.write(f'  {table}: {rows} строк, {rows / seconds if seconds else 0:.0f} строк/с')
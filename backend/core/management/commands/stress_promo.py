@@ -0,0 +1,97 @@
+"""
+Нагрузочная проверка промокодов: много параллельных погашений кода с ограниченным
+числом использований. Часть транзакций после погашения откатывается (как заказ,
+который не прошёл по остаткам) — их использования должны вернуться.
+Работает с настоящей базой, тестовый промокод удаляется в конце.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from core.models import PromoCode
+from core.promo import PromoCodeError, claim_promo, find_promo
+
+CODE = 'STRESS-PROMO'
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Параллельные погашения промокода: лимит использований не должен превышаться'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--redemptions', type=int, default=500, help='Всего попыток погашения')
+        parser.add_argument('--max-uses', type=int, default=100, help='Лимит использований промокода')
+        parser.add_argument('--threads', type=int, default=32, help='Параллельных потоков')
+        parser.add_argument('--rollback-every', type=int, default=5,
+                            help='Каждая N-я успешная транзакция откатывается (0 — без откатов)')
+        parser.add_argument('--retries', type=int, default=50, help='Повторов при блокировке БД (SQLite)')
+
+    def handle(self, *args, **options):
+        if PromoCode.objects.filter(code=CODE).exists():
+            raise CommandError(f'Промокод {CODE} уже существует — удалите его перед запуском.')
+        promo = PromoCode.objects.create(code=CODE, value=Decimal('10'), max_uses=options['max_uses'])
+        try:
+            self._run(promo, options)
+        finally:
+            promo.delete()
+
+    def _run(self, promo, options):
+        stats = {'committed': 0, 'rolled_back': 0, 'exhausted': 0, 'errors': 0, 'retries': 0}
+        lock = threading.Lock()
+        attempt_no = iter(range(1, options['redemptions'] + 1))
+
+        def redeem(_):
+            try:
+                with lock:
+                    n = next(attempt_no)
+                rollback = options['rollback_every'] and n % options['rollback_every'] == 0
+                for attempt in range(options['retries'] + 1):
+                    try:
+                        with transaction.atomic():
+                            found = find_promo(CODE.lower())
+                            if found is None:
+                                raise PromoCodeError('exhausted')
+                            claim_promo(found)
+                            if rollback:
+                                raise _Rollback
+                        outcome = 'committed'
+                    except _Rollback:
+                        outcome = 'rolled_back'
+                    except PromoCodeError:
+                        outcome = 'exhausted'
+                    except OperationalError:
+                        with lock:
+                            stats['retries'] += 1
+                        time.sleep(0.001 * (attempt + 1))
+                        continue
+                    break
+                else:
+                    outcome = 'errors'
+                with lock:
+                    stats[outcome] += 1
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(redeem, range(options['redemptions'])))
+        elapsed = time.perf_counter() - started
+
+        promo.refresh_from_db()
+        self.stdout.write(
+            f'Попыток: {options["redemptions"]}, погашено: {stats["committed"]}, '
+            f'откатано: {stats["rolled_back"]}, отказов (лимит): {stats["exhausted"]}, '
+            f'ошибок: {stats["errors"]}, повторов из-за блокировок: {stats["retries"]}'
+        )
+        self.stdout.write(f'Время: {elapsed:.2f} с, {options["redemptions"] / elapsed:.0f} попыток/с')
+        self.stdout.write(f'used_count: {promo.used_count} (лимит {promo.max_uses})')
+        if promo.used_count != stats['committed'] or promo.used_count > promo.max_uses:
+            raise CommandError('Счётчик использований не совпадает с погашениями.')
+        self.stdout.write(self.style.SUCCESS('Лимит соблюдён, откаченные погашения вернулись.'))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_seo_media_productimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='is_stackable',
+            field=models.BooleanField(default=False, help_text='Суммируемые кампании применяются к цене друг за другом; несуммируемая — только одна.', verbose_name='Суммируется с другими'),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='priority',
+            field=models.IntegerField(default=0, help_text='Из подходящих кампаний первой применяется кампания с большим приоритетом.', verbose_name='Приоритет'),
+        ),
+    ]
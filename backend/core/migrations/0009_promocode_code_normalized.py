@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 14:48
+
+from django.db import migrations, models
+
+
+def fill_code_normalized(apps, schema_editor):
+    PromoCode = apps.get_model('core', 'PromoCode')
+    for promo in PromoCode.objects.only('id', 'code'):
+        PromoCode.objects.filter(pk=promo.pk).update(code_normalized=(promo.code or '').strip().upper())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_campaign_priority_stackable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promocode',
+            name='code_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=50, verbose_name='Нормализованный код'),
+        ),
+        migrations.RunPython(fill_code_normalized, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 14:50
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollup(apps, schema_editor):
+    """Первичное заполнение сводки по уже существующим заказам и пользователям."""
+    Order = apps.get_model('orders', 'Order')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    DailySalesRollup = apps.get_model('core', 'DailySalesRollup')
+    rows = {}
+    orders = (
+        Order.objects.exclude(status='cancelled').annotate(day=TruncDate('created_at'))
+        .values('day').annotate(n=Count('id'), revenue=Sum('total_price'))
+    )
+    for row in orders:
+        rows[row['day']] = DailySalesRollup(date=row['day'], orders_count=row['n'], revenue=row['revenue'] or 0)
+    for row in User.objects.annotate(day=TruncDate('date_joined')).values('day').annotate(n=Count('id')):
+        rows.setdefault(row['day'], DailySalesRollup(date=row['day'])).new_users = row['n']
+    DailySalesRollup.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_promocode_code_normalized'),
+        ('orders', '0004_order_promo_code_discount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Дата')),
+                ('orders_count', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('new_users', models.PositiveIntegerField(default=0, verbose_name='Новых пользователей')),
+                ('zero_stock', models.PositiveIntegerField(default=0, verbose_name='Товаров с нулевым остатком')),
+                ('zero_stock_updated_at', models.DateTimeField(blank=True, null=True, verbose_name='Снимок остатков')),
+            ],
+            options={
+                'verbose_name': 'Продажи за день',
+                'verbose_name_plural': 'Продажи по дням',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 14:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_daily_sales_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('summary', 'Сводка и топ товаров'), ('export_csv', 'Выгрузка строк заказов (CSV)'), ('export_xlsx', 'Выгрузка строк заказов (XLSX)')], max_length=20, verbose_name='Тип')),
+                ('date_from', models.DateField(verbose_name='С даты')),
+                ('date_to', models.DateField(verbose_name='По дату')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Результат')),
+                ('file', models.FileField(blank=True, upload_to='reports/%Y/%m/', verbose_name='Файл')),
+                ('rows', models.PositiveIntegerField(default=0, verbose_name='Строк обработано')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершён')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Запустил')),
+            ],
+            options={
+                'verbose_name': 'Фоновый отчёт',
+                'verbose_name_plural': 'Фоновые отчёты',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
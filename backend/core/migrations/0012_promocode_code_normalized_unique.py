@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+
+def dedupe_code_normalized(apps, schema_editor):
+    """
+    Коды, совпадающие без учёта регистра и пробелов: остаётся один (активный, с меньшим id),
+    остальные переименовываются в «<код>-DUP<id>» и выключаются.
+    """
+    PromoCode = apps.get_model('core', 'PromoCode')
+    seen = set()
+    for promo in PromoCode.objects.order_by('-is_active', 'id').only('id', 'code', 'is_active'):
+        normalized = (promo.code or '').strip().upper()
+        if normalized not in seen:
+            seen.add(normalized)
+            PromoCode.objects.filter(pk=promo.pk).update(code_normalized=normalized)
+            continue
+        suffix = f'-DUP{promo.pk}'
+        code = (promo.code or '').strip()[:50 - len(suffix)] + suffix
+        seen.add(code.upper())
+        PromoCode.objects.filter(pk=promo.pk).update(code=code, code_normalized=code.upper(), is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_report_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_code_normalized, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='promocode',
+            name='code_normalized',
+            field=models.CharField(editable=False, max_length=50, unique=True, verbose_name='Нормализованный код'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from ckeditor.fields import RichTextField
 
@@ -134,6 +135,9 @@ class PromoCode(models.Model):
         ('fixed', 'Фиксированная сумма'),
     ]
     code = models.CharField('Код', max_length=50, unique=True)
+    # Код в верхнем регистре без пробелов по краям — поиск по индексу вместо code__iexact;
+    # уникален, чтобы «SALE» и «sale» не были двумя разными промокодами
+    code_normalized = models.CharField('Нормализованный код', max_length=50, unique=True, editable=False)
     discount_type = models.CharField('Тип скидки', max_length=10, choices=DISCOUNT_TYPE, default='percent')
     value = models.DecimalField('Значение', max_digits=10, decimal_places=2, help_text='Процент (0-100) или сумма в валюте')
     min_order_amount = models.DecimalField(
@@ -177,6 +181,24 @@ class PromoCode(models.Model):
     def __str__(self):
         return self.code
 
+    @staticmethod
+    def normalize_code(code):
+        return (code or '').strip().upper()
+
+    def clean(self):
+        super().clean()
+        # code_normalized не редактируется, и форма админки не проверяет его уникальность сама
+        normalized = self.normalize_code(self.code)
+        if PromoCode.objects.filter(code_normalized=normalized).exclude(pk=self.pk).exists():
+            raise ValidationError({'code': 'Промокод с таким кодом уже есть (без учёта регистра).'})
+
+    def save(self, *args, **kwargs):
+        self.code_normalized = self.normalize_code(self.code)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'code' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'code_normalized'}
+        super().save(*args, **kwargs)
+
 
 class Campaign(models.Model):
     """Кампания: скидка по периодам (даты), на категории или конкретные товары."""
@@ -190,6 +212,17 @@ class Campaign(models.Model):
     discount_type = models.CharField('Тип скидки', max_length=10, choices=DISCOUNT_TYPE, default='percent')
     value = models.DecimalField('Значение', max_digits=10, decimal_places=2, help_text='Процент (0-100) или сумма')
     is_active = models.BooleanField('Активна', default=True)
+    # Правила совмещения акций (см. core.pricing)
+    priority = models.IntegerField(
+        'Приоритет',
+        default=0,
+        help_text='Из подходящих кампаний первой применяется кампания с большим приоритетом.',
+    )
+    is_stackable = models.BooleanField(
+        'Суммируется с другими',
+        default=False,
+        help_text='Суммируемые кампании применяются к цене друг за другом; несуммируемая — только одна.',
+    )
     categories = models.ManyToManyField(
         'catalog.Category',
         blank=True,
@@ -236,3 +269,67 @@ class ContactRequest(models.Model):
 
     def __str__(self):
         return f'{self.subject} — {self.email}'
+
+
+class DailySalesRollup(models.Model):
+    """
+    Сводка продаж за день для главной админки и отчётов. Ведётся инкрементально
+    (core.rollups) при создании заказов, смене статуса и регистрации пользователей.
+    Отменённые заказы в выручку и число заказов не входят.
+    """
+    date = models.DateField('Дата', unique=True)
+    orders_count = models.PositiveIntegerField('Заказов', default=0)
+    revenue = models.DecimalField('Выручка', max_digits=14, decimal_places=2, default=0)
+    new_users = models.PositiveIntegerField('Новых пользователей', default=0)
+    # Снимок числа товаров с нулевым остатком (обновляется не чаще раза в несколько минут)
+    zero_stock = models.PositiveIntegerField('Товаров с нулевым остатком', default=0)
+    zero_stock_updated_at = models.DateTimeField('Снимок остатков', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Продажи за день'
+        verbose_name_plural = 'Продажи по дням'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f'{self.date}: {self.orders_count} заказов, {self.revenue}'
+
+
+class ReportJob(models.Model):
+    """Фоновое построение отчёта или выгрузки (core.reports); админка опрашивает статус."""
+    KIND_CHOICES = [
+        ('summary', 'Сводка и топ товаров'),
+        ('export_csv', 'Выгрузка строк заказов (CSV)'),
+        ('export_xlsx', 'Выгрузка строк заказов (XLSX)'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('done', 'Готово'),
+        ('failed', 'Ошибка'),
+    ]
+    kind = models.CharField('Тип', max_length=20, choices=KIND_CHOICES)
+    date_from = models.DateField('С даты')
+    date_to = models.DateField('По дату')
+    status = models.CharField('Статус', max_length=10, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField('Результат', null=True, blank=True)
+    file = models.FileField('Файл', upload_to='reports/%Y/%m/', blank=True)
+    rows = models.PositiveIntegerField('Строк обработано', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_by = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='report_jobs',
+        verbose_name='Запустил',
+    )
+    created_at = models.DateTimeField('Создан', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершён', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Фоновый отчёт'
+        verbose_name_plural = 'Фоновые отчёты'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.date_from} — {self.date_to}'
@@ -0,0 +1,193 @@
+"""
+Расчёт цен с учётом кампаний (акций по датам) и промокодов.
+
+Активные кампании загружаются один раз (PriceEngine.load: 3 запроса — кампании и их
+категории/товары), дальше цены для целой страницы каталога или корзины считаются
+в памяти по таблицам «товар → кампании» и «категория → кампании».
+
+Правила:
+- из подходящих кампаний первой берётся кампания с наибольшим приоритетом
+  (при равном приоритете — с большей скидкой для этой цены);
+- если она «суммируемая» (is_stackable), к цене последовательно применяются и остальные
+  суммируемые кампании в порядке приоритета; несуммируемая кампания применяется одна;
+- промокод применяется к сумме корзины уже после кампаний, только к подходящим строкам;
+- вся арифметика в Decimal, цена округляется до копеек и не бывает отрицательной.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.utils import timezone
+
+from .models import Campaign
+
+CENT = Decimal('0.01')
+HUNDRED = Decimal('100')
+ZERO = Decimal('0.00')
+
+
+def money(value):
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def apply_discount(price, discount_type, value):
+    """Цена после одной скидки (процент или фиксированная сумма), не ниже нуля."""
+    if discount_type == 'percent':
+        discounted = price - price * min(Decimal(value), HUNDRED) / HUNDRED
+    else:
+        discounted = price - Decimal(value)
+    return max(money(discounted), ZERO)
+
+
+@dataclass
+class PriceQuote:
+    """Цена одного товара: базовая, итоговая и применённые кампании."""
+    base: Decimal
+    final: Decimal
+    campaign_ids: list = field(default_factory=list)
+
+    @property
+    def discount(self):
+        return self.base - self.final
+
+
+@dataclass
+class CartLineQuote:
+    product_id: int
+    quantity: int
+    unit: PriceQuote
+    promo_discount: Decimal = ZERO
+
+    @property
+    def total(self):
+        return self.unit.final * self.quantity - self.promo_discount
+
+
+@dataclass
+class CartQuote:
+    """Расчёт корзины: строки, сумма по базовым ценам, скидки кампаний и промокода, итог."""
+    lines: list
+    subtotal: Decimal
+    campaign_discount: Decimal
+    promo_discount: Decimal
+    promo_code: object = None
+
+    @property
+    def total(self):
+        return self.subtotal - self.campaign_discount - self.promo_discount
+
+
+class PriceEngine:
+    """Снимок активных кампаний с таблицами поиска; создаётся через PriceEngine.load()."""
+
+    def __init__(self, campaigns):
+        self.campaigns = sorted(campaigns, key=lambda c: (-c.priority, c.pk))
+        self.by_product = {}
+        self.by_category = {}
+        self.global_campaigns = []
+        for campaign in self.campaigns:
+            product_ids = [p.pk for p in campaign.products.all()]
+            category_ids = [c.pk for c in campaign.categories.all()]
+            if not product_ids and not category_ids:
+                self.global_campaigns.append(campaign)
+            for pk in product_ids:
+                self.by_product.setdefault(pk, []).append(campaign)
+            for pk in category_ids:
+                self.by_category.setdefault(pk, []).append(campaign)
+
+    @classmethod
+    def load(cls, now=None):
+        now = now or timezone.now()
+        campaigns = (
+            Campaign.objects.filter(is_active=True, start_date__lte=now, end_date__gte=now)
+            .prefetch_related('categories', 'products')
+        )
+        return cls(list(campaigns))
+
+    @classmethod
+    async def aload(cls, now=None):
+        """load() для async-view: кампании через асинхронный ORM."""
+        now = now or timezone.now()
+        campaigns = (
+            Campaign.objects.filter(is_active=True, start_date__lte=now, end_date__gte=now)
+            .prefetch_related('categories', 'products')
+        )
+        return cls([c async for c in campaigns])
+
+    def _applicable(self, product_id, category_id):
+        seen, result = set(), []
+        for campaign in (
+            self.by_product.get(product_id, [])
+            + self.by_category.get(category_id, [])
+            + self.global_campaigns
+        ):
+            if campaign.pk not in seen:
+                seen.add(campaign.pk)
+                result.append(campaign)
+        return result
+
+    def quote(self, product_id, category_id, price):
+        """Итоговая цена товара по id, категории и базовой цене (без обращений к БД)."""
+        base = money(price)
+        candidates = self._applicable(product_id, category_id)
+        if not candidates:
+            return PriceQuote(base, base)
+        candidates.sort(key=lambda c: (-c.priority, apply_discount(base, c.discount_type, c.value), c.pk))
+        first = candidates[0]
+        if not first.is_stackable:
+            return PriceQuote(base, apply_discount(base, first.discount_type, first.value), [first.pk])
+        final, applied = base, []
+        for campaign in candidates:
+            if campaign.is_stackable:
+                final = apply_discount(final, campaign.discount_type, campaign.value)
+                applied.append(campaign.pk)
+        return PriceQuote(base, final, applied)
+
+    def price(self, product):
+        return self.quote(product.pk, product.category_id, product.price)
+
+    def price_many(self, products):
+        """{product_id: PriceQuote} для страницы каталога — один проход в памяти."""
+        return {product.pk: self.price(product) for product in products}
+
+    def price_cart(self, lines, promo=None):
+        """
+        Расчёт корзины. lines — пары (product, quantity); promo — PromoCode или None
+        (категории и товары промокода лучше загрузить заранее через prefetch_related).
+        Если сумма после кампаний меньше min_order_amount промокода, промокод не применяется.
+        """
+        quotes = [CartLineQuote(product.pk, quantity, self.price(product)) for product, quantity in lines]
+        subtotal = sum((q.unit.base * q.quantity for q in quotes), ZERO)
+        after_campaigns = sum((q.unit.final * q.quantity for q in quotes), ZERO)
+        promo_discount = ZERO
+        if promo is not None and (promo.min_order_amount is None or after_campaigns >= promo.min_order_amount):
+            categories = {c.pk for c in promo.categories.all()}
+            products = {p.pk for p in promo.products.all()}
+            category_of = {product.pk: product.category_id for product, _ in lines}
+            eligible = [
+                q for q in quotes
+                if (not categories and not products)
+                or q.product_id in products
+                or category_of[q.product_id] in categories
+            ]
+            promo_discount = self._promo_discount(promo, eligible)
+        else:
+            promo = None
+        return CartQuote(quotes, subtotal, subtotal - after_campaigns, promo_discount, promo)
+
+    @staticmethod
+    def _promo_discount(promo, eligible):
+        """Скидка промокода, распределённая по подходящим строкам (нужно для цен в заказе)."""
+        eligible_total = sum((q.unit.final * q.quantity for q in eligible), ZERO)
+        if not eligible_total:
+            return ZERO
+        discount = eligible_total - apply_discount(eligible_total, promo.discount_type, promo.value)
+        # Распределяем пропорционально сумме строки, остаток от округления — на последнюю строку
+        remaining = discount
+        for i, q in enumerate(eligible):
+            if i == len(eligible) - 1:
+                share = remaining
+            else:
+                share = money(discount * q.unit.final * q.quantity / eligible_total)
+            q.promo_discount = share
+            remaining -= share
+        return discount
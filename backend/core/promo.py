@@ -0,0 +1,85 @@
+"""
+Погашение промокодов без гонок.
+Код ищется по нормализованному индексированному полю, использование занимается
+одним условным UPDATE (used_count < max_uses), поэтому при параллельных заказах
+лимит не превышается. Если заказ откатывается, откатывается и UPDATE — вызывать
+claim_promo внутри той же транзакции, что и создание заказа. Отмена заказа возвращает
+использование (order_saved, из сигнала сохранения заказа).
+"""
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import PromoCode
+
+CANCELLED = 'cancelled'
+
+
+class PromoCodeError(Exception):
+    """Промокод нельзя применить; message уходит клиенту, status — HTTP-код ответа."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _valid_now(now):
+    return (
+        Q(is_active=True)
+        & (Q(valid_from__isnull=True) | Q(valid_from__lte=now))
+        & (Q(valid_until__isnull=True) | Q(valid_until__gte=now))
+    )
+
+
+def find_promo(code):
+    """Действующий промокод по коду (без учёта регистра) или None. Категории и товары подгружены."""
+    normalized = PromoCode.normalize_code(code)
+    if not normalized:
+        return None
+    now = timezone.now()
+    return (
+        PromoCode.objects.filter(_valid_now(now), code_normalized=normalized)
+        .filter(Q(max_uses__isnull=True) | Q(used_count__lt=F('max_uses')))
+        .prefetch_related('categories', 'products')
+        .first()
+    )
+
+
+def claim_promo(promo):
+    """Занимает одно использование промокода. Бросает PromoCodeError, если лимит исчерпан."""
+    claimed = (
+        PromoCode.objects.filter(_valid_now(timezone.now()), pk=promo.pk)
+        .filter(Q(max_uses__isnull=True) | Q(used_count__lt=F('max_uses')))
+        .update(used_count=F('used_count') + 1)
+    )
+    if not claimed:
+        raise PromoCodeError('Промокод больше недействителен', status=409)
+
+
+def release_promo(promo_id):
+    """Возвращает использование промокода: заказ с ним отменён."""
+    PromoCode.objects.filter(pk=promo_id, used_count__gt=0).update(used_count=F('used_count') - 1)
+
+
+def promo_available(promo_id):
+    """Можно ли сейчас занять использование (без блокировки) — для проверки формы до сохранения."""
+    return PromoCode.objects.filter(
+        _valid_now(timezone.now()), Q(max_uses__isnull=True) | Q(used_count__lt=F('max_uses')), pk=promo_id,
+    ).exists()
+
+
+def order_saved(order, created=False):
+    """
+    Смена статуса заказа с промокодом: отмена возвращает использование, возврат из отмены
+    (только в админке — API умеет лишь отменять) занимает его снова через claim_promo: если лимит
+    исчерпан, PromoCodeError откатывает сохранение. Прежний статус берётся из order._sales_state
+    (orders.Order.remember_sales_state); вызывать до core.rollups.order_saved.
+    """
+    state = getattr(order, '_sales_state', None)
+    if created or state is None or order.promo_code_id is None:
+        return
+    was_cancelled = state[1] == CANCELLED
+    if order.status == CANCELLED and not was_cancelled:
+        release_promo(order.promo_code_id)
+    elif was_cancelled and order.status != CANCELLED:
+        claim_promo(order.promo_code)
@@ -0,0 +1,70 @@
+"""
+Планы «горячих» запросов через EXPLAIN: каждый должен идти по индексу, а не полным просмотром
+таблицы. Проверяются тестом core/tests.py и командой check_query_plans.
+
+На PostgreSQL перед EXPLAIN выключаются seq scan и bitmap scan: на маленькой (тестовой) базе
+планировщик и так выбрал бы их, а нам важно, что подходящий индекс вообще есть.
+"""
+import re
+
+from django.db import connection, transaction
+
+
+def hot_queries():
+    """
+    (название, таблица, queryset, нужен ли порядок из индекса без сортировки). Для каталога
+    сортировка не проверяется: после соединения с категорией/брендом PostgreSQL сортирует
+    строки одной категории, и это дёшево — важно, что нет просмотра всех товаров.
+    """
+    from cart.models import CartItem
+    from catalog.models import Product, Review, StockMovement
+    from orders.models import Order
+
+    return [
+        ('История заказов пользователя', 'orders_order',
+         Order.objects.filter(user_id=1).order_by('-created_at', '-id'), True),
+        ('Заказы по статусу', 'orders_order',
+         Order.objects.filter(status='pending'), False),
+        ('Каталог: категория', 'catalog_product',
+         Product.objects.filter(is_published=True, category__slug='x').order_by('id'), False),
+        ('Каталог: бренд', 'catalog_product',
+         Product.objects.filter(is_published=True, brand__slug='x').order_by('id'), False),
+        ('Одобренные отзывы товара', 'catalog_review',
+         Review.objects.filter(product_id=1, is_approved=True).order_by(), False),
+        ('Движения по складу товара', 'catalog_stockmovement',
+         StockMovement.objects.filter(product_id=1).order_by('-created_at'), True),
+        ('Строка корзины по товару', 'cart_cartitem',
+         CartItem.objects.filter(cart_id=1, product_id=1), False),
+    ]
+
+
+def full_scan(plan, table):
+    """Есть ли в плане полный просмотр таблицы (SQLite: SCAN, PostgreSQL: Seq Scan)."""
+    pattern = rf'\bSCAN {table}\b' if connection.vendor == 'sqlite' else rf'Seq Scan on {table}\b'
+    return re.search(pattern, plan) is not None
+
+
+def sorts(plan):
+    """Сортирует ли план строки отдельно (SQLite: TEMP B-TREE FOR ORDER BY, PostgreSQL: узел Sort)."""
+    if connection.vendor == 'sqlite':
+        return 'TEMP B-TREE FOR' in plan and 'ORDER BY' in plan
+    return re.search(r'^\s*(->\s*)?(Incremental )?Sort\b', plan, re.MULTILINE) is not None
+
+
+def check(queries):
+    """(название, план, список проблем) для каждого запроса; пустой список — план в порядке."""
+    results = []
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for option in ('enable_seqscan', 'enable_bitmapscan'):
+                    cursor.execute(f'SET LOCAL {option} = off')
+        for name, table, queryset, ordered in queries:
+            plan = queryset.explain()
+            problems = []
+            if full_scan(plan, table):
+                problems.append('полный просмотр таблицы')
+            if ordered and sorts(plan):
+                problems.append('сортировка вне индекса')
+            results.append((name, plan, problems))
+    return results
@@ -0,0 +1,257 @@
+"""
+Отчёты по продажам за период: сводка, топ товаров, выгрузка строк заказов, фоновые задания.
+
+- Сводка (заказы, выручка, новые пользователи) читается из дневной сводки (core.rollups):
+  одна строка на день, сколько бы ни было заказов.
+- Топ товаров по количеству или выручке считается в SQL (GROUP BY + ORDER BY + LIMIT);
+  период задаётся диапазоном по created_at, чтобы работал индекс (без __date).
+- Выгрузка всех строк заказов идёт генератором: период режется на окна (по умолчанию месяц),
+  каждое окно читается .iterator() пачками. Память не зависит от размера периода.
+- Долгие отчёты запускаются как ReportJob в отдельном потоке; админка опрашивает статус.
+- Данные отчётов читаются с реплики (shop.db_routing), если она настроена.
+"""
+import csv
+import logging
+import tempfile
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from shop.db_routing import use_replica
+
+from .models import DailySalesRollup, ReportJob
+from .rollups import EXCLUDED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+TOP_LIMIT = 20
+MAX_RANGE_DAYS = 366 * 5
+# Периоды длиннее этого (в днях) админка строит в фоне
+SYNC_MAX_DAYS = getattr(settings, 'REPORTS_SYNC_MAX_DAYS', 93)
+WINDOW_DAYS = 31
+CHUNK_SIZE = 2000
+PROGRESS_EVERY = 5000
+
+ORDER_LINE_HEADER = (
+    'Заказ', 'Дата', 'Статус', 'Покупатель', 'Товар (id)', 'Товар', 'Количество', 'Цена', 'Сумма',
+)
+
+
+class ReportError(ValueError):
+    """Неверные параметры отчёта (текст показывается пользователю)."""
+
+
+def parse_range(date_from, date_to):
+    """Даты периода из строк ГГГГ-ММ-ДД; обе границы включительно."""
+    if not date_from or not date_to:
+        raise ReportError('Укажите начало и конец периода.')
+    try:
+        d_from, d_to = parse_date(str(date_from)), parse_date(str(date_to))
+    except ValueError:
+        d_from = d_to = None
+    if d_from is None or d_to is None:
+        raise ReportError('Даты должны быть в формате ГГГГ-ММ-ДД.')
+    if d_from > d_to:
+        raise ReportError('Начало периода позже конца.')
+    if (d_to - d_from).days > MAX_RANGE_DAYS:
+        raise ReportError(f'Период не может быть длиннее {MAX_RANGE_DAYS} дней.')
+    return d_from, d_to
+
+
+def range_days(d_from, d_to):
+    return (d_to - d_from).days + 1
+
+
+def _bounds(d_from, d_to):
+    """Границы периода в виде aware datetime [начало d_from, начало дня после d_to)."""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(d_from, time.min), tz)
+    end = timezone.make_aware(datetime.combine(d_to + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def sales_summary(d_from, d_to):
+    """Заказы, выручка и новые пользователи за период — по строкам дневной сводки."""
+    totals = DailySalesRollup.objects.filter(date__gte=d_from, date__lte=d_to).aggregate(
+        orders=Sum('orders_count'), revenue=Sum('revenue'), users=Sum('new_users'),
+    )
+    return {
+        'orders_count': totals['orders'] or 0,
+        'revenue': totals['revenue'] or Decimal('0'),
+        'new_users': totals['users'] or 0,
+    }
+
+
+def _order_items(d_from, d_to):
+    from orders.models import OrderItem
+    start, end = _bounds(d_from, d_to)
+    return OrderItem.objects.filter(
+        order__created_at__gte=start, order__created_at__lt=end,
+    ).exclude(order__status__in=EXCLUDED_STATUSES)
+
+
+def top_products(d_from, d_to, limit=TOP_LIMIT, by='quantity'):
+    """Топ товаров за период (by: 'quantity' или 'revenue') — один сгруппированный запрос."""
+    if by not in ('quantity', 'revenue'):
+        raise ReportError('Сортировка топа: quantity или revenue.')
+    key = 'total_qty' if by == 'quantity' else 'total_revenue'
+    return list(
+        _order_items(d_from, d_to)
+        .values('product_id', 'product__name')
+        .annotate(total_qty=Sum('quantity'), total_revenue=Sum(F('price') * F('quantity')))
+        .order_by(f'-{key}', 'product_id')[:limit]
+    )
+
+
+def iter_windows(d_from, d_to, days=WINDOW_DAYS):
+    """Пары дат (начало, конец) по days дней, покрывающие период."""
+    start = d_from
+    while start <= d_to:
+        end = min(start + timedelta(days=days - 1), d_to)
+        yield start, end
+        start = end + timedelta(days=1)
+
+
+def iter_order_lines(d_from, d_to, chunk_size=CHUNK_SIZE):
+    """Строки заказов за период (кортежи в порядке ORDER_LINE_HEADER), по окнам и пачками."""
+    for w_from, w_to in iter_windows(d_from, d_to):
+        rows = (
+            _order_items(w_from, w_to)
+            .order_by('order__created_at', 'order_id', 'id')
+            .values_list(
+                'order_id', 'order__created_at', 'order__status', 'order__user__username',
+                'product_id', 'product__name', 'quantity', 'price',
+            )
+        )
+        for order_id, created_at, status, username, product_id, name, quantity, price in rows.iterator(chunk_size):
+            yield (
+                order_id,
+                timezone.localtime(created_at).strftime('%Y-%m-%d %H:%M'),
+                status,
+                username,
+                product_id,
+                name,
+                quantity,
+                price,
+                price * quantity,
+            )
+
+
+class _Echo:
+    """Буфер-заглушка для csv.writer: writerow сразу возвращает готовую строку."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, header=ORDER_LINE_HEADER):
+    """Строки CSV для StreamingHttpResponse (с BOM, чтобы Excel понял UTF-8)."""
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv(rows, fileobj, header=ORDER_LINE_HEADER):
+    """Пишет CSV в бинарный файл; возвращает число строк данных."""
+    count = -1
+    for count, line in enumerate(iter_csv(rows, header)):
+        fileobj.write(line.encode('utf-8'))
+    return count
+
+
+def write_xlsx(rows, fileobj, header=ORDER_LINE_HEADER, title='Строки заказов'):
+    """
+    Пишет XLSX в режиме write_only (строки не копятся в памяти); возвращает число строк данных.
+    Нужен пакет openpyxl.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ReportError('Для выгрузки в XLSX установите пакет openpyxl.')
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append(header)
+    count = 0
+    for row in rows:
+        sheet.append(row)
+        count += 1
+    workbook.save(fileobj)
+    return count
+
+
+def export_filename(d_from, d_to, fmt):
+    return f'orders_{d_from:%Y%m%d}_{d_to:%Y%m%d}.{fmt}'
+
+
+# --- Фоновые задания ---
+
+def _jsonable(rows):
+    return [{k: str(v) if isinstance(v, Decimal) else v for k, v in row.items()} for row in rows]
+
+
+def _progress(job_id, rows):
+    """Счётчик строк для опроса статуса: обновляется каждые PROGRESS_EVERY строк."""
+    for count, row in enumerate(rows, 1):
+        if count % PROGRESS_EVERY == 0:
+            ReportJob.objects.filter(pk=job_id).update(rows=count)
+        yield row
+
+
+def run_job(job_id):
+    """Выполняет задание (в текущем потоке): результат — в result или файл в job.file."""
+    job = ReportJob.objects.get(pk=job_id)
+    ReportJob.objects.filter(pk=job.pk).update(status='running')
+    try:
+        # Чтение данных отчёта — с реплики (если настроена), запись задания — в основную базу
+        with use_replica():
+            if job.kind == 'summary':
+                summary = sales_summary(job.date_from, job.date_to)
+                job.result = {
+                    'orders_count': summary['orders_count'],
+                    'revenue': str(summary['revenue']),
+                    'new_users': summary['new_users'],
+                    'top_by_quantity': _jsonable(top_products(job.date_from, job.date_to, by='quantity')),
+                    'top_by_revenue': _jsonable(top_products(job.date_from, job.date_to, by='revenue')),
+                }
+            else:
+                fmt = 'xlsx' if job.kind == 'export_xlsx' else 'csv'
+                write = write_xlsx if fmt == 'xlsx' else write_csv
+                with tempfile.TemporaryFile() as tmp:
+                    job.rows = write(_progress(job.pk, iter_order_lines(job.date_from, job.date_to)), tmp)
+                    tmp.seek(0)
+                    job.file.save(export_filename(job.date_from, job.date_to, fmt), File(tmp), save=False)
+        job.status = 'done'
+    except Exception as exc:
+        logger.exception('Отчёт #%s завершился ошибкой', job.pk)
+        job.status = 'failed'
+        job.error = str(exc) or exc.__class__.__name__
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'file', 'rows', 'error', 'finished_at'])
+    return job
+
+
+def _run_in_thread(job_id):
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def start_job(kind, d_from, d_to, user=None):
+    """Создаёт задание и запускает его в фоновом потоке после коммита транзакции."""
+    job = ReportJob.objects.create(
+        kind=kind, date_from=d_from, date_to=d_to,
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    thread = threading.Thread(target=_run_in_thread, args=(job.pk,), name=f'report-job-{job.pk}', daemon=True)
+    transaction.on_commit(thread.start)
+    return job
@@ -0,0 +1,160 @@
+"""
+Дневные сводки продаж (DailySalesRollup): ведение и чтение.
+
+Каждое изменение заказа превращается в разницу «было / стало» для его дня
+и применяется одним UPDATE с F()-выражениями. Поэтому главная админки читает
+несколько строк сводки, а не агрегирует всю таблицу заказов.
+
+Разница применяется после коммита (transaction.on_commit): строка дня общая для всех
+заказов, и блокировка на ней не должна держаться до конца транзакции оформления.
+Откаченный заказ в сводку не попадает; сбой записи после коммита только логируется —
+расхождение исправляет rebuild_sales_rollup.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailySalesRollup
+
+ZERO_STOCK_REFRESH = timedelta(minutes=5)
+EXCLUDED_STATUSES = ('cancelled',)
+
+
+def _contribution(status, total):
+    if status in EXCLUDED_STATUSES:
+        return 0, Decimal('0')
+    return 1, total or Decimal('0')
+
+
+def _bump(day, orders=0, revenue=Decimal('0'), new_users=0):
+    if not orders and not revenue and not new_users:
+        return
+    transaction.on_commit(partial(_apply, day, orders, revenue, new_users), robust=True)
+
+
+def _apply(day, orders, revenue, new_users):
+    delta = {
+        'orders_count': F('orders_count') + orders,
+        'revenue': F('revenue') + revenue,
+        'new_users': F('new_users') + new_users,
+    }
+    # Строка дня обычно уже есть: один UPDATE, get_or_create — только для первой записи за день
+    if not DailySalesRollup.objects.filter(date=day).update(**delta):
+        DailySalesRollup.objects.get_or_create(date=day)
+        DailySalesRollup.objects.filter(date=day).update(**delta)
+
+
+def order_saved(order, created=False):
+    """Учитывает создание заказа или смену его статуса/суммы."""
+    state = getattr(order, '_sales_state', None)
+    new_day = timezone.localdate(order.created_at)
+    new_orders, new_revenue = _contribution(order.status, order.total_price)
+    if created or state is None:
+        if not created:
+            # Прежнее состояние неизвестно (заказ загружен не целиком) — пересчитываем день
+            transaction.on_commit(partial(rebuild_day, new_day), robust=True)
+            order.remember_sales_state()
+            return
+        _bump(new_day, new_orders, new_revenue)
+    else:
+        old_created_at, old_status, old_total = state
+        old_orders, old_revenue = _contribution(old_status, old_total)
+        old_day = timezone.localdate(old_created_at)
+        if old_day == new_day:
+            _bump(new_day, new_orders - old_orders, new_revenue - old_revenue)
+        else:
+            _bump(old_day, -old_orders, -old_revenue)
+            _bump(new_day, new_orders, new_revenue)
+    order.remember_sales_state()
+
+
+def order_deleted(order):
+    orders, revenue = _contribution(order.status, order.total_price)
+    _bump(timezone.localdate(order.created_at), -orders, -revenue)
+
+
+def user_created(user):
+    _bump(timezone.localdate(user.date_joined), new_users=1)
+
+
+def _orders_by_day(queryset):
+    return (
+        queryset.exclude(status__in=EXCLUDED_STATUSES)
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(orders=Count('id'), revenue=Sum('total_price'))
+    )
+
+
+def rebuild_day(day):
+    """Пересчитывает заказы и выручку одного дня по таблице заказов."""
+    from orders.models import Order
+    totals = _orders_by_day(Order.objects.filter(created_at__date=day)).first()
+    DailySalesRollup.objects.get_or_create(date=day)
+    DailySalesRollup.objects.filter(date=day).update(
+        orders_count=totals['orders'] if totals else 0,
+        revenue=(totals['revenue'] or 0) if totals else 0,
+    )
+
+
+def count_zero_stock():
+    from catalog.models import Product
+    return Product.objects.filter(stock=0).count()
+
+
+def rebuild_all():
+    """
+    Полное перестроение сводки: по одному сгруппированному запросу на заказы и пользователей.
+    Возвращает число дней в сводке.
+    """
+    from orders.models import Order
+    User = get_user_model()
+    rows = {}
+    for row in _orders_by_day(Order.objects.all()):
+        rows[row['day']] = DailySalesRollup(date=row['day'], orders_count=row['orders'], revenue=row['revenue'] or 0)
+    users = User.objects.annotate(day=TruncDate('date_joined')).values('day').annotate(n=Count('id'))
+    for row in users:
+        rows.setdefault(row['day'], DailySalesRollup(date=row['day'])).new_users = row['n']
+    today = timezone.localdate()
+    snapshot = rows.setdefault(today, DailySalesRollup(date=today))
+    snapshot.zero_stock = count_zero_stock()
+    snapshot.zero_stock_updated_at = timezone.now()
+    with transaction.atomic():
+        DailySalesRollup.objects.all().delete()
+        DailySalesRollup.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
+
+
+def dashboard_stats(today=None):
+    """
+    Показатели главной админки: заказы и выручка за сегодня и за неделю, новые пользователи
+    за неделю, товары с нулевым остатком. Читает не более 8 строк сводки.
+    """
+    today = today or timezone.localdate()
+    week_ago = today - timedelta(days=7)
+    rows = {r.date: r for r in DailySalesRollup.objects.filter(date__gte=week_ago, date__lte=today)}
+    today_row = rows.get(today)
+
+    now = timezone.now()
+    if today_row is None or today_row.zero_stock_updated_at is None or \
+            now - today_row.zero_stock_updated_at > ZERO_STOCK_REFRESH:
+        zero_stock = count_zero_stock()
+        DailySalesRollup.objects.get_or_create(date=today)
+        DailySalesRollup.objects.filter(date=today).update(zero_stock=zero_stock, zero_stock_updated_at=now)
+    else:
+        zero_stock = today_row.zero_stock
+
+    return {
+        'orders_today': today_row.orders_count if today_row else 0,
+        'orders_week': sum(r.orders_count for r in rows.values()),
+        'revenue_today': today_row.revenue if today_row else 0,
+        'revenue_week': sum((r.revenue for r in rows.values()), Decimal('0')),
+        'users_week': sum(r.new_users for r in rows.values()),
+        'zero_stock': zero_stock,
+    }
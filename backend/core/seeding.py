@@ -0,0 +1,377 @@
+"""
+Синтетические данные для нагрузочных тестов и бенчмарков: каталог заданного размера,
+пользователи, корзины, заказы со строками, отзывы и движения по складу.
+
+- Детерминированно: одинаковые размеры и seed дают одинаковые данные.
+- Строки генерируются генераторами и пишутся bulk_create пачками по chunk_size
+  в отдельных транзакциях; в памяти держатся только id и цены товаров (array), а не объекты.
+- Даты заказов, отзывов и регистраций разнесены на days дней назад — отчётам и дневной
+  сводке есть что считать. bulk_create не вызывает сигналы: рейтинги товаров считаются заранее
+  по тем же отзывам, а дневная сводка продаж, поисковый индекс и версия каталога пересчитываются в конце.
+- Все объекты помечены префиксом PREFIX (slug, username). Повторно в ту же базу не генерируется:
+  для нового набора — чистая база (manage.py flush или тестовая база бенчмарка).
+
+Размеры по умолчанию — SCALES; seed(scale='large') — около миллиона строк.
+"""
+import random
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import reset_queries, transaction
+from django.utils import timezone
+
+PREFIX = 'seed'
+PASSWORD = 'seed-password'
+CHUNK_SIZE = 5000
+
+SCALES = {
+    'tiny': {'categories': 5, 'brands': 8, 'products': 200, 'users': 50, 'carts': 20,
+             'orders': 300, 'reviews': 300},
+    'small': {'categories': 12, 'brands': 20, 'products': 2000, 'users': 500, 'carts': 200,
+              'orders': 3000, 'reviews': 3000},
+    'medium': {'categories': 25, 'brands': 40, 'products': 20000, 'users': 5000, 'carts': 2000,
+               'orders': 30000, 'reviews': 30000},
+    'large': {'categories': 40, 'brands': 60, 'products': 150000, 'users': 30000, 'carts': 10000,
+              'orders': 150000, 'reviews': 150000},
+}
+
+CATEGORY_NAMES = [
+    'Автошампуни', 'Активная пена', 'Полироли', 'Воски', 'Керамические покрытия', 'Очистители дисков',
+    'Очистители салона', 'Средства для кожи', 'Средства для стёкол', 'Чернители шин', 'Микрофибра',
+    'Аппликаторы', 'Щётки', 'Полировальные круги', 'Глина', 'Обезжириватели', 'Антидождь',
+    'Ароматизаторы', 'Средства для двигателя', 'Распылители',
+]
+BRAND_NAMES = [
+    'Koch Chemie', 'Sonax', "Meguiar's", 'Autoglym', 'CarPro', 'Gyeon', 'Chemical Guys', '3M',
+    'Grass', 'Shine Systems', 'LeraTon', 'Turtle Wax', 'Liqui Moly', 'Menzerna', 'Rupes', 'Soft99',
+]
+PRODUCT_WORDS = [
+    'концентрат', 'шампунь', 'полироль', 'очиститель', 'защита', 'воск', 'покрытие', 'пена',
+    'спрей', 'гель', 'паста', 'кондиционер', 'нейтрализатор', 'обезжириватель', 'блеск',
+]
+PRODUCT_QUALIFIERS = ['Pro', 'Premium', 'Ultra', 'Max', 'Light', 'Nano', 'Ceramic', 'Gold', 'Active', 'Quick']
+VOLUMES = ['250 мл', '500 мл', '750 мл', '1 л', '5 л', '20 л']
+REVIEW_TEXTS = ['Отличное средство', 'Нормально, но дороговато', 'Не понравилось', 'Беру не первый раз', '']
+ORDER_STATUSES = [('delivered', 55), ('shipped', 10), ('processing', 10), ('pending', 15), ('cancelled', 10)]
+
+
+def scale_options(scale='small', **overrides):
+    """
+    Размеры набора: пресет scale, поверх — явные значения (None игнорируются).
+    ValueError — неизвестный пресет, отрицательный размер или товары без категорий/брендов.
+    Корзины и заказы без пользователей или товаров не создаются.
+    """
+    if scale not in SCALES:
+        raise ValueError(f'Неизвестный размер {scale!r}: {", ".join(SCALES)}')
+    options = dict(SCALES[scale])
+    options.update({k: v for k, v in overrides.items() if v is not None})
+    negative = [name for name, value in options.items() if value < 0]
+    if negative:
+        raise ValueError(f'Размеры не могут быть отрицательными: {", ".join(negative)}')
+    if options['products'] and not (options['categories'] and options['brands']):
+        raise ValueError('Для товаров нужны хотя бы одна категория и один бренд')
+    return options
+
+
+def _average(total, count):
+    if not count:
+        return Decimal('0.00')
+    return (Decimal(total) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Временно отключает auto_now_add у полей, чтобы bulk_create записал заданные даты."""
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field, _ in saved:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in saved:
+            field.auto_now_add = value
+
+
+class Seeder:
+    """
+    Генерация набора данных. run() возвращает {таблица: строк}; progress(table, rows, seconds)
+    вызывается после каждой пачки.
+    """
+
+    def __init__(self, scale='small', seed=1, days=365, chunk_size=CHUNK_SIZE, progress=None,
+                 search_index=True, **sizes):
+        self.sizes = scale_options(scale, **sizes)
+        self.rnd = random.Random(seed)
+        # Отзывы — отдельный генератор: первый проход считает рейтинги товаров до их вставки,
+        # второй (с тем же зерном) пишет сами отзывы
+        self.review_seed = seed + 1
+        self.days = days
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.search_index = search_index
+        self.now = timezone.now()
+        self.counts = {}
+
+    def _moment(self):
+        return self.now - timedelta(seconds=self.rnd.randrange(self.days * 86400))
+
+    def _insert(self, model, rows, table=None):
+        """bulk_create пачками, каждая в своей транзакции."""
+        table = table or model._meta.model_name
+        started = time.perf_counter()
+        for chunk in chunked(rows, self.chunk_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, batch_size=self.chunk_size)
+            reset_queries()  # при DEBUG=True журнал запросов держал бы все многомегабайтные INSERT
+            self.counts[table] = self.counts.get(table, 0) + len(chunk)
+            if self.progress:
+                self.progress(table, self.counts[table], time.perf_counter() - started)
+
+    def run(self):
+        from accounts.models import User
+        from cart.models import Cart
+        from catalog.models import Review, StockMovement
+        from orders.models import Order
+
+        with explicit_dates(Order._meta.get_field('created_at'), Review._meta.get_field('created_at'),
+                            StockMovement._meta.get_field('created_at'), Cart._meta.get_field('created_at')):
+            categories, brands = self._catalog_dictionaries()
+            self._products(categories, brands)
+            self._stock_movements()
+            users = self._users(User)
+            self._carts(users)
+            self._orders(users)
+            self._reviews(users)
+        self._rebuild_derived()
+        return self.counts
+
+    def _catalog_dictionaries(self):
+        from catalog.models import Brand, Category
+
+        categories = [
+            Category(name=self._numbered(CATEGORY_NAMES, i), slug=f'{PREFIX}-category-{i}')
+            for i in range(self.sizes['categories'])
+        ]
+        brands = [
+            Brand(name=self._numbered(BRAND_NAMES, i), slug=f'{PREFIX}-brand-{i}')
+            for i in range(self.sizes['brands'])
+        ]
+        self._insert(Category, categories)
+        self._insert(Brand, brands)
+        category_ids = list(
+            Category.objects.filter(slug__startswith=f'{PREFIX}-').order_by('id').values_list('id', flat=True)
+        )
+        brand_ids = list(Brand.objects.filter(slug__startswith=f'{PREFIX}-').order_by('id').values_list('id', flat=True))
+        return category_ids, brand_ids
+
+    @staticmethod
+    def _numbered(names, i):
+        name = names[i % len(names)]
+        return name if i < len(names) else f'{name} {i // len(names) + 1}'
+
+    def _products(self, category_ids, brand_ids):
+        from catalog.models import Product
+
+        rnd = self.rnd
+        rating_sums, rating_counts = self._review_totals()
+        # Распределение товаров по категориям и брендам неравномерное, как в реальном каталоге
+        category_weights = [1 / (i + 1) for i in range(len(category_ids))]
+        brand_weights = [1 / (i + 1) ** 0.7 for i in range(len(brand_ids))]
+
+        def rows():
+            for i in range(self.sizes['products']):
+                word = rnd.choice(PRODUCT_WORDS)
+                name = f'{word.capitalize()} {rnd.choice(PRODUCT_QUALIFIERS)} {rnd.choice(VOLUMES)} #{i}'
+                yield Product(
+                    category_id=rnd.choices(category_ids, category_weights)[0],
+                    brand_id=rnd.choices(brand_ids, brand_weights)[0],
+                    name=name,
+                    slug=f'{PREFIX}-product-{i}',
+                    description=f'{name}. {word.capitalize()} для ухода за автомобилем, '
+                                f'{rnd.choice(PRODUCT_WORDS)} и {rnd.choice(PRODUCT_WORDS)}.',
+                    price=Decimal(rnd.randrange(300, 30000)) / 100,
+                    stock=rnd.choice((0, 0, 3, 10, 25, 50, 100, 250)),
+                    is_published=rnd.random() > 0.03,
+                    rating_sum=rating_sums[i],
+                    reviews_count=rating_counts[i],
+                    rating=_average(rating_sums[i], rating_counts[i]),
+                )
+
+        self._insert(Product, rows())
+        # Для строк заказов и корзин нужны только id и цены — компактные массивы вместо объектов
+        self.product_ids, self.product_prices = array('q'), array('q')
+        queryset = Product.objects.filter(slug__startswith=f'{PREFIX}-product-').order_by('id')
+        for pk, price in queryset.values_list('id', 'price').iterator(chunk_size=self.chunk_size):
+            self.product_ids.append(pk)
+            self.product_prices.append(int(price * 100))
+
+    def _stock_movements(self):
+        from catalog.models import Product, StockMovement
+
+        rnd = self.rnd
+        queryset = Product.objects.filter(slug__startswith=f'{PREFIX}-product-').order_by('id')
+
+        def rows():
+            # Приход плюс иногда списание: сумма движений равна текущему остатку
+            for pk, stock in queryset.values_list('id', 'stock').iterator(chunk_size=self.chunk_size):
+                written_off = rnd.choice((0, 0, 0, 1, 2, 5))
+                yield StockMovement(product_id=pk, quantity=stock + written_off, movement_type='receipt',
+                                    comment='Начальный остаток', created_at=self._moment())
+                if written_off:
+                    yield StockMovement(product_id=pk, quantity=-written_off, movement_type='write_off',
+                                        comment='Брак', created_at=self._moment())
+
+        self._insert(StockMovement, rows())
+
+    def _users(self, User):
+        password = make_password(PASSWORD)  # один хэш на всех: PBKDF2 на каждого занял бы минуты
+
+        def rows():
+            for i in range(self.sizes['users']):
+                yield User(
+                    username=f'{PREFIX}-user-{i}', email=f'{PREFIX}-user-{i}@example.com',
+                    password=password, phone=f'+37529{i % 10000000:07d}', date_joined=self._moment(),
+                    created_at=self._moment(),
+                )
+
+        self._insert(User, rows())
+        return array('q', User.objects.filter(username__startswith=f'{PREFIX}-user-')
+                     .order_by('id').values_list('id', flat=True))
+
+    def _carts(self, users):
+        from cart.models import Cart, CartItem
+
+        if not users or not self.product_ids:
+            return
+        count = min(self.sizes['carts'], len(users))
+        owners = self.rnd.sample(list(users), count)
+        self._insert(Cart, (Cart(user_id=pk, created_at=self._moment()) for pk in owners))
+        rnd = self.rnd
+        carts = Cart.objects.filter(user__username__startswith=f'{PREFIX}-user-').order_by('id').values_list('id', flat=True)
+
+        def rows():
+            for cart_id in carts.iterator(chunk_size=self.chunk_size):
+                picked = rnd.sample(range(len(self.product_ids)), min(rnd.randint(1, 5), len(self.product_ids)))
+                for index in picked:
+                    yield CartItem(cart_id=cart_id, product_id=self.product_ids[index], quantity=rnd.randint(1, 3))
+
+        self._insert(CartItem, rows())
+
+    def _orders(self, users):
+        from orders.models import Order, OrderItem
+
+        if not users or not self.product_ids:
+            return
+        rnd = self.rnd
+        statuses, weights = zip(*ORDER_STATUSES)
+        started = time.perf_counter()
+        remaining = self.sizes['orders']
+        while remaining > 0:
+            size = min(self.chunk_size, remaining)
+            remaining -= size
+            orders, lines = [], []
+            for _ in range(size):
+                picked = rnd.sample(range(len(self.product_ids)), min(rnd.randint(1, 5), len(self.product_ids)))
+                items = [(self.product_ids[i], rnd.randint(1, 4), self.product_prices[i]) for i in picked]
+                total = sum(quantity * price for _, quantity, price in items)
+                orders.append(Order(
+                    user_id=users[rnd.randrange(len(users))], created_at=self._moment(),
+                    address=f'г. Минск, ул. Тестовая, {rnd.randint(1, 200)}',
+                    status=rnd.choices(statuses, weights)[0],
+                    total_price=Decimal(total) / 100,
+                ))
+                lines.append(items)
+            with transaction.atomic():
+                # PostgreSQL и SQLite 3.35+ возвращают id из bulk_create — строки сразу к своим заказам
+                Order.objects.bulk_create(orders, batch_size=self.chunk_size)
+                OrderItem.objects.bulk_create([
+                    OrderItem(order_id=order.pk, product_id=pk, quantity=quantity, price=Decimal(price) / 100)
+                    for order, items in zip(orders, lines)
+                    for pk, quantity, price in items
+                ], batch_size=self.chunk_size)
+            reset_queries()
+            self.counts['order'] = self.counts.get('order', 0) + size
+            self.counts['orderitem'] = self.counts.get('orderitem', 0) + sum(len(items) for items in lines)
+            if self.progress:
+                self.progress('order', self.counts['order'], time.perf_counter() - started)
+
+    def _review_specs(self):
+        """(индекс товара, индекс пользователя, оценка, текст, одобрен, дата) — одинаково при каждом проходе."""
+        rnd = random.Random(self.review_seed)
+        products, users = self.sizes['products'], self.sizes['users']
+        if not products or not users:
+            return
+        for _ in range(self.sizes['reviews']):
+            yield (
+                rnd.randrange(products),
+                rnd.randrange(users),
+                rnd.choices((1, 2, 3, 4, 5), (3, 4, 10, 30, 53))[0],
+                rnd.choice(REVIEW_TEXTS),
+                rnd.random() < 0.9,
+                self.now - timedelta(seconds=rnd.randrange(self.days * 86400)),
+            )
+
+    def _review_totals(self):
+        """Сумма и число одобренных оценок по индексу товара — рейтинги пишутся вместе с товарами."""
+        sums, counts = array('q', bytes(8 * self.sizes['products'])), array('q', bytes(8 * self.sizes['products']))
+        for product, _, rating, _, approved, _ in self._review_specs():
+            if approved:
+                sums[product] += rating
+                counts[product] += 1
+        return sums, counts
+
+    def _reviews(self, users):
+        from catalog.models import Review
+
+        self._insert(Review, (
+            Review(product_id=self.product_ids[product], user_id=users[user], rating=rating,
+                   text=text, is_approved=approved, created_at=created_at)
+            for product, user, rating, text, approved, created_at in self._review_specs()
+        ))
+
+    def _rebuild_derived(self):
+        from catalog import search
+        from catalog.models import Product
+        from catalog.versioning import bump_catalog_version
+        from core import rollups
+
+        started = time.perf_counter()
+        rollups.rebuild_all()
+        if self.search_index:
+            queryset = (
+                Product.objects.filter(slug__startswith=f'{PREFIX}-product-')
+                .select_related('category', 'brand').order_by('pk')
+            )
+            last_pk = 0
+            while batch := list(queryset.filter(pk__gt=last_pk)[:search.REINDEX_BATCH_SIZE]):
+                search.index_products(batch)
+                reset_queries()
+                last_pk = batch[-1].pk
+        bump_catalog_version()
+        if self.progress:
+            self.progress('derived', 0, time.perf_counter() - started)
+
+
+def seed(**options):
+    """Генерирует набор данных (см. Seeder); возвращает {таблица: строк}."""
+    return Seeder(**options).run()
+
+
+def seeded_exists():
+    from catalog.models import Product
+    return Product.objects.filter(slug__startswith=f'{PREFIX}-product-').exists()
+
@@ -0,0 +1,26 @@
+from rest_framework import serializers
+
+from .models import Page, SiteSettings
+
+
+class SiteSettingsSerializer(serializers.ModelSerializer):
+    """Публичная часть настроек сайта (без служебных порогов)."""
+
+    class Meta:
+        model = SiteSettings
+        fields = [
+            'site_name', 'contact_phone', 'contact_email', 'contact_address', 'currency',
+            'delivery_methods', 'payment_methods', 'delivery_info', 'payment_info',
+        ]
+
+
+class PageListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Page
+        fields = ['slug', 'title', 'meta_title', 'meta_description', 'updated_at']
+
+
+class PageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Page
+        fields = ['slug', 'title', 'content', 'meta_title', 'meta_description', 'updated_at']
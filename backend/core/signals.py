@@ -0,0 +1,53 @@
+"""
+Сигналы core: сброс кэша настроек сайта при изменении записи в админке,
+ведение дневной сводки продаж (core.rollups) по заказам и регистрациям,
+возврат использования промокода при отмене заказа (core.promo)
+и новая версия каталога при изменении кампаний (цены в ответах каталога).
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+from catalog.versioning import campaigns_changed
+
+from . import promo, rollups
+from .models import Campaign, SiteSettings
+from .utils import invalidate_site_settings
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+def reset_site_settings_cache(sender, **kwargs):
+    # После коммита: иначе другой воркер может успеть перечитать ещё старую запись
+    transaction.on_commit(invalidate_site_settings)
+
+
+@receiver(post_save, sender='orders.Order')
+def update_rollup_on_order_save(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    # Промокод — первым: rollups.order_saved запоминает новый статус заказа как прежний
+    promo.order_saved(instance, created=created)
+    rollups.order_saved(instance, created=created)
+
+
+@receiver(post_delete, sender='orders.Order')
+def update_rollup_on_order_delete(sender, instance, **kwargs):
+    rollups.order_deleted(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def update_rollup_on_user_created(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        rollups.user_created(instance)
+
+
+@receiver(post_save, sender=Campaign)
+@receiver(post_delete, sender=Campaign)
+@receiver(m2m_changed, sender=Campaign.categories.through)
+@receiver(m2m_changed, sender=Campaign.products.through)
+def bump_catalog_version_on_campaign_change(sender, raw=False, action=None, **kwargs):
+    if raw or (action is not None and not action.startswith('post_')):
+        return
+    campaigns_changed()
@@ -1,3 +1,14 @@
 from django.test import TestCase
 
-# Create your tests here.
+from core import query_plans
+
+
+class QueryPlanTests(TestCase):
+    """Горячие запросы всех приложений идут по индексам (core.query_plans)."""
+
+    def test_hot_queries_use_indexes(self):
+        results = query_plans.check(query_plans.hot_queries())
+        self.assertTrue(results)
+        for name, plan, problems in results:
+            with self.subTest(name):
+                self.assertEqual(problems, [], plan)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('pages/', views.page_list, name='async-pages-list'),
+    path('pages/<slug:slug>/', views.page_detail, name='async-pages-detail'),
+    path('site-settings/', views.site_settings, name='async-site-settings'),
+]
@@ -2,13 +2,96 @@
 Хелперы для использования настроек сайта и шаблонов писем в коде.
 Позволяют менять поведение магазина без деплоя (через админку).
 """
+import threading
+import time
+
+from django.conf import settings as django_settings
+from django.core.cache import cache
 from django.utils import timezone
 from .models import SiteSettings, EmailTemplate, PromoCode, Campaign
 
+# Кэш настроек сайта в памяти процесса. Сбрасывается сигналом post_save/post_delete (core.signals);
+# другие воркеры узнают об изменении по штампу версии в общем кэше Django (CACHES).
+SITE_SETTINGS_TTL = getattr(django_settings, 'SITE_SETTINGS_CACHE_TTL', 300)
+SITE_SETTINGS_VERSION_CHECK_INTERVAL = getattr(django_settings, 'SITE_SETTINGS_VERSION_CHECK_INTERVAL', 2)
+SITE_SETTINGS_VERSION_KEY = 'core:site-settings-version'
+
+_site_settings_lock = threading.Lock()
+_site_settings_cache = {
+    'loaded': False,
+    'value': None,
+    'version': None,
+    'loaded_at': 0.0,
+    'checked_at': 0.0,
+}
+
+DEFAULT_DELIVERY_METHODS = [{'id': 'courier', 'name': 'Курьер', 'description': ''}, {'id': 'pickup', 'name': 'Самовывоз', 'description': ''}]
+DEFAULT_PAYMENT_METHODS = [{'id': 'cash', 'name': 'Наличными', 'description': ''}, {'id': 'card', 'name': 'Картой при получении', 'description': ''}]
+
+
+def _site_settings_version():
+    version = cache.get(SITE_SETTINGS_VERSION_KEY)
+    if version is None:
+        version = 0
+        cache.add(SITE_SETTINGS_VERSION_KEY, version, None)
+    return version
+
+
+async def _asite_settings_version():
+    version = await cache.aget(SITE_SETTINGS_VERSION_KEY)
+    if version is None:
+        version = 0
+        await cache.aadd(SITE_SETTINGS_VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_site_settings():
+    """Сбрасывает кэш настроек в этом процессе и поднимает версию для остальных воркеров."""
+    try:
+        cache.incr(SITE_SETTINGS_VERSION_KEY)
+    except ValueError:
+        cache.set(SITE_SETTINGS_VERSION_KEY, 1, None)
+    with _site_settings_lock:
+        _site_settings_cache['loaded'] = False
+
 
 def get_site_settings():
-    """Возвращает единственную запись настроек или None, если не создана."""
-    return SiteSettings.objects.first()
+    """
+    Возвращает единственную запись настроек или None, если не создана.
+    Запись кэшируется в памяти процесса: повторные вызовы не ходят в БД.
+    """
+    state = _site_settings_cache
+    now = time.monotonic()
+    if state['loaded'] and now - state['loaded_at'] < SITE_SETTINGS_TTL:
+        if now - state['checked_at'] < SITE_SETTINGS_VERSION_CHECK_INTERVAL:
+            return state['value']
+        # Штамп версии проверяется не чаще раза в интервал — это обращение к кэшу, не к БД
+        if _site_settings_version() == state['version']:
+            state['checked_at'] = now
+            return state['value']
+
+    with _site_settings_lock:
+        version = _site_settings_version()
+        value = SiteSettings.objects.first()
+        state.update(loaded=True, value=value, version=version, loaded_at=now, checked_at=now)
+    return value
+
+
+async def aget_site_settings():
+    """get_site_settings() для async-view: тот же кэш в памяти процесса, штамп версии и запись читаются асинхронно."""
+    state = _site_settings_cache
+    now = time.monotonic()
+    if state['loaded'] and now - state['loaded_at'] < SITE_SETTINGS_TTL:
+        if now - state['checked_at'] < SITE_SETTINGS_VERSION_CHECK_INTERVAL:
+            return state['value']
+        if await _asite_settings_version() == state['version']:
+            state['checked_at'] = now
+            return state['value']
+
+    version = await _asite_settings_version()
+    value = await SiteSettings.objects.afirst()
+    state.update(loaded=True, value=value, version=version, loaded_at=now, checked_at=now)
+    return value
 
 
 def get_currency():
@@ -21,7 +104,7 @@ def get_delivery_methods():
     """Список способов доставки из настроек: [{"id": "...", "name": "...", "description": "..."}]."""
     settings = get_site_settings()
     if not settings or not settings.delivery_methods:
-        return [{'id': 'courier', 'name': 'Курьер', 'description': ''}, {'id': 'pickup', 'name': 'Самовывоз', 'description': ''}]
+        return DEFAULT_DELIVERY_METHODS
     return settings.delivery_methods
 
 
@@ -29,7 +112,7 @@ def get_payment_methods():
     """Список способов оплаты из настроек: [{"id": "...", "name": "...", "description": "..."}]."""
     settings = get_site_settings()
     if not settings or not settings.payment_methods:
-        return [{'id': 'cash', 'name': 'Наличными', 'description': ''}, {'id': 'card', 'name': 'Картой при получении', 'description': ''}]
+        return DEFAULT_PAYMENT_METHODS
     return settings.payment_methods
 
 
@@ -60,9 +143,10 @@ def get_valid_promo_code(code):
     """
     Возвращает активный промокод по коду, если он действителен (по датам и лимиту использований), иначе None.
     """
-    if not code or not code.strip():
+    normalized = PromoCode.normalize_code(code)
+    if not normalized:
         return None
-    promo = PromoCode.objects.filter(code__iexact=code.strip(), is_active=True).first()
+    promo = PromoCode.objects.filter(code_normalized=normalized, is_active=True).first()
     if not promo:
         return None
     now = timezone.now()
@@ -1,3 +1,45 @@
-from django.shortcuts import render
+"""
+Async-эндпоинты контента для ASGI (/api/async/...): страницы и публичные настройки сайта.
+Только чтение; запрос не уходит в пул потоков — асинхронный ORM и кэш.
+"""
+from django.http import HttpResponse, HttpResponseNotAllowed
+from rest_framework.renderers import JSONRenderer
 
-# Create your views here.
+from .models import Page, SiteSettings
+from .serializers import PageListSerializer, PageSerializer, SiteSettingsSerializer
+from .utils import DEFAULT_DELIVERY_METHODS, DEFAULT_PAYMENT_METHODS, aget_site_settings
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+_renderer = JSONRenderer()
+
+
+def render(data, status=200):
+    return HttpResponse(_renderer.render(data), content_type='application/json', status=status)
+
+
+async def page_list(request):
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    pages = [page async for page in Page.objects.filter(is_active=True).order_by('title')]
+    return render(PageListSerializer(pages, many=True).data)
+
+
+async def page_detail(request, slug):
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    page = await Page.objects.filter(slug=slug, is_active=True).afirst()
+    if page is None:
+        return render({'error': 'Страница не найдена'}, status=404)
+    return render(PageSerializer(page).data)
+
+
+async def site_settings(request):
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    # Без записи в админке — значения по умолчанию модели
+    settings = await aget_site_settings() or SiteSettings()
+    data = SiteSettingsSerializer(settings).data
+    data['delivery_methods'] = settings.delivery_methods or DEFAULT_DELIVERY_METHODS
+    data['payment_methods'] = settings.payment_methods or DEFAULT_PAYMENT_METHODS
+    return render(data)
@@ -1,7 +1,26 @@
+from django import forms
 from django.contrib import admin
+
+from core.promo import CANCELLED, promo_available
 from .models import Order, OrderItem
 
 
+class OrderAdminForm(forms.ModelForm):
+    class Meta:
+        model = Order
+        fields = '__all__'
+
+    def clean_status(self):
+        # Возврат из отмены снова занимает промокод (core.promo.order_saved) — лимит проверяем заранее
+        status = self.cleaned_data['status']
+        order = self.instance
+        if (order.pk and order.promo_code_id and status != CANCELLED
+                and Order.objects.filter(pk=order.pk, status=CANCELLED).exists()
+                and not promo_available(order.promo_code_id)):
+            raise forms.ValidationError('Промокод заказа исчерпан или недействителен — вернуть заказ из отмены нельзя.')
+        return status
+
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
@@ -10,15 +29,16 @@ class OrderItemInline(admin.TabularInline):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
+    form = OrderAdminForm
     list_display = ('id', 'user', 'status', 'total_price', 'delivery_method', 'payment_method', 'created_at')
     list_filter = ('status', 'delivery_method', 'payment_method', 'created_at')
     search_fields = ('user__username', 'user__email', 'phone', 'address', 'id')
-    readonly_fields = ('created_at', 'total_price')
+    readonly_fields = ('created_at', 'total_price', 'discount', 'promo_code')
     date_hierarchy = 'created_at'
     inlines = [OrderItemInline]
     fieldsets = (
         (None, {
-            'fields': ('user', 'status', 'total_price', 'created_at')
+            'fields': ('user', 'status', 'total_price', 'promo_code', 'discount', 'created_at')
         }),
         ('Доставка и оплата', {
             'fields': ('address', 'phone', 'delivery_method', 'payment_method')
@@ -0,0 +1,70 @@
+"""
+Бенчмарк оформления заказа: число SQL-запросов и время POST /api/orders/orders/create_order/
+для корзин разного размера (по умолчанию 1, 10 и 100 строк).
+Данные создаются в транзакции, которая в конце откатывается.
+"""
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from cart.models import Cart, CartItem
+from catalog.models import Brand, Category, Product
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Измеряет число запросов и время оформления заказа для корзин разного размера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,10,100', help='Размеры корзины через запятую')
+        parser.add_argument('--repeat', type=int, default=10, help='Заказов на каждый размер')
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        try:
+            with transaction.atomic():
+                self._run(sizes, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, sizes, repeat):
+        category = Category.objects.create(name='Бенч', slug='bench-checkout-category')
+        brand = Brand.objects.create(name='Бенч', slug='bench-checkout-brand')
+        products = Product.objects.bulk_create([
+            Product(
+                category=category, brand=brand, name=f'Товар {i}', slug=f'bench-checkout-{i}',
+                description='', price=Decimal('9.99') + i, stock=10 ** 6,
+            )
+            for i in range(max(sizes))
+        ])
+        user = User.objects.create_user('bench-checkout', 'bench@example.com', 'bench-password')
+        cart = Cart.objects.create(user=user)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        self.stdout.write(f'{"строк":>6} {"запросов":>9} {"p50, мс":>9} {"max, мс":>9}')
+        for size in sizes:
+            timings, query_counts = [], set()
+            for _ in range(repeat):
+                CartItem.objects.bulk_create([CartItem(cart=cart, product=p, quantity=2) for p in products[:size]])
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.post('/api/orders/orders/create_order/', {'address': 'Минск'}, format='json')
+                    timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise RuntimeError(f'Checkout вернул {response.status_code}: {response.content[:200]!r}')
+                query_counts.add(len(queries))
+            counts = ', '.join(str(c) for c in sorted(query_counts))
+            self.stdout.write(f'{size:>6} {counts:>9} {statistics.median(timings):>9.2f} {max(timings):>9.2f}')
@@ -0,0 +1,165 @@
+"""
+Нагрузочный тест оформления заказов на настроенной базе (SQLite или PostgreSQL из DB_ENGINE):
+N потоков-покупателей кладут в корзину несколько случайных товаров и оформляют заказ.
+Измеряется пропускная способность (заказов/с), задержка и число повторов из-за блокировок.
+
+Сравнение бэкендов: запустить дважды с одним --output, например
+    python manage.py load_checkout --output load.json
+    DB_ENGINE=postgresql ... python manage.py load_checkout --output load.json
+— после второго запуска будет выведена таблица по обоим бэкендам.
+Работает с настоящей базой (у потоков свои соединения), тестовые данные удаляются в конце.
+"""
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from cart.models import Cart, CartItem
+from catalog.models import Brand, Category, Product
+from orders.models import Order
+from orders.services import CheckoutError, checkout
+
+User = get_user_model()
+PREFIX = 'load-checkout'
+
+
+def backend_label():
+    db = settings.DATABASES['default']
+    if connection.vendor == 'postgresql':
+        options = db.get('OPTIONS', {})
+        if options.get('pool'):
+            return f'postgresql (pool {options["pool"].get("max_size")})'
+        return f'postgresql (CONN_MAX_AGE={db.get("CONN_MAX_AGE", 0)})'
+    return connection.vendor
+
+
+class Command(BaseCommand):
+    help = 'Параллельное оформление заказов: пропускная способность и задержка на текущей базе'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Параллельных покупателей')
+        parser.add_argument('--orders', type=int, default=25, help='Заказов на покупателя')
+        parser.add_argument('--lines', type=int, default=3, help='Строк в корзине')
+        parser.add_argument('--products', type=int, default=200, help='Товаров в тестовом каталоге')
+        parser.add_argument('--retries', type=int, default=20, help='Повторов при блокировке БД')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='JSON-файл с результатами по бэкендам (для сравнения)')
+
+    def handle(self, *args, **options):
+        if Category.objects.filter(slug=f'{PREFIX}-category').exists():
+            raise CommandError(f'Остались данные прошлого запуска — удалите категорию {PREFIX}-category.')
+        category = Category.objects.create(name='Load', slug=f'{PREFIX}-category')
+        brand = Brand.objects.create(name='Load', slug=f'{PREFIX}-brand')
+        Product.objects.bulk_create([
+            Product(
+                category=category, brand=brand, name=f'Товар {i}', slug=f'{PREFIX}-{i}',
+                description='', price=Decimal('5.00') + i, stock=10 ** 6,
+            )
+            for i in range(options['products'])
+        ])
+        product_ids = list(Product.objects.filter(category=category).values_list('pk', flat=True))
+        users = [
+            User.objects.create_user(f'{PREFIX}-{i}', f'{PREFIX}-{i}@example.com', 'load-password')
+            for i in range(options['workers'])
+        ]
+        try:
+            result = self._run(product_ids, users, options)
+        finally:
+            Order.objects.filter(user__in=users).delete()
+            User.objects.filter(pk__in=[u.pk for u in users]).delete()
+            category.delete()
+            brand.delete()
+        if options['output']:
+            self._compare(options['output'], result)
+
+    def _run(self, product_ids, users, options):
+        stats = {'ok': 0, 'errors': 0, 'retries': 0}
+        latencies = []
+        lock = threading.Lock()
+        start_barrier = threading.Barrier(len(users))
+
+        def worker(index, user):
+            rnd = random.Random(options['seed'] + index)
+            try:
+                cart = Cart.objects.create(user=user)
+                start_barrier.wait()
+                for _ in range(options['orders']):
+                    CartItem.objects.bulk_create([
+                        CartItem(cart=cart, product_id=pk, quantity=rnd.randint(1, 3))
+                        for pk in rnd.sample(product_ids, options['lines'])
+                    ])
+                    outcome, started = 'errors', time.perf_counter()
+                    for attempt in range(options['retries'] + 1):
+                        try:
+                            checkout(user, address='load')
+                            outcome = 'ok'
+                        except CheckoutError:
+                            pass
+                        except OperationalError:
+                            with lock:
+                                stats['retries'] += 1
+                            time.sleep(0.001 * (attempt + 1))
+                            continue
+                        break
+                    elapsed = time.perf_counter() - started
+                    if outcome != 'ok':
+                        CartItem.objects.filter(cart=cart).delete()
+                    with lock:
+                        stats[outcome] += 1
+                        latencies.append(elapsed)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i, user)) for i, user in enumerate(users)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        result = {
+            'backend': backend_label(),
+            'workers': len(users),
+            'orders': stats['ok'],
+            'errors': stats['errors'],
+            'retries': stats['retries'],
+            'seconds': round(elapsed, 3),
+            'orders_per_second': round(stats['ok'] / elapsed, 1) if elapsed else 0,
+            'p50_ms': round(statistics.median(latencies) * 1000, 1) if latencies else 0,
+            'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1) if latencies else 0,
+        }
+        self.stdout.write(
+            f'{result["backend"]}: {result["orders"]} заказов за {result["seconds"]} с '
+            f'({result["orders_per_second"]} заказов/с), p50 {result["p50_ms"]} мс, p95 {result["p95_ms"]} мс, '
+            f'ошибок: {result["errors"]}, повторов из-за блокировок: {result["retries"]}'
+        )
+        if stats['errors']:
+            raise CommandError('Часть заказов не оформлена.')
+        return result
+
+    def _compare(self, path, result):
+        results = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                results = json.load(f)
+        results[result['backend']] = result
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+        self.stdout.write(f'\n{"бэкенд":<32} {"потоков":>8} {"заказов/с":>10} {"p50, мс":>9} {"p95, мс":>9} {"повторов":>9}')
+        for row in sorted(results.values(), key=lambda r: -r['orders_per_second']):
+            self.stdout.write(
+                f'{row["backend"]:<32} {row["workers"]:>8} {row["orders_per_second"]:>10} '
+                f'{row["p50_ms"]:>9} {row["p95_ms"]:>9} {row["retries"]:>9}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Результаты сохранены в {path}'))
@@ -0,0 +1,113 @@
+"""
+Нагрузочная проверка списания остатков: N потоков одновременно оформляют заказы
+на один «горячий» товар. В конце сверяется, что остаток равен начальному минус
+проданное, перепродажи нет, а каждое успешное списание записано в StockMovement.
+
+Работает с настоящей базой (у потоков свои соединения), тестовые данные удаляются в конце.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Sum
+
+from cart.models import Cart, CartItem
+from catalog.models import Brand, Category, Product, StockMovement
+from orders.models import Order
+from orders.services import CheckoutError, checkout
+
+User = get_user_model()
+PREFIX = 'stress-stock'
+
+
+class Command(BaseCommand):
+    help = 'Параллельные заказы одного товара: проверка корректности остатков и пропускной способности'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Параллельных покупателей')
+        parser.add_argument('--orders', type=int, default=50, help='Заказов на покупателя')
+        parser.add_argument('--quantity', type=int, default=1, help='Штук товара в заказе')
+        parser.add_argument('--stock', type=int, default=300, help='Начальный остаток товара')
+        parser.add_argument('--retries', type=int, default=20, help='Повторов при блокировке БД (SQLite)')
+
+    def handle(self, *args, **options):
+        if Category.objects.filter(slug=f'{PREFIX}-category').exists():
+            raise CommandError('Остались данные прошлого запуска — удалите категорию stress-stock-category.')
+        category = Category.objects.create(name='Stress', slug=f'{PREFIX}-category')
+        brand = Brand.objects.create(name='Stress', slug=f'{PREFIX}-brand')
+        product = Product.objects.create(
+            category=category, brand=brand, name='Горячий товар', slug=f'{PREFIX}-hot',
+            description='', price=Decimal('10.00'), stock=options['stock'],
+        )
+        users = [
+            User.objects.create_user(f'{PREFIX}-{i}', f'{PREFIX}-{i}@example.com', 'stress-password')
+            for i in range(options['workers'])
+        ]
+        try:
+            self._run(product, users, options)
+        finally:
+            Order.objects.filter(user__in=users).delete()
+            User.objects.filter(pk__in=[u.pk for u in users]).delete()
+            category.delete()
+            brand.delete()
+
+    def _run(self, product, users, options):
+        stats = {'ok': 0, 'sold_out': 0, 'errors': 0, 'retries': 0}
+        lock = threading.Lock()
+        start_barrier = threading.Barrier(len(users))
+
+        def worker(user):
+            try:
+                cart = Cart.objects.create(user=user)
+                start_barrier.wait()
+                for _ in range(options['orders']):
+                    CartItem.objects.create(cart=cart, product=product, quantity=options['quantity'])
+                    outcome = 'errors'
+                    for attempt in range(options['retries'] + 1):
+                        try:
+                            checkout(user, address='stress')
+                            outcome = 'ok'
+                        except CheckoutError as e:
+                            outcome = 'sold_out' if e.status == 409 else 'errors'
+                        except OperationalError:
+                            with lock:
+                                stats['retries'] += 1
+                            time.sleep(0.001 * (attempt + 1))
+                            continue
+                        break
+                    if outcome != 'ok':
+                        CartItem.objects.filter(cart=cart).delete()
+                    with lock:
+                        stats[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(user,)) for user in users]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        product.refresh_from_db()
+        sold = (
+            StockMovement.objects.filter(product=product, movement_type='order')
+            .aggregate(total=Sum('quantity'))['total'] or 0
+        )
+        ordered = Order.objects.filter(user__in=users).count()
+        expected = options['stock'] - stats['ok'] * options['quantity']
+        attempts = len(users) * options['orders']
+
+        self.stdout.write(
+            f'Попыток: {attempts}, успешно: {stats["ok"]}, нет в наличии: {stats["sold_out"]}, '
+            f'ошибок: {stats["errors"]}, повторов из-за блокировок: {stats["retries"]}'
+        )
+        self.stdout.write(f'Время: {elapsed:.2f} с, {attempts / elapsed:.0f} попыток/с')
+        self.stdout.write(f'Остаток: {product.stock} (ожидалось {expected}), списано по движениям: {-sold}')
+        if product.stock != expected or -sold != stats['ok'] * options['quantity'] or ordered != stats['ok']:
+            raise CommandError('Остатки расходятся с успешными заказами.')
+        self.stdout.write(self.style.SUCCESS('Остатки сходятся, перепродажи нет.'))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 14:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_promocode_code_normalized'),
+        ('orders', '0003_order_comment_order_delivery_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='discount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Скидка по промокоду'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='promo_code',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='core.promocode', verbose_name='Промокод'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from catalog.models import Product
 
@@ -21,13 +21,51 @@ class Order(models.Model):
     comment = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='pending')
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Промокод, использованный при оформлении, и его скидка (уже вычтена из total_price)
+    promo_code = models.ForeignKey(
+        'core.PromoCode',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='orders',
+        verbose_name='Промокод',
+    )
+    discount = models.DecimalField('Скидка по промокоду', max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            # История заказов пользователя, новые сверху
+            models.Index(fields=['user', '-created_at', '-id'], name='orders_order_user_created_idx'),
+            # Фильтр по статусу в админке и отчётах за период
+            models.Index(fields=['status', 'created_at'], name='orders_order_status_date_idx'),
+        ]
 
     def __str__(self):
         return f"Заказ {self.id} от {self.user.username}"
+
+    def save(self, *args, **kwargs):
+        # Сигналы сохранения (промокод, сводка продаж) — в одной транзакции с записью заказа:
+        # отказ core.promo.order_saved откатывает и смену статуса
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_sales_state()
+        return instance
+
+    def remember_sales_state(self):
+        """Запоминает вклад заказа в дневную сводку продаж (core.rollups) — чтобы учесть смену статуса."""
+        loaded = self.__dict__
+        if all(name in loaded for name in ('created_at', 'status', 'total_price')):
+            self._sales_state = (self.created_at, self.status, self.total_price)
+        else:
+            self._sales_state = None
     
     # Метод для автоматического расчета общей суммы заказа
     def calculate_total(self):
-        total = sum(item.quantity * item.price for item in self.items.all())
+        total = sum(item.quantity * item.price for item in self.items.all()) - self.discount
         self.total_price = total
         self.save()
         return total
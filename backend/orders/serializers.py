@@ -14,4 +14,6 @@ class OrderSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Order
-        fields = ['id', 'user', 'created_at', 'address', 'phone', 'delivery_method', 'payment_method', 'comment', 'status', 'items', 'total_price']
\ No newline at end of file
+        fields = ['id', 'user', 'created_at', 'address', 'phone', 'delivery_method', 'payment_method', 'comment', 'status', 'items', 'discount', 'total_price']
+        # Статус, сумма и скидка меняются только оформлением и отменой (и в админке)
+        read_only_fields = ['user', 'created_at', 'status', 'discount', 'total_price']
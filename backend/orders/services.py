@@ -0,0 +1,115 @@
+"""
+Оформление заказа из корзины.
+Весь checkout выполняется в одной транзакции: корзина с товарами одним SELECT,
+строки заказа одним bulk_create, сумма — в памяти, остатки списываются условным UPDATE
+по каждому товару (catalog.stock), промокод занимается условным UPDATE (core.promo).
+Если товара не хватает или промокод исчерпан, заказ целиком откатывается.
+"""
+from django.db import transaction
+from django.db.models import Prefetch
+
+from cart.models import Cart, CartItem
+from catalog.stock import InsufficientStock, reserve_stock
+from core.pricing import PriceEngine
+from core.promo import PromoCodeError, claim_promo, find_promo
+from .models import Order, OrderItem
+
+
+class CheckoutError(Exception):
+    """Ошибка оформления заказа; message уходит клиенту, status — HTTP-код ответа."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def order_with_items(order_id):
+    """Заказ со строками, товарами, категориями и брендами — для сериализации без N+1."""
+    items = OrderItem.objects.select_related('product__category', 'product__brand')
+    return Order.objects.prefetch_related(Prefetch('items', queryset=items)).get(pk=order_id)
+
+
+def checkout(user, address, phone=None, delivery_method='courier', payment_method='cash', comment='',
+             promo_code=None):
+    """
+    Создаёт заказ из корзины пользователя и очищает корзину.
+    Возвращает сохранённый Order. При ошибке бросает CheckoutError, в БД ничего не остаётся.
+    """
+    with transaction.atomic():
+        try:
+            cart = Cart.objects.get(user=user)
+        except Cart.DoesNotExist:
+            raise CheckoutError('Корзина не найдена')
+
+        cart_items = list(CartItem.objects.filter(cart=cart).select_related('product'))
+        if not cart_items:
+            raise CheckoutError('Корзина пуста')
+
+        promo = None
+        if promo_code:
+            promo = find_promo(promo_code)
+            if promo is None:
+                raise CheckoutError('Промокод не найден или недействителен')
+
+        # Цены строк — с учётом действующих кампаний (core.pricing), в памяти за один проход
+        quote = PriceEngine.load().price_cart([(item.product, item.quantity) for item in cart_items], promo)
+        if promo is not None and quote.promo_code is None:
+            raise CheckoutError('Сумма заказа меньше минимальной для промокода')
+        lines = [
+            OrderItem(product=item.product, quantity=item.quantity, price=line.unit.final)
+            for item, line in zip(cart_items, quote.lines)
+        ]
+
+        if promo is not None:
+            # Условный UPDATE счётчика; при откате заказа откатится вместе с ним
+            try:
+                claim_promo(promo)
+            except PromoCodeError as e:
+                raise CheckoutError(e.message, status=e.status)
+
+        order = Order.objects.create(
+            user=user,
+            address=address,
+            phone=phone,
+            delivery_method=delivery_method,
+            payment_method=payment_method,
+            comment=comment,
+            status='pending',
+            promo_code=promo,
+            discount=quote.promo_discount,
+            total_price=quote.total,
+        )
+        for line in lines:
+            line.order = order
+        OrderItem.objects.bulk_create(lines)
+
+        quantities = {}
+        for line in lines:
+            quantities[line.product_id] = quantities.get(line.product_id, 0) + line.quantity
+        try:
+            reserve_stock(quantities, order=order, comment=f'Заказ №{order.pk}')
+        except InsufficientStock as e:
+            product = next(line.product for line in lines if line.product_id == e.product_id)
+            raise CheckoutError(f'Недостаточно товара на складе: {product.name}', status=409)
+
+        CartItem.objects.filter(cart=cart).delete()
+    return order
+
+
+CANCELLABLE_STATUSES = ('pending', 'processing')
+
+
+def cancel_order(order):
+    """
+    Отмена заказа покупателем — пока он не отправлен. Использование промокода возвращается
+    сигналом сохранения (core.promo.order_saved). Бросает CheckoutError, если отменять поздно.
+    """
+    with transaction.atomic():
+        # Статус перечитывается под блокировкой строки: параллельная отмена не пройдёт дважды
+        current = Order.objects.select_for_update().get(pk=order.pk)
+        if current.status not in CANCELLABLE_STATUSES:
+            raise CheckoutError('Заказ нельзя отменить в текущем статусе', status=409)
+        current.status = 'cancelled'
+        current.save(update_fields=['status'])
+    return current
@@ -1,3 +1,100 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cart.models import Cart, CartItem
+from catalog.models import Brand, Category, Product, StockMovement
+from core.models import PromoCode
+from .models import Order, OrderItem
+from .services import CheckoutError, cancel_order, checkout
+
+
+class CheckoutTests(TestCase):
+    """Оформление заказа (orders.services): откат целиком, лимит промокода, число запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('buyer', password='secret')
+        category = Category.objects.create(name='Полироли', slug='polish')
+        brand = Brand.objects.create(name='Бренд', slug='brand')
+        cls.products = [
+            Product.objects.create(
+                category=category, brand=brand, name=f'Товар {i}', slug=f'item-{i}',
+                description='', price=Decimal('10.00'), stock=5,
+            )
+            for i in range(10)
+        ]
+
+    def fill_cart(self, quantities, user=None):
+        cart, _ = Cart.objects.get_or_create(user=user or self.user)
+        CartItem.objects.filter(cart=cart).delete()
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product=product, quantity=quantity) for product, quantity in quantities
+        ])
+
+    def checkout(self, **kwargs):
+        return checkout(self.user, address='Минск', phone='+375290000000', **kwargs)
+
+    def stock(self):
+        return list(Product.objects.order_by('pk').values_list('stock', flat=True))
+
+    def test_oversell_rolls_back_order_and_stock(self):
+        self.fill_cart([(self.products[0], 2), (self.products[1], 6)])
+        with self.assertRaises(CheckoutError) as ctx:
+            self.checkout()
+        self.assertEqual(ctx.exception.status, 409)
+        self.assertEqual(self.stock(), [5] * 10)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertFalse(StockMovement.objects.filter(movement_type='order').exists())
+        self.assertEqual(CartItem.objects.filter(cart__user=self.user).count(), 2)
+
+    def test_promo_at_max_uses_refused(self):
+        PromoCode.objects.create(code='SALE', value=Decimal('10'), max_uses=1, used_count=1)
+        self.fill_cart([(self.products[0], 1)])
+        with self.assertRaises(CheckoutError):
+            self.checkout(promo_code='sale')
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.stock(), [5] * 10)
+
+    def test_promo_use_released_on_rollback(self):
+        promo = PromoCode.objects.create(code='SALE', value=Decimal('10'), max_uses=1)
+        self.fill_cart([(self.products[0], 6)])
+        with self.assertRaises(CheckoutError):
+            self.checkout(promo_code='SALE')
+        promo.refresh_from_db()
+        self.assertEqual(promo.used_count, 0)
+
+    def test_promo_use_released_on_cancel(self):
+        promo = PromoCode.objects.create(code='SALE', value=Decimal('10'), max_uses=1)
+        self.fill_cart([(self.products[0], 1)])
+        order = self.checkout(promo_code='SALE')
+        promo.refresh_from_db()
+        self.assertEqual(promo.used_count, 1)
+        self.assertEqual(order.discount, Decimal('1.00'))
+
+        cancel_order(order)
+        promo.refresh_from_db()
+        self.assertEqual(promo.used_count, 0)
+        with self.assertRaises(CheckoutError):
+            cancel_order(order)
+
+        # Освободившееся использование снова доступно
+        self.fill_cart([(self.products[1], 1)])
+        self.checkout(promo_code='SALE')
+        promo.refresh_from_db()
+        self.assertEqual(promo.used_count, 1)
 
-# Create your tests here.
+    def test_query_count_does_not_grow_with_cart_size(self):
+        # Первый заказ прогревает кэши (настройки, кампании), дальше число запросов постоянно
+        self.fill_cart([(self.products[0], 1)])
+        self.checkout()
+        self.fill_cart([(self.products[1], 1)])
+        with CaptureQueriesContext(connection) as single:
+            self.checkout()
+        self.fill_cart([(product, 1) for product in self.products])
+        with self.assertNumQueries(len(single.captured_queries)):
+            self.checkout()
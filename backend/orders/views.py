@@ -1,61 +1,53 @@
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Prefetch
 from .models import Order, OrderItem
 from .serializers import OrderSerializer
-from cart.models import Cart, CartItem
+from .services import cancel_order, checkout, order_with_items, CheckoutError
+from shop.pagination import CatalogPagination
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(viewsets.ReadOnlyModelViewSet):
+    """Заказы пользователя: просмотр, оформление (create_order) и отмена (cancel); правка — только в админке."""
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CatalogPagination
+    keyset_orderings = {
+        '-id': ('-id',),
+        'id': ('id',),
+    }
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        items = OrderItem.objects.select_related('product__category', 'product__brand')
+        return (
+            Order.objects.filter(user=self.request.user)
+            .order_by('-created_at', '-id')
+            .prefetch_related(Prefetch('items', queryset=items))
+        )
 
     @action(detail=False, methods=['post'])
     def create_order(self, request):
-        # Получаем данные из запроса
-        address = request.data.get('address')
-        phone = request.data.get('phone')
-        delivery_method = request.data.get('delivery_method', 'courier')
-        payment_method = request.data.get('payment_method', 'cash')
-        comment = request.data.get('comment', '')
-        
-        # Получаем корзину пользователя
         try:
-            cart = Cart.objects.get(user=request.user)
-        except Cart.DoesNotExist:
-            return Response({'error': 'Корзина не найдена'}, status=400)
-        
-        # Проверяем, что корзина не пуста
-        if not cart.items.exists():
-            return Response({'error': 'Корзина пуста'}, status=400)
-
-        # Создаем заказ
-        order = Order.objects.create(
-            user=request.user, 
-            address=address,
-            phone=phone,
-            delivery_method=delivery_method,
-            payment_method=payment_method,
-            comment=comment,
-            status='pending'
-        )
-        
-        # Переносим товары из корзины в заказ
-        for item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.price
+            order = checkout(
+                request.user,
+                address=request.data.get('address'),
+                phone=request.data.get('phone'),
+                delivery_method=request.data.get('delivery_method', 'courier'),
+                payment_method=request.data.get('payment_method', 'cash'),
+                comment=request.data.get('comment', ''),
+                promo_code=request.data.get('promo_code'),
             )
-        
-        # Рассчитываем общую сумму заказа
-        order.calculate_total()
-        
-        # Очищаем корзину
-        cart.items.all().delete()
-        
-        return Response(OrderSerializer(order).data)
+        except CheckoutError as e:
+            return Response({'error': e.message}, status=e.status)
+
+        return Response(OrderSerializer(order_with_items(order.pk)).data)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        order = self.get_object()
+        try:
+            cancel_order(order)
+        except CheckoutError as e:
+            return Response({'error': e.message}, status=e.status)
+        return Response(OrderSerializer(order_with_items(order.pk)).data, status=status.HTTP_200_OK)
@@ -1,94 +1,261 @@
 """
-Кастомная главная админки со статистикой, отчёты (продажи, топ товаров).
+Кастомная главная админки со статистикой, отчёты (продажи, топ товаров, выгрузки).
 """
-from django.contrib import admin
+import logging
+import os
+import tempfile
+from datetime import datetime
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db import DatabaseError
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import path, reverse
 from django.utils import timezone
-from django.db.models import Sum, Count, F
-from django.urls import path
-from django.shortcuts import render
+
+from .db_routing import use_replica
+
+logger = logging.getLogger(__name__)
+
+# Права для импорта прайс-листа: он создаёт товары и меняет цены и остатки
+IMPORT_PERMISSIONS = ('catalog.add_product', 'catalog.change_product')
+
+
+def _on_replica(request, rows):
+    """Потоковый ответ читается уже после выхода из view — реплику выбираем внутри генератора."""
+    with use_replica(request):
+        yield from rows
 
 
 class CustomAdminSite(admin.AdminSite):
+    # Своё имя шаблона: admin/index.html из django.contrib.admin стоит раньше в INSTALLED_APPS и перекрывал бы наш
+    index_template = 'admin/dashboard.html'
+
     def index(self, request, extra_context=None):
         extra_context = extra_context or {}
-        today = timezone.now().date()
-        week_ago = today - timezone.timedelta(days=7)
-        try:
-            from orders.models import Order
-            extra_context['orders_today'] = Order.objects.filter(created_at__date=today).count()
-            extra_context['orders_week'] = Order.objects.filter(created_at__date__gte=week_ago).count()
-            rev_today = Order.objects.filter(created_at__date=today).aggregate(Sum('total_price'))['total_price__sum']
-            rev_week = Order.objects.filter(created_at__date__gte=week_ago).aggregate(Sum('total_price'))['total_price__sum']
-            extra_context['revenue_today'] = rev_today or 0
-            extra_context['revenue_week'] = rev_week or 0
-        except Exception:
-            extra_context['orders_today'] = extra_context['orders_week'] = 0
-            extra_context['revenue_today'] = extra_context['revenue_week'] = 0
+        # Показатели из дневной сводки продаж (core.rollups): несколько строк вместо агрегатов по заказам,
+        # чтение — с реплики, если она настроена (shop.db_routing)
         try:
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            extra_context['users_week'] = User.objects.filter(date_joined__date__gte=week_ago).count()
-        except Exception:
-            extra_context['users_week'] = 0
-        try:
-            from catalog.models import Product
-            extra_context['zero_stock'] = Product.objects.filter(stock=0).count()
-        except Exception:
-            extra_context['zero_stock'] = 0
+            from core.rollups import dashboard_stats
+            with use_replica(request):
+                extra_context.update(dashboard_stats())
+        except DatabaseError:
+            logger.exception('Не удалось прочитать дневную сводку продаж')
+            extra_context.update({
+                'orders_today': 0, 'orders_week': 0, 'revenue_today': 0,
+                'revenue_week': 0, 'users_week': 0, 'zero_stock': 0,
+            })
         return super().index(request, extra_context)
 
     def get_urls(self):
         urls = super().get_urls()
         custom = [
             path('reports/', self.admin_view(self.reports_view), name='reports'),
+            path('reports/export/', self.admin_view(self.report_export_view), name='reports_export'),
+            path('reports/jobs/<int:job_id>/', self.admin_view(self.report_job_view), name='report_job'),
+            path(
+                'reports/jobs/<int:job_id>/download/',
+                self.admin_view(self.report_job_download_view),
+                name='report_job_download',
+            ),
+            path('catalog-cache/', self.admin_view(self.catalog_cache_view), name='catalog_cache'),
+            path('catalog-import/', self.admin_view(self.catalog_import_view), name='catalog_import'),
+            path('profiles/', self.admin_view(self.profiles_view), name='profiles'),
+            path('profiles/<str:name>', self.admin_view(self.profile_download_view), name='profile_download'),
         ]
         return custom + urls
 
     def reports_view(self, request):
-        from orders.models import Order
-        from orders.models import OrderItem
+        """
+        Сводка за период из дневной сводки и топ товаров (SQL). Период длиннее
+        reports.SYNC_MAX_DAYS или кнопка «в фоне» — отчёт строится фоновым заданием.
+        """
+        from core import reports
+        from core.models import ReportJob
 
-        date_from = request.GET.get('date_from') or request.POST.get('date_from')
-        date_to = request.GET.get('date_to') or request.POST.get('date_to')
-        revenue = None
-        orders_count = 0
+        params = request.POST if request.method == 'POST' else request.GET
+        date_from = params.get('date_from')
+        date_to = params.get('date_to')
+        top_by = params.get('by') or 'quantity'
+        summary = None
         top_products = []
 
-        if date_from and date_to:
+        if date_from or date_to:
             try:
-                from datetime import datetime
-                from django.utils.dateparse import parse_date
-                d_from = parse_date(date_from)
-                d_to = parse_date(date_to)
-                if d_from and d_to:
-                    qs = Order.objects.filter(
-                        created_at__date__gte=d_from,
-                        created_at__date__lte=d_to,
-                    )
-                    rev = qs.aggregate(Sum('total_price'))['total_price__sum']
-                    revenue = rev or 0
-                    orders_count = qs.count()
-                    # Топ товаров по количеству проданных единиц за период
-                    top_products = (
-                        OrderItem.objects.filter(order__created_at__date__gte=d_from, order__created_at__date__lte=d_to)
-                        .values('product__name', 'product_id')
-                        .annotate(total_qty=Sum('quantity'), total_revenue=Sum(F('price') * F('quantity')))
-                        .order_by('-total_qty')[:20]
-                    )
-            except Exception:
-                pass
+                d_from, d_to = reports.parse_range(date_from, date_to)
+                if request.method == 'POST' or reports.range_days(d_from, d_to) > reports.SYNC_MAX_DAYS:
+                    kind = params.get('kind') or 'summary'
+                    if kind not in dict(ReportJob.KIND_CHOICES):
+                        raise reports.ReportError('Неизвестный тип отчёта.')
+                    job = reports.start_job(kind, d_from, d_to, request.user)
+                    return redirect('admin:report_job', job_id=job.pk)
+                with use_replica(request):
+                    summary = reports.sales_summary(d_from, d_to)
+                    top_products = reports.top_products(d_from, d_to, by=top_by)
+            except reports.ReportError as exc:
+                messages.error(request, str(exc))
 
         context = {
             **self.each_context(request),
             'title': 'Отчёты',
             'date_from': date_from,
             'date_to': date_to,
-            'revenue': revenue,
-            'orders_count': orders_count,
+            'by': top_by,
+            'summary': summary,
             'top_products': top_products,
+            'jobs': ReportJob.objects.select_related('created_by')[:10],
+            'sync_max_days': reports.SYNC_MAX_DAYS,
             'opts': None,
         }
         return render(request, 'admin/reports.html', context)
 
+    def report_export_view(self, request):
+        """Выгрузка строк заказов за период: CSV отдаётся потоком, XLSX — через временный файл."""
+        from core import reports
+
+        fmt = request.GET.get('format') or 'csv'
+        try:
+            d_from, d_to = reports.parse_range(request.GET.get('date_from'), request.GET.get('date_to'))
+            filename = reports.export_filename(d_from, d_to, fmt)
+            if fmt == 'csv':
+                response = StreamingHttpResponse(
+                    _on_replica(request, reports.iter_csv(reports.iter_order_lines(d_from, d_to))),
+                    content_type='text/csv; charset=utf-8',
+                )
+                response['Content-Disposition'] = f'attachment; filename="{filename}"'
+                return response
+            if fmt == 'xlsx':
+                tmp = tempfile.TemporaryFile()
+                with use_replica(request):
+                    reports.write_xlsx(reports.iter_order_lines(d_from, d_to), tmp)
+                tmp.seek(0)
+                return FileResponse(tmp, as_attachment=True, filename=filename)
+            raise reports.ReportError('Формат выгрузки: csv или xlsx.')
+        except reports.ReportError as exc:
+            messages.error(request, str(exc))
+            return redirect('admin:reports')
+
+    def report_job_view(self, request, job_id):
+        """Статус фонового отчёта: HTML-страница (обновляется сама) или JSON по ?format=json."""
+        from core.models import ReportJob
+
+        job = get_object_or_404(ReportJob, pk=job_id)
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'id': job.pk,
+                'kind': job.kind,
+                'status': job.status,
+                'rows': job.rows,
+                'result': job.result,
+                'error': job.error,
+                'download_url': reverse('admin:report_job_download', args=[job.pk]) if job.file else None,
+            })
+        context = {
+            **self.each_context(request),
+            'title': f'Отчёт #{job.pk}',
+            'job': job,
+            'opts': None,
+        }
+        return render(request, 'admin/report_job.html', context)
+
+    def report_job_download_view(self, request, job_id):
+        from core.models import ReportJob
+
+        job = get_object_or_404(ReportJob, pk=job_id, status='done')
+        if not job.file:
+            raise Http404('У отчёта нет файла.')
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=os.path.basename(job.file.name))
+
+    def catalog_import_view(self, request):
+        """
+        Загрузка прайс-листа поставщика (catalog.importer). Файл сначала пишется во временный
+        файл по частям, импорт идёт потоково; по умолчанию — пробный прогон с разницей.
+        """
+        from catalog import importer
+
+        if not request.user.has_perms(IMPORT_PERMISSIONS):
+            raise PermissionDenied
+
+        context = {**self.each_context(request), 'title': 'Импорт прайс-листа', 'opts': None}
+        upload = request.FILES.get('file') if request.method == 'POST' else None
+        if request.method == 'POST' and upload is None:
+            messages.error(request, 'Выберите файл.')
+        elif upload is not None:
+            dry_run = bool(request.POST.get('dry_run'))
+            try:
+                fmt = importer.detect_format(upload.name)
+                with tempfile.TemporaryFile() as tmp:
+                    for chunk in upload.chunks():
+                        tmp.write(chunk)
+                    tmp.seek(0)
+                    stats = importer.import_file(
+                        tmp, fmt,
+                        dry_run=dry_run,
+                        create_missing=not request.POST.get('no_create'),
+                        comment=f'Импорт {upload.name}',
+                    )
+            except importer.ImportFileError as exc:
+                messages.error(request, str(exc))
+            else:
+                context.update(stats=stats, dry_run=dry_run, filename=upload.name)
+        return render(request, 'admin/catalog_import.html', context)
+
+    def catalog_cache_view(self, request):
+        """Счётчики кэша ответов каталога (JSON для мониторинга); POST с clear=1 очищает кэш."""
+        from catalog.response_cache import get_backend
+
+        backend = get_backend()
+        if request.method == 'POST' and request.POST.get('clear'):
+            backend.clear()
+            backend.reset_counters()
+        return JsonResponse(backend.stats())
+
+    def profiles_view(self, request):
+        """
+        Профили view (shop.profiling): переключатель профилирования на N минут, сброс накопленного
+        и список файлов.
+        """
+        from shop import profiling
+
+        if request.method == 'POST':
+            action = request.POST.get('action')
+            if action == 'enable':
+                try:
+                    minutes = max(1, min(int(request.POST.get('minutes') or 10), 24 * 60))
+                except ValueError:
+                    minutes = 10
+                views = [v.strip() for v in (request.POST.get('views') or '').split(',')]
+                profiling.enable(minutes, views, request.POST.get('engine'))
+                messages.success(request, f'Профилирование включено на {minutes} мин.')
+            elif action == 'disable':
+                profiling.disable()
+                messages.success(request, 'Профилирование выключено.')
+            elif action == 'flush':
+                written = profiling.aggregator.flush()
+                messages.success(request, f'Записано профилей: {len(written)} (накопленные в этом процессе).')
+            return redirect('admin:profiles')
+
+        toggle = profiling.toggle_state()
+        context = {
+            **self.each_context(request),
+            'title': 'Профили',
+            'toggle': toggle,
+            'toggle_until': datetime.fromtimestamp(toggle['until'], tz=timezone.get_current_timezone()) if toggle else None,
+            'options': profiling.options(),
+            'engines': profiling.ENGINES,
+            'profiles': profiling.list_profiles(),
+            'opts': None,
+        }
+        return render(request, 'admin/profiles.html', context)
+
+    def profile_download_view(self, request, name):
+        from shop import profiling
+
+        path = profiling.profile_path(name)
+        if path is None:
+            raise Http404('Профиль не найден.')
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
+
 
 custom_admin_site = CustomAdminSite(name='admin')
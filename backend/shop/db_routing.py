@@ -0,0 +1,194 @@
+"""
+Чтение с реплики: каталог (GET /api/catalog/...), главная админки и отчёты читают из базы
+REPLICA_DB_ALIAS, все записи и остальные чтения идут в основную (default).
+
+- Что читать с реплики, решает middleware (по пути и методу запроса) или явный блок use_replica().
+- После собственной записи клиент несколько секунд (DATABASE_REPLICA_STICKY_SECONDS) читает
+  с основной базы — чтобы сразу видеть свой отзыв, корзину и заказ, несмотря на отставание реплики.
+  Клиент с JWT узнаётся по id пользователя из токена (отметка переживает обновление токена),
+  иначе — по заголовку Authorization или cookie сессии. Отметка хранится в общем кэше Django
+  (CACHES, см. CACHE_BACKEND) — её видят все воркеры; cookie — запасной путь для того же домена.
+- Внутри открытой транзакции на основной базе чтение тоже идёт в основную.
+Если реплика не настроена (нет алиаса в DATABASES), роутер ничего не меняет.
+"""
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+STICKY_COOKIE = 'db_primary'
+
+# None — решение по умолчанию (основная база), 'replica' / 'primary' — явный выбор
+_read_target = ContextVar('db_read_target', default=None)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def sticky_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 5)
+
+
+@contextmanager
+def use_replica(request=None):
+    """
+    Чтения внутри блока идут на реплику (если она настроена). Если передан request и клиент
+    недавно писал, чтения остаются в основной базе.
+    """
+    token = _read_target.set('primary' if request is not None and _is_sticky(request) else 'replica')
+    try:
+        yield
+    finally:
+        _read_target.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Чтения внутри блока идут в основную базу, даже если снаружи выбрана реплика."""
+    token = _read_target.set('primary')
+    try:
+        yield
+    finally:
+        _read_target.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _read_target.get() != 'replica' or not replica_configured():
+            return None
+        # Кэш в базе (CACHE_BACKEND=db) читается с основной: на реплике отметки приходят с отставанием
+        if model._meta.app_label == 'django_cache':
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплики приходит с основной базы репликацией
+        if db == REPLICA_DB_ALIAS:
+            return False
+        return None
+
+
+def _jwt_user_id(authorization):
+    """id пользователя из действительного access-токена Bearer или None."""
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    scheme, _, raw = authorization.partition(' ')
+    if scheme not in api_settings.AUTH_HEADER_TYPES or not raw:
+        return None
+    try:
+        return AccessToken(raw.strip()).get(api_settings.USER_ID_CLAIM)
+    except TokenError:
+        return None
+
+
+def _client_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if authorization:
+        user_id = _jwt_user_id(authorization)
+        if user_id is not None:
+            return f'db-sticky:user:{user_id}'
+    identity = authorization or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not identity:
+        return None
+    return 'db-sticky:' + hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+
+def _is_sticky(request):
+    if request.COOKIES.get(STICKY_COOKIE):
+        return True
+    key = _client_key(request)
+    return key is not None and cache.get(key) is not None
+
+
+async def _ais_sticky(request):
+    if request.COOKIES.get(STICKY_COOKIE):
+        return True
+    key = _client_key(request)
+    return key is not None and await cache.aget(key) is not None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Безопасные запросы (GET/HEAD/OPTIONS) к путям DATABASE_REPLICA_PATHS читают с реплики,
+    если клиент недавно ничего не записывал. Успешный небезопасный запрос помечает клиента
+    «липким» к основной базе на DATABASE_REPLICA_STICKY_SECONDS.
+    Работает и под ASGI: выбор базы живёт в ContextVar, который sync_to_async копирует в поток ORM.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = tuple(getattr(settings, 'DATABASE_REPLICA_PATHS', ('/api/catalog/',)))
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        safe = request.method in ('GET', 'HEAD', 'OPTIONS')
+        target = None
+        if self._routed(request, safe):
+            target = 'primary' if _is_sticky(request) else 'replica'
+        token = _read_target.set(target)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_target.reset(token)
+        if self._marks_sticky(safe, response):
+            key = _client_key(request)
+            if key is not None:
+                cache.set(key, 1, sticky_seconds())
+            self._set_cookie(response)
+        return response
+
+    async def __acall__(self, request):
+        safe = request.method in ('GET', 'HEAD', 'OPTIONS')
+        target = None
+        if self._routed(request, safe):
+            target = 'primary' if await _ais_sticky(request) else 'replica'
+        token = _read_target.set(target)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_target.reset(token)
+        if self._marks_sticky(safe, response):
+            key = _client_key(request)
+            if key is not None:
+                await cache.aset(key, 1, sticky_seconds())
+            self._set_cookie(response)
+        return response
+
+    def _routed(self, request, safe):
+        return safe and replica_configured() and request.path.startswith(self.paths)
+
+    @staticmethod
+    def _marks_sticky(safe, response):
+        return not safe and response.status_code < 400 and replica_configured()
+
+    @staticmethod
+    def _set_cookie(response):
+        response.set_cookie(STICKY_COOKIE, '1', max_age=sticky_seconds(), httponly=True, samesite='Lax')
@@ -0,0 +1,338 @@
+"""
+Метрики запросов: где уходит время.
+
+RequestMetricsMiddleware для каждого запроса считает общее время и статус (это дёшево).
+Для доли запросов REQUEST_METRICS['SAMPLE_RATE'] дополнительно собирается разбивка:
+- время и число SQL-запросов по всем соединениям (connection.execute_wrapper; под ASGI — и запросы
+  асинхронного ORM из потоков sync_to_async, куда копируется контекст запроса);
+- повторяющиеся запросы по отпечатку SQL (литералы и списки IN свёрнуты) — так видны N+1;
+- время сериализаторов DRF (внешний вызов .data, вложенные не суммируются).
+
+Куда уходит:
+- заголовок Server-Timing (total всегда, db / serializer — у выбранных запросов);
+- структурный лог (JSON одной строкой) в логгер shop.requests — выбранные и медленные запросы;
+- текстовый формат Prometheus на /metrics: счётчики по view_name и счётчики кэша ответов каталога.
+Счётчики живут в памяти процесса: при нескольких воркерах у каждого свои.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger('shop.requests')
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.05,
+    'SLOW_MS': 1000,
+    'SERVER_TIMING': True,
+    'TOKEN': '',
+    'DUPLICATES_IN_LOG': 5,
+}
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+EXCLUDED_PATHS = ('/metrics',)
+
+_current = ContextVar('request_metrics', default=None)
+
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def options():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_METRICS', {})}
+
+
+def fingerprint(sql):
+    """SQL без значений: одинаковые по форме запросы с разными параметрами дают один отпечаток."""
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _PLACEHOLDER_LISTS.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    """Разбивка одного выбранного запроса."""
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.fingerprints = Counter()
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        """[(отпечаток, сколько раз)] для запросов, выполненных больше одного раза, — самые частые первыми."""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n > 1]
+
+    def duplicate_count(self):
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+
+def current():
+    """Метрики текущего запроса, если он выбран для разбивки (иначе None)."""
+    return _current.get()
+
+
+class _Registry:
+    """Счётчики для /metrics: {(имя, метки): значение} и гистограмма длительности."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counters = Counter()
+        self.histograms = {}
+
+    def observe(self, view, method, status, duration, metrics):
+        with self.lock:
+            self.counters['requests', (view, method, str(status))] += 1
+            buckets, total = self.histograms.get(view) or ([0] * len(DURATION_BUCKETS), [0, 0.0])
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[i] += 1
+            total[0] += 1
+            total[1] += duration
+            self.histograms[view] = (buckets, total)
+            if metrics is not None:
+                labels = (view,)
+                self.counters['sampled', labels] += 1
+                self.counters['db_seconds', labels] += metrics.db_time
+                self.counters['queries', labels] += metrics.queries
+                self.counters['duplicate_queries', labels] += metrics.duplicate_count()
+                self.counters['serializer_seconds', labels] += metrics.serializer_time
+
+    def snapshot(self):
+        with self.lock:
+            histograms = {view: (list(b), list(t)) for view, (b, t) in self.histograms.items()}
+            return Counter(self.counters), histograms
+
+
+registry = _Registry()
+
+COUNTER_HELP = {
+    'requests': ('shop_http_requests_total', 'Запросы по view, методу и статусу', ('view', 'method', 'status')),
+    'sampled': ('shop_http_sampled_requests_total', 'Запросы с разбивкой (выборка)', ('view',)),
+    'db_seconds': ('shop_http_db_seconds_total', 'Время SQL в выбранных запросах', ('view',)),
+    'queries': ('shop_http_queries_total', 'SQL-запросов в выбранных запросах', ('view',)),
+    'duplicate_queries': ('shop_http_duplicate_queries_total', 'Повторных SQL-запросов (N+1)', ('view',)),
+    'serializer_seconds': ('shop_http_serializer_seconds_total', 'Время сериализаторов DRF', ('view',)),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+def render_prometheus():
+    """Текстовый формат экспозиции Prometheus (version 0.0.4)."""
+    counters, histograms = registry.snapshot()
+    lines = []
+    for key, (name, help_text, label_names) in COUNTER_HELP.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (kind, values), value in sorted(counters.items()):
+            if kind == key:
+                lines.append(f'{name}{_labels(label_names, values)} {value}')
+
+    name = 'shop_http_request_duration_seconds'
+    lines += [f'# HELP {name} Длительность запроса', f'# TYPE {name} histogram']
+    for view, (buckets, (count, total)) in sorted(histograms.items()):
+        for bound, value in zip(DURATION_BUCKETS, buckets):
+            lines.append(f'{name}_bucket{_labels(("view", "le"), (view, f"{bound:g}"))} {value}')
+        lines.append(f'{name}_bucket{_labels(("view", "le"), (view, "+Inf"))} {count}')
+        lines.append(f'{name}_sum{_labels(("view",), (view,))} {total}')
+        lines.append(f'{name}_count{_labels(("view",), (view,))} {count}')
+
+    lines += _response_cache_lines()
+    return '\n'.join(lines) + '\n'
+
+
+def _response_cache_lines():
+    from catalog.response_cache import COUNTERS, get_backend
+
+    try:
+        stats = get_backend().stats()
+    except Exception:  # недоступный Redis не должен ронять /metrics
+        logger.warning('Счётчики кэша ответов каталога недоступны', exc_info=True)
+        return []
+    lines = []
+    for counter in COUNTERS:
+        name = f'shop_catalog_cache_{counter}_total'
+        lines += [f'# TYPE {name} counter', f'{name} {stats[counter]}']
+    for gauge in ('entries', 'bytes'):
+        name = f'shop_catalog_cache_{gauge}'
+        lines += [f'# TYPE {name} gauge', f'{name} {stats[gauge]}']
+    return lines
+
+
+def metrics_view(request):
+    """
+    /metrics для Prometheus. С REQUEST_METRICS['TOKEN'] нужен заголовок Authorization: Bearer <token>,
+    без токена — только сотрудники (сессия админки).
+    """
+    token = options()['TOKEN']
+    if token:
+        allowed = constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        return HttpResponse('Forbidden\n', status=403, content_type='text/plain; charset=utf-8')
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _execute(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def _install(sender=None, connection=None, **kwargs):
+    # В начало списка: чужие execute_wrapper() снимают свою обёртку pop()-ом с конца
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _execute)
+
+
+def instrument_connections():
+    """
+    Постоянная обёртка execute на каждом соединении (в любом потоке): пишет в метрики
+    текущего запроса из ContextVar, без выбранного запроса — только проверка ContextVar.
+    """
+    connection_created.connect(_install, dispatch_uid='shop.instrumentation')
+    for alias in connections:
+        _install(connection=connections[alias])
+
+
+def instrument_serializers():
+    """Оборачивает свойство .data сериализаторов DRF: время внешнего вызова идёт в метрики запроса."""
+    from rest_framework import serializers
+
+    for cls in (serializers.BaseSerializer, serializers.Serializer, serializers.ListSerializer):
+        prop = cls.__dict__.get('data')
+        if prop is None or getattr(prop.fget, 'instrumented', False):
+            continue
+        setattr(cls, 'data', property(_timed_data(prop.fget)))
+
+
+def _timed_data(fget):
+    def data(self):
+        metrics = _current.get()
+        if metrics is None:
+            return fget(self)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - started
+
+    data.instrumented = True
+    return data
+
+
+class RequestMetricsMiddleware:
+    """Ставится первым: время считается вместе со всеми остальными middleware. Работает под WSGI и ASGI."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        instrument_serializers()
+        instrument_connections()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if request.path.startswith(EXCLUDED_PATHS):
+            return self.get_response(request)
+        opts = options()
+        metrics = RequestMetrics() if random.random() < opts['SAMPLE_RATE'] else None
+        started = time.perf_counter()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, time.perf_counter() - started, metrics, opts)
+
+    async def __acall__(self, request):
+        if request.path.startswith(EXCLUDED_PATHS):
+            return await self.get_response(request)
+        opts = options()
+        metrics = RequestMetrics() if random.random() < opts['SAMPLE_RATE'] else None
+        started = time.perf_counter()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, time.perf_counter() - started, metrics, opts)
+
+    def _finish(self, request, response, duration, metrics, opts):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        registry.observe(view, request.method, response.status_code, duration, metrics)
+        if opts['SERVER_TIMING']:
+            response['Server-Timing'] = server_timing(duration, metrics)
+        if metrics is not None or duration * 1000 >= opts['SLOW_MS']:
+            self._log(request, response, view, duration, metrics, opts)
+        return response
+
+    @staticmethod
+    def _log(request, response, view, duration, metrics, opts):
+        record = {
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'sampled': metrics is not None,
+        }
+        if metrics is not None:
+            record.update(
+                db_ms=round(metrics.db_time * 1000, 2),
+                queries=metrics.queries,
+                duplicate_queries=metrics.duplicate_count(),
+                serializer_ms=round(metrics.serializer_time * 1000, 2),
+                duplicates=[{'sql': sql[:300], 'count': n} for sql, n in metrics.duplicates()[:opts['DUPLICATES_IN_LOG']]],
+            )
+        logger.info(json.dumps(record, ensure_ascii=False))
+
+
+def server_timing(duration, metrics=None):
+    parts = [f'total;dur={duration * 1000:.1f}']
+    if metrics is not None:
+        parts.append(f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"')
+        parts.append(f'serializer;dur={metrics.serializer_time * 1000:.1f}')
+    return ', '.join(parts)
@@ -0,0 +1,229 @@
+"""
+Пагинация API: постраничная (как раньше) и keyset-пагинация по курсору.
+
+Keyset-режим включается параметром ?pagination=cursor (или наличием ?cursor=...).
+Страница выбирается условием WHERE по ключу сортировки последней строки
+(например, price > x OR (price = x AND id > y)), поэтому время выборки не зависит
+от глубины страницы: нет ни OFFSET, ни COUNT(*).
+"""
+import base64
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+COUNT_CACHE_TIMEOUT = 60  # секунд
+
+
+def cached_count(queryset):
+    """COUNT(*) запроса, закэшированный по тексту SQL на COUNT_CACHE_TIMEOUT секунд."""
+    key = 'pagination-count:' + hashlib.md5(str(queryset.query).encode('utf-8')).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+async def acached_count(queryset):
+    """cached_count для async-view: асинхронный кэш и acount()."""
+    key = 'pagination-count:' + hashlib.md5(str(queryset.query).encode('utf-8')).hexdigest()
+    count = await cache.aget(key)
+    if count is None:
+        count = await queryset.acount()
+        await cache.aset(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который не пересчитывает COUNT(*) на каждой странице."""
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        return cached_count(self.object_list)
+
+
+class CachedCountPageNumberPagination(PageNumberPagination):
+    django_paginator_class = CachedCountPaginator
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset-пагинация. Допустимые сортировки задаются во view атрибутом keyset_orderings:
+    {'price': ('price', 'id'), '-price': ('-price', '-id'), ...}; выбирается параметром ?ordering=.
+    Последний ключ должен быть уникальным (обычно id) — иначе порядок не стабилен.
+    Общее количество (count) считается только по запросу ?with_count=1 и кэшируется.
+    """
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    page_size_query_param = 'page_size'
+    count_query_param = 'with_count'
+    max_page_size = 500
+    default_orderings = {'id': ('id',)}
+    invalid_cursor_message = 'Недействительный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        orderings = getattr(view, 'keyset_orderings', None) or self.default_orderings
+        default_key = getattr(view, 'keyset_default_ordering', None) or next(iter(orderings))
+
+        position, reverse, ordering_key = None, False, None
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            position, reverse, ordering_key = self.decode_cursor(encoded)
+        ordering_key = ordering_key or request.query_params.get(self.ordering_query_param) or default_key
+        if ordering_key not in orderings:
+            raise NotFound('Недопустимая сортировка.')
+        self.ordering_key = ordering_key
+        self.ordering = orderings[ordering_key]
+        if position is not None:
+            position = self._clean_position(queryset.model, position)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = cached_count(queryset)
+
+        order = [self._invert(f) for f in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*order)
+        if position is not None:
+            queryset = queryset.filter(self._after(order, position))
+
+        # +1 строка, чтобы узнать, есть ли следующая страница, без COUNT
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, ''))
+        except ValueError:
+            size = 0
+        if size <= 0:
+            size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 100
+        return min(size, self.max_page_size)
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _after(order, position):
+        """Условие «строго после position» для составного ключа сортировки."""
+        condition = Q()
+        for i, field in enumerate(order):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': position[i]})
+            for j, prev in enumerate(order[:i]):
+                step &= Q(**{prev.lstrip('-'): position[j]})
+            condition |= step
+        return condition
+
+    def _clean_position(self, model, position):
+        """Значения курсора по полям сортировки: ровно по одному, не null, в типе поля."""
+        if not isinstance(position, list) or len(position) != len(self.ordering) or None in position:
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                model._meta.get_field(field.lstrip('-')).clean(value, None)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _position(self, row):
+        values = []
+        for field in self.ordering:
+            value = getattr(row, field.lstrip('-'))
+            values.append(str(value) if isinstance(value, Decimal) else value)
+        return values
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse), 'o': self.ordering_key}, default=str)
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, encoded):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position, reverse, ordering_key = payload['p'], bool(payload.get('r')), payload.get('o')
+        except (ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering_key is not None and not isinstance(ordering_key, str):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse, ordering_key
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self._position(self.page[-1]), False)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self._position(self.page[0]), True)
+        )
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+
+class CatalogPagination(BasePagination):
+    """
+    Постраничная пагинация по умолчанию (совместимо с текущим фронтендом, COUNT кэшируется)
+    и keyset-режим по ?pagination=cursor или ?cursor=...
+    """
+
+    def __init__(self):
+        self.page_number = CachedCountPageNumberPagination()
+        self.keyset = KeysetPagination()
+        self.active = self.page_number
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if params.get('pagination') == 'cursor' or params.get(KeysetPagination.cursor_query_param):
+            self.active = self.keyset
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    @property
+    def display_page_controls(self):
+        return self.active is self.page_number and self.page_number.display_page_controls
+
+    def to_html(self):
+        return self.page_number.to_html()
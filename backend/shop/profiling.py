@@ -0,0 +1,481 @@
+"""
+Профилирование горячих view по запросу.
+
+Когда профилируется запрос:
+- заголовок X-Profile — со значением PROFILING['TOKEN'] (если задан), от сотрудника с сессией
+  или при DEBUG; профиль этого запроса пишется отдельным файлом, имя — в заголовке ответа
+  X-Profile-File; движок можно выбрать заголовком X-Profile-Engine;
+- переключатель в админке (/admin/profiles/) — на N минут для выбранных view, общий для всех
+  процессов через кэш Django (нужен общий CACHES, см. CACHE_BACKEND);
+- постоянно с вероятностью PROFILING['SAMPLE_RATE'] для view из PROFILING['VIEWS'].
+Профили переключателя и постоянной выборки копятся в памяти по view и сбрасываются
+в файл раз в PROFILING['FLUSH_SECONDS'].
+
+Движки:
+- sample — поток-сэмплер раз в INTERVAL_MS снимает стек профилируемого потока
+  (sys._current_frames); файл .folded — «свёрнутые» стеки (стек;через;точку_с_запятой число),
+  формат flamegraph.pl, speedscope, inferno. Частоту ограничивает и переключение GIL (5 мс),
+  поэтому короткий одиночный запрос даёт лишь несколько сэмплов — картину дают накопленные профили;
+- cprofile — cProfile, файл .prof (pstats): snakeviz, flameprof, gprof2dot.
+
+Файлы лежат в PROFILING_ROOT; хранится не больше MAX_FILES последних.
+View — имя маршрута (view_name): products-list, orders-create-order, ...
+
+Профиль снимается в потоке, где выполняется view. Под ASGI sync-view (DRF) работает в потоке
+sync_to_async — там профиль и снимается вместе с рендерингом ответа (через process_view);
+async-view — в потоке цикла событий: там одновременно профилируется один запрос,
+и в профиль попадают соседние корутины.
+"""
+import cProfile
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+DEFAULTS = {
+    'ENGINE': 'sample',
+    'SAMPLE_RATE': 0.0,
+    'VIEWS': ('products-list', 'orders-create-order'),
+    'INTERVAL_MS': 2,
+    'TOKEN': '',
+    'FLUSH_SECONDS': 60,
+    'MAX_FILES': 200,
+}
+ENGINES = ('sample', 'cprofile')
+HEADER = 'HTTP_X_PROFILE'
+ENGINE_HEADER = 'HTTP_X_PROFILE_ENGINE'
+TOGGLE_KEY = 'profiling-toggle'
+TOGGLE_RECHECK = 2  # секунд: состояние переключателя кэшируется в процессе
+MAX_DEPTH = 128
+FILE_RE = re.compile(r'^[\w.-]+\.(folded|prof)$')
+
+
+def options():
+    return {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+
+def profiles_root():
+    return getattr(settings, 'PROFILING_ROOT', os.path.join(settings.BASE_DIR, 'profiles'))
+
+
+# --- переключатель в админке ---
+
+_toggle = {'value': None, 'checked': 0.0}
+
+
+def enable(minutes, views=(), engine=None):
+    """Включает профилирование на minutes минут для views (пусто — все view)."""
+    value = {
+        'until': time.time() + minutes * 60,
+        'views': [v for v in views if v],
+        'engine': engine if engine in ENGINES else None,
+    }
+    cache.set(TOGGLE_KEY, value, int(minutes * 60) + 60)
+    _toggle['checked'] = 0.0
+    return value
+
+
+def disable():
+    cache.delete(TOGGLE_KEY)
+    _toggle['checked'] = 0.0
+
+
+def toggle_state():
+    """Текущий переключатель или None; в процессе перечитывается не чаще раза в TOGGLE_RECHECK секунд."""
+    now = time.time()
+    if now - _toggle['checked'] > TOGGLE_RECHECK:
+        _toggle['value'] = cache.get(TOGGLE_KEY)
+        _toggle['checked'] = now
+    return _active(_toggle['value'], now)
+
+
+async def atoggle_state():
+    now = time.time()
+    if now - _toggle['checked'] > TOGGLE_RECHECK:
+        _toggle['value'] = await cache.aget(TOGGLE_KEY)
+        _toggle['checked'] = now
+    return _active(_toggle['value'], now)
+
+
+def _active(value, now):
+    if value and value['until'] > now:
+        return value
+    return None
+
+
+# --- движки ---
+
+def _frame_name(code):
+    path = code.co_filename
+    for prefix in (str(settings.BASE_DIR), *sorted((p for p in sys.path if p), key=len, reverse=True)):
+        if path.startswith(prefix + os.sep):
+            path = path[len(prefix) + 1:]
+            break
+    return f'{code.co_name} ({path}:{code.co_firstlineno})'.replace(';', ',')
+
+
+class Sampler:
+    """Один поток на процесс: снимает стеки зарегистрированных потоков, пока они есть."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.targets = {}  # id потока → Counter свёрнутых стеков
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.names = {}
+
+    def start(self, thread_id):
+        stacks = Counter()
+        with self.lock:
+            self.targets[thread_id] = stacks
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+        return stacks
+
+    def stop(self, thread_id):
+        with self.lock:
+            return self.targets.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            with self.lock:
+                targets = dict(self.targets)
+            if not targets:
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            for thread_id, stacks in targets.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks[self._stack(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+    def _stack(self, frame):
+        names = []
+        while frame is not None and len(names) < MAX_DEPTH:
+            code = frame.f_code
+            name = self.names.get(code)
+            if name is None:
+                name = self.names[code] = _frame_name(code)
+            names.append(name)
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = Sampler(options()['INTERVAL_MS'] / 1000)
+    return _sampler
+
+
+_busy_threads = set()
+_busy_lock = threading.Lock()
+
+
+class Session:
+    """Профиль одного запроса: start() и stop() вызываются в потоке, который выполняет view."""
+
+    def __init__(self, view, engine, reason):
+        self.view = view
+        self.engine = engine
+        self.reason = reason
+        self.thread_id = None
+        self.result = None
+
+    @property
+    def running(self):
+        return self.thread_id is not None and self.result is None
+
+    def start(self):
+        """False — поток уже профилируется (соседний запрос в том же цикле событий)."""
+        self.thread_id = threading.get_ident()
+        with _busy_lock:
+            if self.thread_id in _busy_threads:
+                return False
+            _busy_threads.add(self.thread_id)
+        if self.engine == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            get_sampler().start(self.thread_id)
+        return True
+
+    def stop(self):
+        if self.engine == 'cprofile':
+            self.profiler.disable()
+            self.result = self.profiler
+        else:
+            self.result = get_sampler().stop(self.thread_id)
+        with _busy_lock:
+            _busy_threads.discard(self.thread_id)
+        return self.result
+
+
+# --- файлы ---
+
+def _file_name(view, engine, label):
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+    view = re.sub(r'[^\w-]+', '_', view)
+    extension = 'prof' if engine == 'cprofile' else 'folded'
+    return f'{stamp}-{view}-{label}-{os.getpid()}-{random.randrange(16 ** 4):04x}.{extension}'
+
+
+def write_profile(view, engine, result, label):
+    """Пишет профиль (Counter стеков или cProfile / pstats.Stats) в PROFILING_ROOT; возвращает имя файла."""
+    root = profiles_root()
+    os.makedirs(root, exist_ok=True)
+    name = _file_name(view, engine, label)
+    path = os.path.join(root, name)
+    tmp = f'{path}.tmp'
+    if engine == 'cprofile':
+        stats = result if isinstance(result, pstats.Stats) else pstats.Stats(result)
+        stats.dump_stats(tmp)
+    else:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for stack, count in result.most_common():
+                f.write(f'{stack} {count}\n')
+    os.replace(tmp, path)
+    rotate()
+    return name
+
+
+def rotate():
+    keep = options()['MAX_FILES']
+    files = list_profiles()
+    for entry in files[keep:]:
+        try:
+            os.remove(entry['path'])
+        except FileNotFoundError:
+            pass
+
+
+def list_profiles():
+    """Файлы профилей, новые первыми."""
+    root = profiles_root()
+    try:
+        names = [n for n in os.listdir(root) if FILE_RE.match(n)]
+    except FileNotFoundError:
+        return []
+    entries = []
+    for name in names:
+        path = os.path.join(root, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append({
+            'name': name,
+            'path': path,
+            'size': stat.st_size,
+            'modified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.get_current_timezone()),
+            'engine': 'cprofile' if name.endswith('.prof') else 'sample',
+        })
+    entries.sort(key=lambda e: e['modified'], reverse=True)
+    return entries
+
+
+def profile_path(name):
+    """Путь к файлу профиля по имени из списка или None (имя проверяется — без выхода из каталога)."""
+    if not FILE_RE.match(name):
+        return None
+    path = os.path.join(profiles_root(), name)
+    return path if os.path.isfile(path) else None
+
+
+class Aggregator:
+    """Профили переключателя и постоянной выборки: копятся по (view, движок), сбрасываются раз в FLUSH_SECONDS."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.started = time.monotonic()
+
+    def add(self, view, engine, result):
+        with self.lock:
+            key = (view, engine)
+            entry = self.pending.get(key)
+            if engine == 'cprofile':
+                if entry is None:
+                    entry = [pstats.Stats(result), 0]
+                else:
+                    entry[0].add(result)
+            else:
+                if entry is None:
+                    entry = [Counter(), 0]
+                entry[0].update(result)
+            entry[1] += 1
+            self.pending[key] = entry
+            due = time.monotonic() - self.started >= options()['FLUSH_SECONDS']
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.started = time.monotonic()
+        return [
+            write_profile(view, engine, data, f'{requests}req')
+            for (view, engine), (data, requests) in pending.items() if data
+        ]
+
+
+aggregator = Aggregator()
+
+
+# --- middleware ---
+
+class ProfilingMiddleware:
+    """
+    Ставится после AuthenticationMiddleware. Решение о профиле принимается до остальной цепочки;
+    маршрут разрешается заранее и только когда профиль возможен (заголовок, переключатель или
+    выпавшая выборка). Под WSGI профиль охватывает остальную цепочку: маршрут, view, рендеринг DRF.
+    Под ASGI — view и рендеринг в потоке view (см. _aprocess_view).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Асинхронный process_view: без профиля запрос не уходит в пул потоков
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        opts = options()
+        header = request.META.get(HEADER)
+        allowed = bool(header) and _header_allowed(request, header, opts)
+        session = self._session(request, opts, allowed, toggle_state())
+        if session is None or not session.start():
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            result = session.stop()
+        return self._finish(session, result, response)
+
+    async def __acall__(self, request):
+        opts = options()
+        header = request.META.get(HEADER)
+        allowed = bool(header) and await _aheader_allowed(request, header, opts)
+        session = self._session(request, opts, allowed, await atoggle_state())
+        if session is None:
+            return await self.get_response(request)
+        request._profiling = session
+        try:
+            response = await self.get_response(request)
+        finally:
+            if session.running:
+                session.stop()
+        if session.result is None:
+            return response
+        return self._finish(session, session.result, response)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        session = getattr(request, '_profiling', None)
+        if session is None:
+            return None
+        if iscoroutinefunction(view_func):
+            # async-view выполняется в этом потоке; stop() — в __acall__ после ответа
+            session.start()
+            return None
+        return await sync_to_async(_run_view, thread_sensitive=True)(
+            session, request, view_func, view_args, view_kwargs,
+        )
+
+    def _session(self, request, opts, header, toggle):
+        reason, engine = self._reason(request, opts, header, toggle)
+        if reason is None:
+            return None
+        return Session(_view_name(request), engine or opts['ENGINE'], reason)
+
+    @staticmethod
+    def _reason(request, opts, header, toggle):
+        if header:
+            engine = request.META.get(ENGINE_HEADER)
+            return 'header', engine if engine in ENGINES else None
+        if toggle and (not toggle['views'] or _view_name(request) in toggle['views']):
+            return 'toggle', toggle['engine']
+        if opts['SAMPLE_RATE'] and random.random() < opts['SAMPLE_RATE'] and _view_name(request) in opts['VIEWS']:
+            return 'sample', None
+        return None, None
+
+    @staticmethod
+    def _finish(session, result, response):
+        if session.reason == 'header':
+            response['X-Profile-File'] = write_profile(session.view, session.engine, result, 'request')
+        else:
+            aggregator.add(session.view, session.engine, result)
+        return response
+
+
+def _run_view(session, request, view_func, view_args, view_kwargs):
+    """
+    Sync-view под ASGI: вызывается в том же потоке sync_to_async, где его вызвал бы Django,
+    и профилируется там вместе с рендерингом ответа. None — view вызовет Django (поток занят).
+    """
+    if not session.start():
+        return None
+    try:
+        response = view_func(request, *view_args, **view_kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response = response.render()
+    finally:
+        session.stop()
+    return response
+
+
+def _view_name(request):
+    name = getattr(request, '_profiling_view', None)
+    if name is None:
+        try:
+            name = resolve(request.path_info, getattr(request, 'urlconf', None)).view_name
+        except Resolver404:
+            name = 'unmatched'
+        request._profiling_view = name
+    return name
+
+
+def _header_allowed(request, value, opts):
+    if opts['TOKEN'] and constant_time_compare(value, opts['TOKEN']):
+        return True
+    if settings.DEBUG:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+async def _aheader_allowed(request, value, opts):
+    if opts['TOKEN'] and constant_time_compare(value, opts['TOKEN']):
+        return True
+    if settings.DEBUG:
+        return True
+    user = await request.auser() if hasattr(request, 'auser') else None
+    return bool(user and user.is_authenticated and user.is_staff)
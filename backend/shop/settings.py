@@ -2,6 +2,7 @@
 from pathlib import Path
 from datetime import timedelta
 import os
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -32,12 +33,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'shop.instrumentation.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'shop.db_routing.ReplicaRoutingMiddleware',
+    'shop.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -78,13 +82,147 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'shop.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# База данных: по умолчанию SQLite (разработка), для продакшена — PostgreSQL через переменные окружения.
+# DB_ENGINE=postgresql DB_NAME=shop DB_USER=shop DB_PASSWORD=... DB_HOST=127.0.0.1 DB_PORT=5432
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite').lower()
+
+if DB_ENGINE in ('postgresql', 'postgres'):
+    # Пул соединений psycopg (DB_POOL=True) и постоянные соединения (CONN_MAX_AGE) взаимоисключающие:
+    # с пулом соединение возвращается в пул после каждого запроса.
+    DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'shop'),
+            'USER': os.getenv('DB_USER', 'shop'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', '127.0.0.1'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+            # За PgBouncer в режиме transaction серверные курсоры (.iterator()) не работают
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_PGBOUNCER', 'False') == 'True',
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+            },
+        }
+    }
+    if DB_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+        }
+    # Реплика для чтения каталога, главной админки и отчётов (shop.db_routing): DB_REPLICA_HOST и т.д.
+    if os.getenv('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+            'USER': os.getenv('DB_REPLICA_USER', DATABASES['default']['USER']),
+            'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+            'HOST': os.getenv('DB_REPLICA_HOST'),
+            'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    # SQLite: журнал WAL (чтение не ждёт записи), ожидание блокировки вместо «database is locked»,
+    # транзакции сразу берут блокировку на запись (IMMEDIATE) — без взаимоблокировок при повышении
+    # блокировки с чтения до записи.
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME') or BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                'timeout': int(os.getenv('DB_SQLITE_TIMEOUT', '20')),
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA cache_size=-20000'
+                ),
+            },
+        }
     }
+
+# Общий кэш Django для всех воркеров: штамп версии настроек сайта (core.utils), «липкость»
+# к основной базе после записи (shop.db_routing), переключатель профилирования, счётчики пагинации.
+# redis — CACHE_LOCATION=redis://...; db — таблица django_cache в основной базе
+# (python manage.py createcachetable); locmem — свой у каждого процесса, только для разработки.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem' if DEBUG else 'db')
+CACHE_BACKENDS = {
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f'CACHE_BACKEND: ожидается одно из {", ".join(CACHE_BACKENDS)}')
+CACHES = {'default': CACHE_BACKENDS[CACHE_BACKEND]}
+
+DATABASE_ROUTERS = ['shop.db_routing.ReplicaRouter']
+# Пути, GET-запросы к которым читают с реплики, и «липкость» к основной базе после записи (секунд)
+DATABASE_REPLICA_PATHS = ('/api/catalog/', '/api/async/')
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', '5'))
+
+# Кэш ответов каталога для гостей (catalog.response_cache): locmem / file / redis / none
+CATALOG_RESPONSE_CACHE = {
+    'BACKEND': os.getenv('CATALOG_CACHE_BACKEND', 'locmem'),
+    # file — каталог (по умолчанию BASE_DIR/cache/catalog), redis — redis://... или fakeredis://
+    'LOCATION': os.getenv('CATALOG_CACHE_LOCATION', ''),
+    'MAX_ENTRIES': int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', '2000')),
+    'MAX_BYTES': int(os.getenv('CATALOG_CACHE_MAX_MB', '64')) * 1024 * 1024,
+    'TIMEOUT': int(os.getenv('CATALOG_CACHE_TIMEOUT', '600')),
 }
 
+# Статический снимок каталога (manage.py export_catalog_snapshot) — каталог, который отдаёт nginx / CDN
+CATALOG_SNAPSHOT_ROOT = os.getenv('CATALOG_SNAPSHOT_ROOT', str(BASE_DIR / 'catalog_snapshot'))
+
+# Метрики запросов (shop.instrumentation): разбивка времени для доли запросов SAMPLE_RATE,
+# Server-Timing, JSON-лог shop.requests, /metrics для Prometheus (Bearer TOKEN или сотрудник)
+REQUEST_METRICS = {
+    'SAMPLE_RATE': float(os.getenv('REQUEST_METRICS_SAMPLE_RATE', '0.05')),
+    'SLOW_MS': int(os.getenv('REQUEST_METRICS_SLOW_MS', '1000')),
+    'SERVER_TIMING': os.getenv('REQUEST_METRICS_SERVER_TIMING', 'True') == 'True',
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
+}
+
+# Профилирование view (shop.profiling): заголовок X-Profile, переключатель в админке
+# (/admin/profiles/) или постоянная выборка PROFILING_SAMPLE_RATE для PROFILING_VIEWS
+PROFILING = {
+    'ENGINE': os.getenv('PROFILING_ENGINE', 'sample'),  # sample — стеки (.folded), cprofile — .prof
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', '0')),
+    'VIEWS': tuple(v for v in os.getenv('PROFILING_VIEWS', 'products-list,orders-create-order').split(',') if v),
+    'TOKEN': os.getenv('PROFILING_TOKEN', ''),
+    'MAX_FILES': int(os.getenv('PROFILING_MAX_FILES', '200')),
+}
+PROFILING_ROOT = os.getenv('PROFILING_ROOT', str(BASE_DIR / 'profiles'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {'message': {'format': '%(message)s'}},
+    'handlers': {'request_metrics': {'class': 'logging.StreamHandler', 'formatter': 'message'}},
+    'loggers': {
+        'shop.requests': {
+            'handlers': ['request_metrics'],
+            'level': os.getenv('REQUEST_METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Сквозной бенчмарк API (manage.py bench_api): история замеров и базовая линия
+BENCHMARK_ROOT = os.getenv('BENCHMARK_ROOT', str(BASE_DIR / 'benchmarks'))
+
 AUTH_USER_MODEL = 'accounts.User'
 
 SIMPLE_JWT = {
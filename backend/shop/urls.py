@@ -5,6 +5,7 @@ from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
 from .views import api_root
 from .admin_site import custom_admin_site
+from .instrumentation import metrics_view
 
 # Подключаем кастомную главную админки (статистика); модели остаются на default site
 custom_admin_site._registry = admin.site._registry
@@ -12,6 +13,7 @@ custom_admin_site._registry = admin.site._registry
 urlpatterns = [
     path('', api_root, name='api-root'),
     path('admin/', custom_admin_site.urls),
+    path('metrics', metrics_view, name='metrics'),
 
     # JWT аутентификация
     path('api/auth/jwt/create/', TokenObtainPairView.as_view(), name='jwt-create'),
@@ -22,6 +24,9 @@ urlpatterns = [
     path('api/auth/', include('djoser.urls')),
     
     path('api/catalog/', include('catalog.urls')),
+    # Async-чтение каталога и контента для ASGI-сервера (uvicorn)
+    path('api/async/catalog/', include('catalog.async_urls')),
+    path('api/async/', include('core.urls')),
     path('api/accounts/', include('accounts.urls')),
     path('api/cart/', include('cart.urls')),
     path('api/orders/', include('orders.urls')),
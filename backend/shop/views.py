@@ -21,6 +21,13 @@ def api_root(request):
                 'login': '/api/accounts/login/',
                 'profile': '/api/accounts/profile/',
             },
+            'async': {
+                'products': '/api/async/catalog/products/',
+                'categories': '/api/async/catalog/categories/',
+                'brands': '/api/async/catalog/brands/',
+                'pages': '/api/async/pages/',
+                'site_settings': '/api/async/site-settings/',
+            },
             'cart': '/api/cart/',
             'orders': '/api/orders/',
         }
@@ -4,6 +4,7 @@ import { Container, Row, Col, Card, Badge, Spinner, Alert, Form, Button } from '
 import { Link, useNavigate, useSearchParams } from 'react-router-dom';
 import { FaStar, FaPlus, FaMinus, FaShoppingCart } from 'react-icons/fa';
 import AuthRequiredModal from '../common/AuthRequiredModal';
+import { isOutOfStock, stockKnown, withStock } from '../../utils/stock';
 
 const Catalog = () => {
   const [products, setProducts] = useState([]);
@@ -84,7 +85,7 @@ const Catalog = () => {
 
         setCategories(categoriesData.results || categoriesData);
         setBrands(brandsData.results || brandsData);
-        setProducts(productsData.results || productsData);
+        setProducts(await withStock(apiUrl, productsData.results || productsData));
         setLoading(false);
       } catch (error) {
         console.error('Error fetching data:', error);
@@ -309,8 +310,8 @@ const Catalog = () => {
       const matchesMinPrice = !priceRange.min || parseFloat(product.price) >= parseFloat(priceRange.min);
       const matchesMaxPrice = !priceRange.max || parseFloat(product.price) <= parseFloat(priceRange.max);
 
-      // Фильтр по наличию
-      const matchesStock = !inStockOnly || product.stock > 0;
+      // Фильтр по наличию (товары с неизвестным остатком не скрываем)
+      const matchesStock = !inStockOnly || !isOutOfStock(product);
 
       return matchesCategory && matchesBrand && matchesSearch &&
         matchesMinPrice && matchesMaxPrice && matchesStock;
@@ -466,9 +467,13 @@ const Catalog = () => {
                         <span className="h5 text-primary mb-0">
                           {product.price} BYN
                         </span>
-                        <Badge bg={product.stock > 0 ? 'success' : 'danger'}>
-                          {product.stock > 0 ? `В наличии: ${product.stock}` : 'Нет в наличии'}
-                        </Badge>
+                        {!stockKnown(product) ? (
+                          <Badge bg="secondary">Наличие уточняется</Badge>
+                        ) : (
+                          <Badge bg={product.stock > 0 ? 'success' : 'danger'}>
+                            {product.stock > 0 ? `В наличии: ${product.stock}` : 'Нет в наличии'}
+                          </Badge>
+                        )}
                       </div>
 
                       {/* Блок с кнопками управления товаром */}
@@ -480,7 +485,7 @@ const Catalog = () => {
                             size="sm"
                             onClick={() => decreaseQuantity(product.id)}
                             className="quantity-btn"
-                            disabled={product.stock === 0}
+                            disabled={isOutOfStock(product)}
                           >
                             <FaMinus />
                           </Button>
@@ -490,7 +495,7 @@ const Catalog = () => {
                             size="sm"
                             onClick={() => increaseQuantity(product.id)}
                             className="quantity-btn"
-                            disabled={product.stock === 0}
+                            disabled={isOutOfStock(product)}
                           >
                             <FaPlus />
                           </Button>
@@ -504,7 +509,7 @@ const Catalog = () => {
                             size="sm"
                             onClick={() => buyProduct(product)}
                             className="buy-btn"
-                            disabled={product.stock === 0}
+                            disabled={isOutOfStock(product)}
                           >
                             <FaShoppingCart className="me-1" />
                             Купить
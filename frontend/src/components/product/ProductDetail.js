@@ -14,6 +14,7 @@ import {
     FaMinus,
     FaPlus
 } from 'react-icons/fa';
+import { isOutOfStock, stockKnown, withStock } from '../../utils/stock';
 
 function ProductDetail() {
     const { slug } = useParams();
@@ -42,7 +43,8 @@ function ProductDetail() {
 
                 // Ищем товар с нужным slug
                 const allProducts = data.results || data;
-                const productData = allProducts.find(p => p.slug === slug);
+                const found = allProducts.find(p => p.slug === slug);
+                const productData = found && (await withStock(apiUrl, [found]))[0];
 
                 setProduct(productData);
 
@@ -56,7 +58,7 @@ function ProductDetail() {
                         const related = (relatedData.results || relatedData)
                             .filter(p => p.slug !== slug) // Исключаем текущий товар
                             .slice(0, 4); // Берём только 4 товара
-                        setRelatedProducts(related);
+                        setRelatedProducts(await withStock(apiUrl, related));
                     }
                 }
 
@@ -72,7 +74,7 @@ function ProductDetail() {
 
     // Увеличить количество
     const increaseQuantity = () => {
-        if (quantity < product.stock) {
+        if (!stockKnown(product) || quantity < product.stock) {
             setQuantity(quantity + 1);
         }
     };
@@ -188,7 +190,7 @@ function ProductDetail() {
                                     alt={product.name}
                                     className="img-fluid"
                                 />
-                                {product.stock === 0 && (
+                                {isOutOfStock(product) && (
                                     <div className="out-of-stock-badge">Нет в наличии</div>
                                 )}
                             </div>
@@ -261,9 +263,13 @@ function ProductDetail() {
                                                     <tr>
                                                         <td>Наличие</td>
                                                         <td>
-                                                            <strong className={product.stock > 0 ? 'text-success' : 'text-danger'}>
-                                                                {product.stock > 0 ? `В наличии (${product.stock} шт.)` : 'Нет в наличии'}
-                                                            </strong>
+                                                            {!stockKnown(product) ? (
+                                                                <strong className="text-muted">Наличие уточняется</strong>
+                                                            ) : (
+                                                                <strong className={product.stock > 0 ? 'text-success' : 'text-danger'}>
+                                                                    {product.stock > 0 ? `В наличии (${product.stock} шт.)` : 'Нет в наличии'}
+                                                                </strong>
+                                                            )}
                                                         </td>
                                                     </tr>
                                                 </tbody>
@@ -307,7 +313,11 @@ function ProductDetail() {
                                     <span className="current-price">{product.price} BYN</span>
                                 </div>
                                 <div className="stock-info">
-                                    {product.stock > 0 ? (
+                                    {!stockKnown(product) ? (
+                                        <Badge bg="secondary" className="stock-badge">
+                                            Наличие уточняется
+                                        </Badge>
+                                    ) : product.stock > 0 ? (
                                         <Badge bg="success" className="stock-badge">
                                             <FaCheck /> В наличии: {product.stock} шт.
                                         </Badge>
@@ -343,7 +353,7 @@ function ProductDetail() {
                                         <button
                                             className="quantity-btn"
                                             onClick={increaseQuantity}
-                                            disabled={quantity >= product.stock}
+                                            disabled={stockKnown(product) && quantity >= product.stock}
                                         >
                                             <FaPlus />
                                         </button>
@@ -357,7 +367,7 @@ function ProductDetail() {
                                         size="lg"
                                         className="add-to-cart-btn"
                                         onClick={addToCart}
-                                        disabled={product.stock === 0 || addingToCart}
+                                        disabled={isOutOfStock(product) || addingToCart}
                                     >
                                         <FaShoppingCart className="me-2" />
                                         {addingToCart ? 'Добавление...' : 'Добавить в корзину'}
@@ -440,9 +450,13 @@ function ProductDetail() {
                                                 </Card.Title>
                                                 <div className="d-flex justify-content-between align-items-center">
                                                     <span className="h5 text-primary mb-0">{relatedProduct.price} BYN</span>
-                                                    <Badge bg={relatedProduct.stock > 0 ? 'success' : 'danger'}>
-                                                        {relatedProduct.stock > 0 ? 'В наличии' : 'Нет'}
-                                                    </Badge>
+                                                    {!stockKnown(relatedProduct) ? (
+                                                        <Badge bg="secondary">Уточняется</Badge>
+                                                    ) : (
+                                                        <Badge bg={relatedProduct.stock > 0 ? 'success' : 'danger'}>
+                                                            {relatedProduct.stock > 0 ? 'В наличии' : 'Нет'}
+                                                        </Badge>
+                                                    )}
                                                 </div>
                                             </Card.Body>
                                         </Card>
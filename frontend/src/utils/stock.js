@@ -0,0 +1,47 @@
+/**
+ * Остатки товаров. В ответах каталога остатка нет (он меняется с каждым заказом,
+ * а ответы каталога кэшируются), поэтому он догружается из /catalog/stock/?ids=...
+ */
+
+const MAX_IDS = 500;
+
+/**
+ * Остаток известен. stock: null — запрос остатков не удался, наличие уточняется.
+ * @param {object} product
+ * @returns {boolean}
+ */
+export function stockKnown(product) {
+    return typeof product.stock === 'number';
+}
+
+/**
+ * Товара точно нет. Неизвестный остаток покупку не блокирует — его проверит сервер.
+ * @param {object} product
+ * @returns {boolean}
+ */
+export function isOutOfStock(product) {
+    return stockKnown(product) && !(product.stock > 0);
+}
+
+/**
+ * Дописывает товарам поле stock; товарам без ответа (сбой запроса) — stock: null.
+ * @param {string} apiUrl
+ * @param {Array<object>} products
+ * @returns {Promise<Array<object>>}
+ */
+export async function withStock(apiUrl, products) {
+    if (!products || products.length === 0) return products || [];
+    const ids = products.map(p => p.id);
+    const stock = {};
+    for (let i = 0; i < ids.length; i += MAX_IDS) {
+        try {
+            const response = await fetch(`${apiUrl}/catalog/stock/?ids=${ids.slice(i, i + MAX_IDS).join(',')}`);
+            if (response.ok) {
+                Object.assign(stock, await response.json());
+            }
+        } catch (error) {
+            console.error('Error fetching stock:', error);
+        }
+    }
+    return products.map(p => ({ ...p, stock: String(p.id) in stock ? stock[String(p.id)] : null }));
+}